@@ -1,6 +1,108 @@
-def main():
-    print("Hello from test!")
+"""
+浏览器测试运行器
+
+发现 src/tests/python 下的测试协程，分配到多个工作进程并行执行（每个进程一个浏览器），
+输出每个测试的结果和耗时，并写出 JSON / JUnit XML 报告。
+
+用法:
+    python main.py                       # 所有测试，进程数等于 CPU 核心数
+    python main.py -k all_enemies -j 2   # 只运行 id 包含 all_enemies 的测试，2 个进程
+    python main.py --list                # 只列出测试
+    python main.py --build               # 先构建 dist/，再由内置静态服务器提供页面
+    python main.py --trace traces        # 每个测试写出 Chrome 跟踪文件和最慢步骤汇总
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+TESTS_DIR = Path(__file__).resolve().parent / 'src' / 'tests' / 'python'
+sys.path.insert(0, str(TESTS_DIR))
+
+from harness.runner import (  # noqa: E402
+    DEFAULT_TIMEOUT,
+    discover,
+    order_by_history,
+    run,
+    summarize,
+    write_json,
+    write_junit,
+)
+from harness.server import build_dist, precompress  # noqa: E402
+
+STATUS_LABELS = {'passed': '通过', 'failed': '失败', 'error': '错误', 'timeout': '超时', 'skipped': '跳过'}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='并行运行 src/tests/python 下的浏览器测试')
+    parser.add_argument('-k', '--keyword', action='append', default=[],
+                        help='只运行 id（模块::函数）包含该关键字的测试，可重复')
+    parser.add_argument('-j', '--workers', type=int, default=None, help='工作进程数，默认等于 CPU 核心数')
+    parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT, help='单个测试的超时（秒）')
+    parser.add_argument('--headed', action='store_true', help='显示浏览器窗口')
+    parser.add_argument('--dist', default=None,
+                        help='由内置静态服务器提供该目录下的构建产物，不再需要手动启动开发服务器')
+    parser.add_argument('--build', action='store_true', help='先运行 npm run build 并预压缩，等同于 --dist dist')
+    parser.add_argument('--json', default='test-report.json', help='JSON 报告路径，也用于按历史耗时排序')
+    parser.add_argument('--junit', default=None, help='JUnit XML 报告路径')
+    parser.add_argument('--trace', default=None, metavar='DIR',
+                        help='把每个测试的 Chrome trace-event JSON 写入该目录，可在 Perfetto 中打开')
+    parser.add_argument('-v', '--verbose', action='store_true', help='输出所有测试的日志，而不仅是失败的测试')
+    parser.add_argument('--list', action='store_true', help='只列出发现的测试')
+    return parser.parse_args(argv)
+
+
+def print_result(result):
+    print(f"[{STATUS_LABELS[result.status]}] {result.id} ({result.duration:.1f}s, 进程 {result.worker})")
+    if result.message and not result.passed:
+        print(f"    {result.message}")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    tests = discover(TESTS_DIR, args.keyword)
+    if args.list:
+        for test in tests:
+            print(test.id)
+        return 0
+    if not tests:
+        print("没有找到测试")
+        return 1
+
+    if args.build:
+        args.dist = build_dist()
+        print(f"已构建 {args.dist}，预压缩 {precompress(args.dist)} 个文件")
+    if args.dist:
+        # 工作进程以 spawn 启动，读取 harness.config 时继承该环境变量
+        os.environ['GAME_DIST'] = str(Path(args.dist).resolve())
+
+    tests = order_by_history(tests, args.json)
+    print(f"发现 {len(tests)} 个测试")
+    started = time.perf_counter()
+    results = run(tests, workers=args.workers, directory=TESTS_DIR, headless=not args.headed,
+                  timeout=args.timeout, on_result=print_result, trace_dir=args.trace)
+    wall_time = time.perf_counter() - started
+
+    for result in results:
+        if result.output and (args.verbose or not result.passed):
+            print(f"\n===== {result.id} =====")
+            print(result.output, end='' if result.output.endswith('\n') else '\n')
+
+    counts = summarize(results)
+    test_time = sum(result.duration for result in results)
+    print(f"\n共 {len(results)} 个测试: " + ", ".join(f"{STATUS_LABELS[s]} {n}" for s, n in counts.items()))
+    print(f"总耗时: {wall_time:.1f}s, 测试累计耗时: {test_time:.1f}s")
+
+    if args.trace:
+        print(f"跟踪文件: {args.trace}")
+    write_json(results, args.json, wall_time)
+    print(f"JSON 报告: {args.json}")
+    if args.junit:
+        write_junit(results, args.junit, wall_time)
+        print(f"JUnit 报告: {args.junit}")
+    return 0 if counts['passed'] + counts['skipped'] == len(results) else 1
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,59 @@
+"""
+Playwright 测试工具集
+
+供 src/tests/python 下的浏览器测试脚本共用。
+"""
+from .channel import EventChannel
+from .clock import VirtualClock
+from .logs import LogStream
+from .pool import BrowserPool, game_page, run_tests, session
+from .probe import GameSnapshot, snapshot, snapshots
+from .rng import SeededRandom, find_seed
+from .saves import SaveState, refresh_ui, save_scenario
+from .scenarios import ScenarioResult, format_report, run_enemy_scenarios
+from .waits import (
+    ConsoleMarkers,
+    cast_first_available,
+    cast_spell,
+    open_tab,
+    rest,
+    restart_game,
+    start_battle,
+    wait_for_battle_end,
+    wait_for_player_turn,
+    wait_for_scene,
+)
+from .widgets import shop_items, spell_buttons
+
+__all__ = [
+    'BrowserPool',
+    'ConsoleMarkers',
+    'EventChannel',
+    'GameSnapshot',
+    'LogStream',
+    'SaveState',
+    'ScenarioResult',
+    'SeededRandom',
+    'VirtualClock',
+    'cast_first_available',
+    'cast_spell',
+    'find_seed',
+    'format_report',
+    'game_page',
+    'open_tab',
+    'refresh_ui',
+    'rest',
+    'restart_game',
+    'run_enemy_scenarios',
+    'run_tests',
+    'save_scenario',
+    'session',
+    'shop_items',
+    'snapshot',
+    'snapshots',
+    'spell_buttons',
+    'start_battle',
+    'wait_for_battle_end',
+    'wait_for_player_turn',
+    'wait_for_scene',
+]
@@ -0,0 +1,108 @@
+"""
+页面内事件通道
+
+battleSystem.ts 和 ui.ts 的每一条 console.log 都会经 CDP 变成一个 console 事件送到 Python，
+其中大部分是悬停法术按钮的 [DEBUG] 日志和 updateEnemyInfo 每帧输出的 Enemy HP。
+EventChannel 在页面加载前包装 console.log：只保留以订阅前缀开头的消息，
+同一动画帧内的消息合并成一个字符串，通过一个 expose_binding 发送；
+未订阅的消息在页面内直接丢弃，不再产生 console 事件，Python 侧的开销只与订阅的事件数量有关。
+收到的消息送入 ConsoleMarkers，并保存在它的 LogStream 中，现有的等待工具和日志查询可以直接使用。
+"""
+import json
+
+from .waits import ConsoleMarkers
+
+# 默认订阅：waits.py 的控制台标记和 logs.py 能解析的日志
+DEFAULT_PREFIXES = (
+    '[BATTLE]',
+    '[ENEMY]',
+    '[EVENT]',
+    '[LEVEL]',
+    '[REST]',
+    '[REWARD]',
+    '[RUNE]',
+    '[SCENE]',
+    'Calculated spell:',
+    'Start cast result:',
+)
+
+# 一批最多包含的消息数，攒满后不等动画帧立即发送
+MAX_BATCH = 256
+
+# 批内消息分隔符（ASCII 记录分隔符，游戏日志中不会出现）
+SEPARATOR = '\x1e'
+
+# 只包装 console.log，console.warn / console.error 保持原样
+_CHANNEL = """({prefixes, mute, maxBatch, separator}) => {
+    if (window.__eventChannel) return;
+    const log = console.log.bind(console);
+    const nextFrame = window.requestAnimationFrame.bind(window);
+    let pending = [];
+    let scheduled = false;
+    let sent = Promise.resolve();
+
+    const flush = () => {
+        scheduled = false;
+        if (pending.length) {
+            const batch = pending.join(separator);
+            pending = [];
+            sent = window.__events(batch);
+        }
+        return sent;
+    };
+
+    console.log = (...args) => {
+        const text = args.map(String).join(' ');
+        if (prefixes.some((prefix) => text.startsWith(prefix))) {
+            pending.push(text);
+            if (pending.length >= maxBatch) {
+                flush();
+            } else if (!scheduled) {
+                scheduled = true;
+                nextFrame(flush);
+            }
+        }
+        if (!mute) log(...args);
+    };
+    Object.defineProperty(window, '__eventChannel', { value: { flush } });
+}"""
+
+_FLUSH = '() => window.__eventChannel.flush()'
+
+
+def tag_prefixes(*tags):
+    """把日志标签转为订阅前缀，例如 tag_prefixes('BATTLE') == ('[BATTLE]',)"""
+    return tuple(f'[{tag}]' for tag in tags)
+
+
+class EventChannel:
+    """
+    订阅页面日志的事件通道，作为 BrowserPool.page 的 setup 使用，每个页面一个实例
+    @param prefixes 订阅的消息前缀
+    @param mute 为 True 时 console.log 不再输出到控制台（默认），page.on('console') 收不到这些日志；
+                调试时设为 False，但控制台流量也随之恢复
+    """
+
+    def __init__(self, prefixes=DEFAULT_PREFIXES, mute=True, max_batch=MAX_BATCH):
+        self.prefixes = tuple(prefixes)
+        self.mute = mute
+        self.max_batch = max_batch
+        self.markers = ConsoleMarkers()
+        self.logs = self.markers.logs
+        self.events = 0
+        self.batches = 0
+
+    async def __call__(self, context):
+        options = dict(prefixes=self.prefixes, mute=self.mute, maxBatch=self.max_batch, separator=SEPARATOR)
+        await context.expose_binding('__events', self._on_batch)
+        await context.add_init_script(script=f"({_CHANNEL})({json.dumps(options)})")
+
+    def _on_batch(self, source, batch):
+        self.batches += 1
+        for text in batch.split(SEPARATOR):
+            self.events += 1
+            self.markers.feed(text)
+
+    async def flush(self, page):
+        """立即发送页面中尚未发送的消息，返回时它们已经送达 markers 和 logs"""
+        await page.evaluate(_FLUSH)
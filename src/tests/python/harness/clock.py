@@ -0,0 +1,85 @@
+"""
+虚拟时钟
+
+在页面加载前通过 Playwright 的 clock 接管 performance.now、Date.now、
+setTimeout/setInterval 和 requestAnimationFrame，游戏时间只在测试推进时流动。
+ATBSystem.updatePlayerATB、updateCast 和 main.ts 中的 GameLoop 因此以固定帧间隔运行，
+10 秒的战斗可以一次推进完成，每次运行结果一致。
+"""
+import asyncio
+from contextlib import asynccontextmanager
+
+from .trace import traced
+
+# 虚拟时钟起点（毫秒），固定 Date.now 的结果
+EPOCH = 1_700_000_000_000
+
+# run_until 每步推进的游戏时间（秒）
+DEFAULT_STEP = 0.1
+
+# 常用的页面条件（依赖开发模式下的 window.game）
+PLAYER_TURN = """() => {
+    const battle = window.game.state.battle;
+    return !battle.active || (battle.phase === 'action' && battle.currentActor === 'player');
+}"""
+IN_CAMP = "() => window.game.state.scene === 'camp'"
+
+
+class VirtualClock:
+    """可控游戏时钟，作为 BrowserPool.page 的 setup 使用"""
+
+    def __init__(self, epoch=EPOCH):
+        self.epoch = epoch
+        self.clock = None
+        self.elapsed = 0.0
+
+    async def __call__(self, context):
+        """在上下文中安装假时钟并暂停，必须在页面加载前调用"""
+        self.clock = context.clock
+        await self.clock.install(time=self.epoch)
+        await self.clock.pause_at(self.epoch + 1)
+        self.elapsed = 0.0
+
+    @traced('clock.advance', lambda self, seconds: {'seconds': seconds})
+    async def advance(self, seconds):
+        """推进游戏时间，期间触发的所有定时器和动画帧都会执行"""
+        await self.clock.run_for(round(seconds * 1000))
+        self.elapsed += seconds
+
+    @traced('clock.run_until')
+    async def run_until(self, page, predicate, step=DEFAULT_STEP, limit=60.0):
+        """
+        按固定步长推进时间直到页面内的 predicate 为真
+        @param predicate JS 函数表达式，例如 "() => window.game.state.scene === 'camp'"
+        @param limit 最多推进的游戏时间（秒）
+        @returns 实际推进的游戏时间（秒）
+        """
+        advanced = 0.0
+        while not await page.evaluate(predicate):
+            if advanced >= limit:
+                raise TimeoutError(f"推进 {limit}s 游戏时间后条件仍未满足: {predicate}")
+            await self.advance(step)
+            advanced += step
+        return advanced
+
+    @asynccontextmanager
+    async def compressed(self, factor, tick=0.05):
+        """
+        按压缩倍率让游戏时间持续流动，已有的事件驱动等待无需改动
+        @param factor 每秒真实时间对应的游戏秒数
+        @param tick 真实时间的推进间隔（秒）
+        """
+        async def run():
+            while True:
+                await asyncio.sleep(tick)
+                await self.advance(tick * factor)
+
+        task = asyncio.create_task(run())
+        try:
+            yield self
+        finally:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
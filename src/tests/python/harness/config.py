@@ -0,0 +1,18 @@
+"""
+测试环境配置
+
+可通过环境变量覆盖：
+- GAME_URL: 游戏页面地址
+- GAME_DIST: vite build 的输出目录；设置后由测试工具内置的静态服务器提供页面，忽略 GAME_URL
+- CHROMIUM_PATH: Chromium 可执行文件路径，设为空字符串则使用 Playwright 自带的浏览器
+"""
+import os
+
+GAME_URL = os.environ.get('GAME_URL', 'http://localhost:3001/test/')
+
+GAME_DIST = os.environ.get('GAME_DIST') or None
+
+CHROMIUM_PATH = os.environ.get(
+    'CHROMIUM_PATH',
+    r"d:\test\playwright-browsers\chromium-1208\chrome-win64\chrome.exe",
+) or None
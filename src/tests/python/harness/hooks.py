@@ -0,0 +1,33 @@
+"""
+window.game 赋值钩子
+
+main.ts 在开发模式下于模块末尾赋值 window.game。需要包装 engine 方法的 init script
+（ATB 时间线、输入录制）通过 window.__onGame(callback) 注册回调，赋值时依次调用；
+多个脚本共用同一个属性访问器，不会互相覆盖。
+"""
+
+ON_GAME = """(() => {
+    if (window.__onGame) return;
+    const callbacks = [];
+    let game;
+    Object.defineProperty(window, '__onGame', {
+        value: (callback) => {
+            callbacks.push(callback);
+            if (game && game.engine) callback(game);
+        },
+    });
+    Object.defineProperty(window, 'game', {
+        configurable: true,
+        enumerable: true,
+        get: () => game,
+        set: (value) => {
+            game = value;
+            if (value && value.engine) callbacks.forEach((callback) => callback(value));
+        },
+    });
+})()"""
+
+
+async def install_game_hook(context):
+    """注册 window.__onGame，必须在使用它的 init script 之前调用；重复调用没有副作用"""
+    await context.add_init_script(script=ON_GAME)
@@ -0,0 +1,271 @@
+"""
+结构化控制台日志
+
+把 battleSystem.ts / engine.ts 输出的 `[TAG] ...` 日志在控制台事件到达时解析为记录：
+伤害、HP变化、奖励、升级、符文选择等。记录保存在固定容量的环形缓冲区中，
+按标签、记录类型和战斗编号建立索引，查询是索引查找而不是全量扫描，
+长时间运行时内存占用保持不变。
+"""
+import re
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+
+# 环形缓冲区默认容量（条）
+DEFAULT_CAPACITY = 5000
+
+# 战斗边界：开始战斗到回到营地（正常结束或撤退）之间的日志属于同一场战斗
+_BATTLE_OPEN = '[EVENT] 开始战斗'
+_BATTLE_CLOSE = ('[SCENE] 切换到营地场景', '[EVENT] 撤退成功')
+
+_TAG_PATTERN = re.compile(r'^\[(\w+)\]')
+_NUMBER = r'(-?\d+(?:\.\d+)?)'
+
+
+def _number(text):
+    value = float(text)
+    return int(value) if value.is_integer() else value
+
+
+@dataclass
+class LogRecord:
+    """一条控制台日志；无法识别的日志也保存为 LogRecord"""
+    seq: int
+    battle: int | None
+    tag: str | None
+    text: str
+
+
+@dataclass
+class BattleStart(LogRecord):
+    enemy: str = ''
+    hp: float = 0
+    max_hp: float = 0
+    dmg: float = 0
+    speed: float = 0
+
+
+@dataclass
+class BattleEnd(LogRecord):
+    victory: bool = False
+
+
+@dataclass
+class Damage(LogRecord):
+    """敌人对玩家造成的伤害（普通攻击或吟唱技能）"""
+    attacker: str = ''
+    skill: str | None = None
+    amount: float = 0
+    hp_before: float = 0
+    hp_after: float = 0
+
+
+@dataclass
+class Interrupt(LogRecord):
+    """玩家施法被打断"""
+
+
+@dataclass
+class SpellCast(LogRecord):
+    """玩家开始施法时计算出的法术"""
+    name: str = ''
+    cost: float = 0
+    time: float = 0
+
+
+@dataclass
+class Reward(LogRecord):
+    """kind 为 gold / experience / material；素材奖励的 item 为素材名称，amount 固定为 1"""
+    kind: str = ''
+    amount: float = 0
+    total: float = 0
+    item: str | None = None
+
+
+@dataclass
+class LevelUp(LogRecord):
+    level_before: int = 0
+    level_after: int = 0
+
+
+@dataclass
+class RuneChoice(LogRecord):
+    choices: list = field(default_factory=list)
+
+
+@dataclass
+class Rest(LogRecord):
+    hp_before: float = 0
+    hp_after: float = 0
+    mp_before: float = 0
+    mp_after: float = 0
+
+
+# (记录类型, 正则, 字段转换)，按顺序匹配第一条
+_RULES = [
+    (BattleStart, re.compile(
+        rf'^\[BATTLE\] 遇到了 (.+?) \(HP: {_NUMBER}, MaxHP: {_NUMBER}, DMG: {_NUMBER}, Speed: {_NUMBER}\)'),
+     lambda m: dict(enemy=m[1], hp=_number(m[2]), max_hp=_number(m[3]), dmg=_number(m[4]), speed=_number(m[5]))),
+    (BattleEnd, re.compile(r'^\[EVENT\] 结束战斗，结果: (胜利|失败)'),
+     lambda m: dict(victory=m[1] == '胜利')),
+    (Damage, re.compile(rf'^\[ENEMY\] (.+?) 使用 (.+?) 造成 {_NUMBER} 点伤害！玩家HP: {_NUMBER} → {_NUMBER}'),
+     lambda m: dict(attacker=m[1], skill=m[2], amount=_number(m[3]), hp_before=_number(m[4]), hp_after=_number(m[5]))),
+    (Damage, re.compile(rf'^\[ENEMY\] (.+?) 吟唱技能造成 {_NUMBER} 点伤害！玩家HP: {_NUMBER} → {_NUMBER}'),
+     lambda m: dict(attacker=m[1], amount=_number(m[2]), hp_before=_number(m[3]), hp_after=_number(m[4]))),
+    (Interrupt, re.compile(r'^\[ENEMY\] 攻击打断了玩家施法'), lambda m: {}),
+    (SpellCast, re.compile(rf'^Calculated spell: (.*), Cost: {_NUMBER}, Time: {_NUMBER}'),
+     lambda m: dict(name=m[1], cost=_number(m[2]), time=_number(m[3]))),
+    (Reward, re.compile(rf'^\[REWARD\] 获得 {_NUMBER} 金币，当前金币: {_NUMBER}'),
+     lambda m: dict(kind='gold', amount=_number(m[1]), total=_number(m[2]))),
+    (Reward, re.compile(rf'^\[REWARD\] 获得 {_NUMBER} 经验值，当前经验: {_NUMBER}'),
+     lambda m: dict(kind='experience', amount=_number(m[1]), total=_number(m[2]))),
+    (Reward, re.compile(rf'^\[REWARD\] 获得 (.+?)，当前数量: {_NUMBER}'),
+     lambda m: dict(kind='material', amount=1, item=m[1], total=_number(m[2]))),
+    (LevelUp, re.compile(r'^\[LEVEL\] 升级成功！从 (\d+) 级升至 (\d+) 级'),
+     lambda m: dict(level_before=int(m[1]), level_after=int(m[2]))),
+    (RuneChoice, re.compile(r'^\[RUNE\] 符文选择选项: (.*)'),
+     lambda m: dict(choices=[choice for choice in m[1].split(', ') if choice])),
+    (Rest, re.compile(rf'^\[REST\] HP恢复: {_NUMBER} → {_NUMBER}, MP恢复: {_NUMBER} → {_NUMBER}'),
+     lambda m: dict(hp_before=_number(m[1]), hp_after=_number(m[2]), mp_before=_number(m[3]), mp_after=_number(m[4]))),
+]
+
+
+def parse_line(text, seq=0, battle=None):
+    """把一行控制台文本解析为记录"""
+    tag_match = _TAG_PATTERN.match(text)
+    tag = tag_match.group(1) if tag_match else None
+    for kind, pattern, convert in _RULES:
+        match = pattern.match(text)
+        if match:
+            return kind(seq, battle, tag, text, **convert(match))
+    return LogRecord(seq, battle, tag, text)
+
+
+class LogStream:
+    """
+    控制台日志流
+    记录按到达顺序编号（seq），只保留最近 capacity 条；
+    索引中只保存 seq，最旧的记录被覆盖时同步从各索引的头部移除
+    """
+
+    def __init__(self, page=None, capacity=DEFAULT_CAPACITY):
+        self.capacity = capacity
+        self.battles = 0
+        self.current_battle = None
+        self._ring = [None] * capacity
+        self._next = 0
+        self._by_tag = defaultdict(deque)
+        self._by_kind = defaultdict(deque)
+        # 战斗编号 -> {记录类型: seq 队列}，键 None 保存该战斗的全部记录
+        self._by_battle = {}
+        if page is not None:
+            page.on('console', self._on_console)
+
+    def _on_console(self, msg):
+        self.feed(msg.text)
+
+    def feed(self, text):
+        """解析并保存一行日志，返回记录"""
+        if text.startswith(_BATTLE_OPEN):
+            self.battles += 1
+            self.current_battle = self.battles
+
+        seq = self._next
+        record = parse_line(text, seq, self.current_battle)
+        self._evict(seq)
+        self._ring[seq % self.capacity] = record
+        self._next += 1
+
+        self._by_tag[record.tag].append(seq)
+        self._by_kind[type(record)].append(seq)
+        if record.battle is not None:
+            battle_index = self._by_battle.setdefault(record.battle, defaultdict(deque))
+            battle_index[None].append(seq)
+            battle_index[type(record)].append(seq)
+
+        if text.startswith(_BATTLE_CLOSE):
+            self.current_battle = None
+        return record
+
+    def _evict(self, seq):
+        """覆盖环形缓冲区中最旧的记录，它一定位于各个索引的最前面"""
+        old = self._ring[seq % self.capacity]
+        if old is None:
+            return
+        self._popleft(self._by_tag, old.tag)
+        self._popleft(self._by_kind, type(old))
+        if old.battle is not None:
+            battle_index = self._by_battle[old.battle]
+            self._popleft(battle_index, None)
+            self._popleft(battle_index, type(old))
+            if not battle_index:
+                del self._by_battle[old.battle]
+
+    @staticmethod
+    def _popleft(index, key):
+        seqs = index[key]
+        seqs.popleft()
+        if not seqs:
+            del index[key]
+
+    def __len__(self):
+        return min(self._next, self.capacity)
+
+    @property
+    def oldest(self):
+        """缓冲区中最旧记录的 seq"""
+        return max(0, self._next - self.capacity)
+
+    def mark(self):
+        """返回下一条记录的 seq，用于只查询之后产生的日志"""
+        return self._next
+
+    def get(self, seq):
+        """按 seq 取记录，已被覆盖或尚未产生时返回 None"""
+        if self.oldest <= seq < self._next:
+            return self._ring[seq % self.capacity]
+        return None
+
+    def since(self, seq):
+        """seq 之后（含）仍在缓冲区中的全部记录"""
+        return [self._ring[index % self.capacity] for index in range(max(seq, self.oldest), self._next)]
+
+    def _seqs(self, kind, battle, tag):
+        """选出最小的索引；tag 与 kind / battle 同时给出时，还需要按标签过滤"""
+        if battle is not None:
+            return self._by_battle.get(battle, {}).get(kind, ())
+        if kind is not None:
+            return self._by_kind.get(kind, ())
+        if tag is not None:
+            return self._by_tag.get(tag, ())
+        return range(self.oldest, self._next)
+
+    def query(self, kind=None, battle=None, tag=None, since=None):
+        """
+        按条件查询记录，结果按 seq 排序
+        @param kind 记录类型，如 Reward（精确匹配，不含子类）
+        @param battle 战斗编号（从 1 开始）
+        @param tag 日志标签，如 'REWARD'
+        @param since 只返回 seq 不小于该值的记录
+        """
+        seqs = self._seqs(kind, battle, tag)
+        if since is not None:
+            # 索引有序，从尾部向前取到 since 为止
+            tail = []
+            for seq in reversed(seqs):
+                if seq < since:
+                    break
+                tail.append(seq)
+            seqs = reversed(tail)
+
+        records = [self._ring[seq % self.capacity] for seq in seqs]
+        if tag is not None and (battle is not None or kind is not None):
+            records = [record for record in records if record.tag == tag]
+        return records
+
+    def last(self, kind=None, battle=None, tag=None):
+        """最近一条符合条件的记录，没有时返回 None"""
+        for seq in reversed(self._seqs(kind, battle, tag)):
+            record = self._ring[seq % self.capacity]
+            if tag is None or record.tag == tag:
+                return record
+        return None
@@ -0,0 +1,303 @@
+"""
+战斗循环帧时间基准
+
+main.ts 的 GameLoop 每个 requestAnimationFrame 调用 engine.updateBattle，并以 30fps 调用 ui.updateBattleUI。
+基准在页面加载前注入帧记录脚本，记录每帧的 rAF 时间戳和 longtask 条目；
+同时通过 CDP Performance 域读取脚本时间、样式重算和布局次数，
+按场景统计 p50/p95/p99 帧间隔并保存为 JSON 基线，与上一次运行比较。
+"""
+import json
+import time
+from dataclasses import asdict, dataclass, field
+
+import numpy as np
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+from .rng import SeededRandom
+from .waits import ConsoleMarkers, cast_first_available, start_battle, wait_for_player_turn
+
+# 60Hz 屏幕的单帧预算（毫秒）
+FRAME_BUDGET = 1000 / 60
+
+# 帧间隔超过预算的该倍数视为掉帧
+DROPPED_FACTOR = 1.5
+
+# 每个场景默认的测量时长（秒）
+DEFAULT_DURATION = 10.0
+
+# Performance.getMetrics 中需要计算差值的指标；*Duration 单位为秒
+CDP_METRICS = ('ScriptDuration', 'TaskDuration', 'LayoutCount', 'LayoutDuration', 'RecalcStyleCount',
+               'RecalcStyleDuration')
+
+# 指标 -> (相对阈值, 绝对阈值)：新值同时超过两者才算回归，绝对阈值过滤小数值上的噪声
+REGRESSION_THRESHOLDS = {
+    'frame_p50': (0.10, 0.5),
+    'frame_p95': (0.10, 1.0),
+    'frame_p99': (0.15, 2.0),
+    'dropped_ratio': (0.25, 0.01),
+    'long_tasks': (0.25, 1),
+    'script_ms_per_frame': (0.15, 0.05),
+    'layouts_per_frame': (0.15, 0.05),
+    'style_recalcs_per_frame': (0.15, 0.05),
+}
+
+# 帧记录：只在 recording 为真时保存 rAF 时间戳和长任务
+FRAME_RECORDER = """() => {
+    const frames = { recording: false, times: [], longTasks: [] };
+    Object.defineProperty(window, '__frames', { value: frames });
+    const tick = (time) => {
+        if (frames.recording) frames.times.push(time);
+        requestAnimationFrame(tick);
+    };
+    requestAnimationFrame(tick);
+    try {
+        new PerformanceObserver((list) => {
+            if (!frames.recording) return;
+            for (const entry of list.getEntries()) {
+                frames.longTasks.push([entry.startTime, entry.duration]);
+            }
+        }).observe({ type: 'longtask' });
+    } catch (e) {
+        // 不支持 longtask 的浏览器只记录帧间隔
+    }
+}"""
+
+_START = """() => {
+    const frames = window.__frames;
+    frames.times.length = 0;
+    frames.longTasks.length = 0;
+    frames.recording = true;
+}"""
+
+_STOP = """() => {
+    const frames = window.__frames;
+    frames.recording = false;
+    return { times: frames.times, longTasks: frames.longTasks };
+}"""
+
+
+@dataclass(frozen=True)
+class BenchScenario:
+    """
+    一个标准战斗场景
+    @param cpu_throttle CPU 降速倍数（Emulation.setCPUThrottlingRate），用于模拟低端手机
+    """
+    name: str
+    enemy_id: str
+    seed: int = 1
+    cpu_throttle: float = 1
+    duration: float = DEFAULT_DURATION
+
+
+STANDARD_SCENARIOS = (
+    BenchScenario('wolf', 'wolf'),
+    BenchScenario('goblin', 'goblin'),
+    BenchScenario('ogre', 'ogre'),
+    BenchScenario('ogre-4x-throttle', 'ogre', cpu_throttle=4),
+)
+
+
+@dataclass
+class FrameStats:
+    """帧间隔统计（毫秒）"""
+    frames: int = 0
+    frame_p50: float = 0.0
+    frame_p95: float = 0.0
+    frame_p99: float = 0.0
+    frame_max: float = 0.0
+    dropped: int = 0
+    dropped_ratio: float = 0.0
+
+    @classmethod
+    def from_times(cls, times, budget=FRAME_BUDGET):
+        """由 rAF 时间戳计算"""
+        intervals = np.diff(np.asarray(times, dtype=np.float64))
+        if intervals.size == 0:
+            return cls(frames=len(times))
+        p50, p95, p99 = np.percentile(intervals, [50, 95, 99])
+        dropped = int(np.count_nonzero(intervals > budget * DROPPED_FACTOR))
+        return cls(len(times), float(p50), float(p95), float(p99), float(intervals.max()), dropped,
+                   dropped / intervals.size)
+
+
+@dataclass
+class BenchResult:
+    scenario: str
+    frames: FrameStats
+    long_tasks: int = 0
+    long_task_ms: float = 0.0
+    # CDP Performance 指标在测量区间内的差值（时长换算为毫秒）
+    cdp: dict = field(default_factory=dict)
+    spells_cast: int = 0
+    elapsed: float = 0.0
+
+    def metrics(self):
+        """用于基线比较的扁平指标，计数按帧归一化，与战斗长短无关"""
+        frames = max(self.frames.frames, 1)
+        return {
+            **asdict(self.frames),
+            'long_tasks': self.long_tasks,
+            'long_task_ms': self.long_task_ms,
+            'script_ms_per_frame': self.cdp.get('ScriptDuration', 0.0) / frames,
+            'layouts_per_frame': self.cdp.get('LayoutCount', 0) / frames,
+            'style_recalcs_per_frame': self.cdp.get('RecalcStyleCount', 0) / frames,
+        }
+
+
+@dataclass
+class Regression:
+    scenario: str
+    metric: str
+    before: float
+    after: float
+
+    @property
+    def change(self):
+        return (self.after - self.before) / self.before if self.before else float('inf')
+
+
+class FrameRecorder:
+    """帧记录脚本，作为 BrowserPool.page 的 setup 使用"""
+
+    async def __call__(self, context):
+        await context.add_init_script(script=f"({FRAME_RECORDER})()")
+
+    @staticmethod
+    async def start(page):
+        await page.evaluate(_START)
+
+    @staticmethod
+    async def stop(page):
+        """停止记录，返回 (rAF 时间戳列表, [(开始时间, 时长)] 长任务列表)"""
+        data = await page.evaluate(_STOP)
+        return data['times'], data['longTasks']
+
+
+async def performance_metrics(cdp, names=CDP_METRICS):
+    """读取 CDP Performance 指标（需要先 Performance.enable），时长换算为毫秒"""
+    metrics = {item['name']: item['value'] for item in (await cdp.send('Performance.getMetrics'))['metrics']}
+    return {name: metrics.get(name, 0) * (1000 if name.endswith('Duration') else 1) for name in names}
+
+
+async def _drive_battle(page, markers, deadline):
+    """轮到玩家就施放第一个可用法术，直到战斗结束或到达截止时间"""
+    spells = 0
+    while time.perf_counter() < deadline:
+        try:
+            await wait_for_player_turn(page, timeout=max(deadline - time.perf_counter(), 0.1))
+        except PlaywrightTimeoutError:
+            break
+        if not await page.evaluate('() => window.game.state.battle.active'):
+            break
+        if await cast_first_available(page, markers) is None:
+            # MP 不足，继续让战斗循环运行到截止时间
+            await page.wait_for_timeout(100)
+        else:
+            spells += 1
+    return spells
+
+
+async def benchmark_battle(pool, scenario):
+    """
+    在独立上下文中运行一个标准战斗场景并测量帧时间
+    测量区间从进入战斗开始，到战斗结束或 scenario.duration 秒为止
+    """
+    recorder = FrameRecorder()
+    started = time.perf_counter()
+    async with pool.page(setup=[recorder, SeededRandom(scenario.seed)]) as page:
+        cdp = await page.context.new_cdp_session(page)
+        await cdp.send('Performance.enable')
+        if scenario.cpu_throttle > 1:
+            await cdp.send('Emulation.setCPUThrottlingRate', {'rate': scenario.cpu_throttle})
+
+        markers = ConsoleMarkers(page)
+        await start_battle(page, markers, scenario.enemy_id)
+        before = await performance_metrics(cdp)
+        await recorder.start(page)
+        spells = await _drive_battle(page, markers, time.perf_counter() + scenario.duration)
+        times, long_tasks = await recorder.stop(page)
+        after = await performance_metrics(cdp)
+        await cdp.detach()
+
+    return BenchResult(
+        scenario=scenario.name,
+        frames=FrameStats.from_times(times),
+        long_tasks=len(long_tasks),
+        long_task_ms=float(sum(duration for _, duration in long_tasks)),
+        cdp={name: after[name] - before[name] for name in CDP_METRICS},
+        spells_cast=spells,
+        elapsed=time.perf_counter() - started,
+    )
+
+
+async def run_benchmarks(pool, scenarios=STANDARD_SCENARIOS):
+    """
+    依次运行场景；场景之间不并行，避免互相抢占 CPU 影响帧时间
+    @returns 与 scenarios 顺序一致的 BenchResult 列表
+    """
+    return [await benchmark_battle(pool, scenario) for scenario in scenarios]
+
+
+def build_baseline(results, **environment):
+    """把一次运行的结果转为基线字典，environment 记录浏览器版本等上下文信息"""
+    return {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'environment': environment,
+        'scenarios': {result.scenario: result.metrics() for result in results},
+    }
+
+
+def save_baseline(results, path, **environment):
+    """保存为 JSON 基线"""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(build_baseline(results, **environment), f, ensure_ascii=False, indent=2)
+
+
+def load_baseline(path):
+    """读取基线，文件不存在时返回 None"""
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def compare_baselines(previous, current, thresholds=REGRESSION_THRESHOLDS):
+    """
+    比较两份基线中共同场景的指标
+    @returns Regression 列表，按场景和指标排序
+    """
+    regressions = []
+    for scenario, after in current['scenarios'].items():
+        before = previous['scenarios'].get(scenario)
+        if before is None:
+            continue
+        for metric, (relative, absolute) in thresholds.items():
+            if metric not in before or metric not in after:
+                continue
+            old, new = before[metric], after[metric]
+            if new - old > absolute and new > old * (1 + relative):
+                regressions.append(Regression(scenario, metric, old, new))
+    return regressions
+
+
+def format_results(results):
+    """每个场景一行的摘要"""
+    lines = []
+    for result in results:
+        frames = result.frames
+        lines.append(
+            f"{result.scenario}: {frames.frames} 帧, p50 {frames.frame_p50:.1f}ms, p95 {frames.frame_p95:.1f}ms, "
+            f"p99 {frames.frame_p99:.1f}ms, 最长 {frames.frame_max:.1f}ms, 掉帧 {frames.dropped}, "
+            f"长任务 {result.long_tasks} ({result.long_task_ms:.0f}ms), "
+            f"脚本 {result.cdp.get('ScriptDuration', 0):.0f}ms, 布局 {result.cdp.get('LayoutCount', 0):.0f} 次, "
+            f"样式重算 {result.cdp.get('RecalcStyleCount', 0):.0f} 次"
+        )
+    return "\n".join(lines)
+
+
+def format_regressions(regressions):
+    return "\n".join(
+        f"{item.scenario} {item.metric}: {item.before:.3f} -> {item.after:.3f} ({item.change:+.0%})"
+        for item in regressions
+    )
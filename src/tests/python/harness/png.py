@@ -0,0 +1,134 @@
+"""
+PNG 编解码（NumPy）
+
+只支持截图需要的格式：8 位灰度 / 灰度+透明 / RGB / RGBA，非隔行扫描。
+解码时 None/Sub/Up 过滤的行逐行向量化处理；出现 Average/Paeth 过滤时，
+像素依赖左、上、左上三个邻居，按反对角线（r + i 相同的像素互不依赖）推进，每条对角线一次向量化计算。
+"""
+import struct
+import zlib
+
+import numpy as np
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+# 颜色类型 -> 每像素通道数
+_CHANNELS = {0: 1, 2: 3, 4: 2, 6: 4}
+_COLOR_TYPES = {channels: color_type for color_type, channels in _CHANNELS.items()}
+
+# 编码时的 zlib 压缩级别
+DEFAULT_LEVEL = 6
+
+
+def _chunks(data):
+    offset = len(PNG_SIGNATURE)
+    while offset < len(data):
+        length, kind = struct.unpack('>I4s', data[offset:offset + 8])
+        yield kind, data[offset + 8:offset + 8 + length]
+        offset += 12 + length
+
+
+def _paeth(a, b, c):
+    p = a + b - c
+    pa, pb, pc = np.abs(p - a), np.abs(p - b), np.abs(p - c)
+    return np.where((pa <= pb) & (pa <= pc), a, np.where(pb <= pc, b, c))
+
+
+def _unfilter_rows(filters, raw):
+    """只有 None/Sub/Up 过滤时逐行处理"""
+    out = np.empty_like(raw)
+    previous = np.zeros_like(raw[0])
+    for row, kind in enumerate(filters):
+        line = raw[row]
+        if kind == 1:
+            line = np.cumsum(line, axis=0)
+        elif kind == 2:
+            line = line + previous
+        out[row] = line & 0xFF
+        previous = out[row]
+    return out
+
+
+def _unfilter_diagonals(filters, raw):
+    """按反对角线处理任意过滤类型；out 四周补一行一列 0，省去边界判断"""
+    height, width, _ = raw.shape
+    out = np.zeros((height + 1, width + 1, raw.shape[2]), dtype=np.int64)
+    kinds = filters[:, None]
+    for diagonal in range(height + width - 1):
+        rows = np.arange(max(0, diagonal - width + 1), min(height, diagonal + 1))
+        cols = diagonal - rows
+        a = out[rows + 1, cols]
+        b = out[rows, cols + 1]
+        c = out[rows, cols]
+        kind = kinds[rows]
+        predictor = np.select(
+            [kind == 1, kind == 2, kind == 3, kind == 4],
+            [a, b, (a + b) >> 1, _paeth(a, b, c)],
+            default=0,
+        )
+        out[rows + 1, cols + 1] = (raw[rows, cols] + predictor) & 0xFF
+    return out[1:, 1:]
+
+
+def decode_png(data):
+    """
+    解码 PNG
+    @returns (高, 宽, 通道数) 的 uint8 数组
+    """
+    if not data.startswith(PNG_SIGNATURE):
+        raise ValueError("不是 PNG 数据")
+    header = None
+    compressed = []
+    for kind, body in _chunks(data):
+        if kind == b'IHDR':
+            header = struct.unpack('>IIBBBBB', body)
+        elif kind == b'IDAT':
+            compressed.append(body)
+        elif kind == b'IEND':
+            break
+    if header is None:
+        raise ValueError("缺少 IHDR")
+    width, height, bit_depth, color_type, _, _, interlace = header
+    if bit_depth != 8 or color_type not in _CHANNELS or interlace:
+        raise ValueError(f"不支持的 PNG 格式: 位深 {bit_depth}, 颜色类型 {color_type}, 隔行 {interlace}")
+
+    channels = _CHANNELS[color_type]
+    rows = np.frombuffer(zlib.decompress(b''.join(compressed)), dtype=np.uint8)
+    rows = rows.reshape(height, 1 + width * channels)
+    filters = rows[:, 0].astype(np.int64)
+    raw = rows[:, 1:].reshape(height, width, channels).astype(np.int64)
+    if np.any(filters > 4):
+        raise ValueError("未知的过滤类型")
+    if np.any(filters >= 3):
+        pixels = _unfilter_diagonals(filters, raw)
+    else:
+        pixels = _unfilter_rows(filters, raw)
+    return pixels.astype(np.uint8)
+
+
+def _chunk(kind, body):
+    return struct.pack('>I', len(body)) + kind + body + struct.pack('>I', zlib.crc32(kind + body))
+
+
+def encode_png(pixels, level=DEFAULT_LEVEL):
+    """
+    编码为 PNG，每行使用 Sub 过滤（截图中大面积纯色，压缩效果好且可以整体向量化）
+    @param pixels (高, 宽) 或 (高, 宽, 通道数) 的 uint8 数组
+    """
+    pixels = np.asarray(pixels, dtype=np.uint8)
+    if pixels.ndim == 2:
+        pixels = pixels[:, :, None]
+    height, width, channels = pixels.shape
+    if channels not in _COLOR_TYPES:
+        raise ValueError(f"不支持的通道数: {channels}")
+
+    filtered = np.empty_like(pixels)
+    filtered[:, 0] = pixels[:, 0]
+    filtered[:, 1:] = pixels[:, 1:] - pixels[:, :-1]
+    rows = np.empty((height, 1 + width * channels), dtype=np.uint8)
+    rows[:, 0] = 1
+    rows[:, 1:] = filtered.reshape(height, -1)
+
+    header = struct.pack('>IIBBBBB', width, height, 8, _COLOR_TYPES[channels], 0, 0, 0)
+    return (PNG_SIGNATURE + _chunk(b'IHDR', header) + _chunk(b'IDAT', zlib.compress(rows.tobytes(), level))
+            + _chunk(b'IEND', b''))
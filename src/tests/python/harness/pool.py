@@ -0,0 +1,191 @@
+"""
+共享浏览器池
+
+每个会话只启动一次 Chromium，每个测试获得独立的 BrowserContext（独立的 localStorage），
+测试结束后清空存储并回收上下文供下一个测试复用，会话结束时统一关闭。
+指定 dist 目录时，浏览器池同时启动内置的静态服务器，页面从临时端口加载。
+"""
+from contextlib import asynccontextmanager
+
+from playwright.async_api import async_playwright
+
+from .config import CHROMIUM_PATH, GAME_DIST, GAME_URL
+from .server import StaticServer
+from .trace import current_tracer, span
+
+# 页面加载超时（毫秒）
+LOAD_TIMEOUT = 10000
+
+# 普通的生产构建不保留 window.game（main.ts 只在 NODE_ENV=development 时赋值）
+_HAS_GAME = "() => typeof window.game !== 'undefined'"
+
+# 多个上下文并行时，避免被遮挡的窗口降低 requestAnimationFrame 和定时器频率
+LAUNCH_ARGS = [
+    '--disable-background-timer-throttling',
+    '--disable-backgrounding-occluded-windows',
+    '--disable-renderer-backgrounding',
+]
+
+
+class BrowserPool:
+    """会话级浏览器池"""
+
+    def __init__(self, headless=False, executable_path=CHROMIUM_PATH, max_idle=4, dist=GAME_DIST, url=GAME_URL):
+        """
+        @param dist 可选，vite build 的输出目录；指定后忽略 url，由 StaticServer 提供页面
+        @param url 游戏页面地址
+        """
+        self.headless = headless
+        self.executable_path = executable_path
+        self.max_idle = max_idle
+        self.dist = dist
+        self.url = url
+        self.server = None
+        self._dist_checked = False
+        self._playwright = None
+        self.browser = None
+        self._idle = []
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def start(self):
+        """启动 Playwright 与 Chromium（只执行一次）"""
+        if self.browser is not None:
+            return
+        if self.dist and self.server is None:
+            self.server = StaticServer(self.dist)
+            with span('server.start'):
+                self.url = await self.server.start()
+        with span('browser.launch'):
+            self._playwright = await async_playwright().start()
+            self.browser = await self._playwright.chromium.launch(
+                headless=self.headless,
+                executable_path=self.executable_path,
+                args=LAUNCH_ARGS,
+            )
+
+    async def close(self):
+        """关闭所有上下文和浏览器进程"""
+        self._idle.clear()
+        if self.browser is not None:
+            try:
+                print("正在关闭浏览器...")
+                await self.browser.close()
+                print("浏览器已关闭")
+            except Exception as e:
+                print(f"关闭浏览器时出错: {e}")
+                # 尝试强制关闭
+                try:
+                    print("尝试强制关闭浏览器")
+                    self.browser.process.kill()
+                    print("浏览器进程已强制终止")
+                except Exception:
+                    print("无法关闭浏览器进程")
+            self.browser = None
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+        if self.server is not None:
+            await self.server.close()
+            self.server = None
+
+    @asynccontextmanager
+    async def context(self, recycle=True, setup=(), **options):
+        """
+        获取一个隔离的 BrowserContext
+        @param recycle 测试结束后是否回收复用；注册了 init script 的上下文必须传 False
+        @param setup 页面加载前对上下文执行的异步回调（安装时钟、注入脚本等），带回调的上下文不会回收
+        @param options 传给 browser.new_context 的参数，带参数的上下文不会回收
+        """
+        await self.start()
+        recycle = recycle and not options and not setup
+        if recycle and self._idle:
+            context = self._idle.pop()
+        else:
+            with span('context.new'):
+                context = await self.browser.new_context(**options)
+            for callback in setup:
+                with span(f"setup.{getattr(callback, '__name__', type(callback).__name__)}"):
+                    await callback(context)
+
+        try:
+            yield context
+        finally:
+            if recycle and len(self._idle) < self.max_idle and await self._reset(context):
+                self._idle.append(context)
+            else:
+                await context.close()
+
+    @asynccontextmanager
+    async def page(self, url=None, recycle=True, setup=(), **options):
+        """获取一个已加载游戏页面的新页面，url 默认为浏览器池的游戏页面地址"""
+        async with self.context(recycle=recycle, setup=setup, **options) as context:
+            with span('page.load'):
+                page = await context.new_page()
+                with span('page.goto'):
+                    await page.goto(url or self.url)
+                with span('page.networkidle'):
+                    await page.wait_for_load_state('networkidle', timeout=LOAD_TIMEOUT)
+            if self.dist and url is None and not self._dist_checked:
+                await self._check_dist(page)
+            try:
+                yield page
+            finally:
+                tracer = current_tracer()
+                if tracer is not None and not page.is_closed():
+                    try:
+                        await tracer.import_page(page)
+                    except Exception:
+                        # 页面已崩溃或导航中，跳过页面内的条目
+                        pass
+
+    async def _check_dist(self, page):
+        """dist 中的页面没有 window.game 时立即失败，而不是让每个测试在等待玩家回合时超时"""
+        if not await page.evaluate(_HAS_GAME):
+            raise RuntimeError(f"{self.dist} 中的页面没有 window.game：dist 需以 NODE_ENV=development 构建，"
+                               f"请改用 python main.py --build")
+        self._dist_checked = True
+
+    async def _reset(self, context):
+        """清空上下文中的存储和页面，失败时返回 False 表示不可回收"""
+        try:
+            for page in context.pages:
+                if page.url.startswith('http'):
+                    # 关闭页面不会触发 beforeunload，因此清空后不会被重新保存
+                    await page.evaluate('() => { localStorage.clear(); sessionStorage.clear(); }')
+                await page.close()
+            await context.clear_cookies()
+            return True
+        except Exception:
+            return False
+
+
+@asynccontextmanager
+async def session(pool=None, headless=False):
+    """使用传入的浏览器池；未传入时为单个脚本临时创建一个"""
+    if pool is not None:
+        yield pool
+        return
+
+    async with BrowserPool(headless=headless) as own_pool:
+        yield own_pool
+
+
+@asynccontextmanager
+async def game_page(pool=None, headless=False, **options):
+    """在共享浏览器池中打开游戏页面"""
+    async with session(pool, headless) as pool:
+        async with pool.page(**options) as page:
+            yield page
+
+
+async def run_tests(*tests, headless=False):
+    """在同一个浏览器池中依次运行多个测试协程"""
+    async with BrowserPool(headless=headless) as pool:
+        for test in tests:
+            await test(pool)
@@ -0,0 +1,154 @@
+"""
+游戏状态探针
+
+开发模式下 main.ts 导出 window.game = { state, engine, ui, storage }，
+一次 page.evaluate 即可读回 state.battle、state.enemy 和 state.player，
+代替逐个元素读取 #battle-log、#resource-info 等 DOM 文本。
+"""
+import asyncio
+from dataclasses import dataclass, field, fields
+
+# 快照流的默认频率（次/秒）
+DEFAULT_RATE = 10
+
+_SNAPSHOT = """() => {
+    const { scene, player, enemy, battle } = window.game.state;
+    return { scene, player, enemy, battle, time: performance.now() };
+}"""
+
+
+def _camel(name):
+    """max_hp -> maxHp"""
+    head, *rest = name.split('_')
+    return head + ''.join(part.title() for part in rest)
+
+
+def _from_js(cls, data):
+    """按字段名从 camelCase 的 JS 对象构造数据类，缺少的字段使用默认值"""
+    values = {}
+    for item in fields(cls):
+        key = _camel(item.name)
+        if key in data:
+            values[item.name] = data[key]
+    return cls(**values)
+
+
+@dataclass
+class PlayerState:
+    hp: float = 0
+    max_hp: float = 0
+    mp: float = 0
+    max_mp: float = 0
+    speed: float = 0
+    gold: int = 0
+    experience: int = 0
+    level: int = 1
+    spells: list = field(default_factory=list)
+    materials: dict = field(default_factory=dict)
+    unlocked_runes: list = field(default_factory=list)
+
+
+@dataclass
+class EnemyState:
+    id: str = ''
+    name: str = ''
+    hp: float = 0
+    max_hp: float = 0
+    dmg: float = 0
+    speed: float = 0
+    mp: float | None = None
+    max_mp: float | None = None
+
+
+@dataclass
+class BattleState:
+    active: bool = False
+    phase: str = 'preparation'
+    current_actor: str | None = None
+    player_atb: float = 0
+    enemy_atb: float = 0
+    player_status: str = 'preparing'
+    enemy_status: str = 'preparing'
+    cast_progress: float = 0
+    current_spell_index: int = -1
+    current_spell_time: float = 0
+    stun_timer: float = 0
+    focus_value: float = 0
+    skip_action: bool = False
+
+
+@dataclass
+class GameSnapshot:
+    """某一时刻的游戏状态，time 为页面内的 performance.now()（毫秒）"""
+    scene: str
+    player: PlayerState
+    enemy: EnemyState | None
+    battle: BattleState
+    time: float
+
+    @classmethod
+    def from_js(cls, data):
+        return cls(
+            scene=data['scene'],
+            player=_from_js(PlayerState, data['player']),
+            enemy=_from_js(EnemyState, data['enemy']) if data['enemy'] else None,
+            battle=_from_js(BattleState, data['battle']),
+            time=data['time'],
+        )
+
+    @property
+    def player_turn(self):
+        """玩家可以点击法术按钮"""
+        battle = self.battle
+        return (battle.active and battle.phase == 'action' and battle.current_actor == 'player'
+                and battle.player_status == 'preparing')
+
+    @property
+    def battle_over(self):
+        return not self.battle.active
+
+
+async def snapshot(page):
+    """一次往返读取完整的游戏状态"""
+    return GameSnapshot.from_js(await page.evaluate(_SNAPSHOT))
+
+
+async def snapshots(page, rate=DEFAULT_RATE, duration=None, until=None):
+    """
+    以固定频率持续读取状态
+    按理想的采样时刻调度，evaluate 的耗时不会累积为漂移；来不及时跳过错过的时刻而不是连续补采
+    @param duration 可选，最长采样时间（秒）
+    @param until 可选，until(snapshot) 为真时输出该快照后停止
+    @returns 异步生成 GameSnapshot
+    """
+    loop = asyncio.get_running_loop()
+    interval = 1 / rate
+    started = next_tick = loop.time()
+    while duration is None or loop.time() - started <= duration:
+        current = await snapshot(page)
+        yield current
+        if until and until(current):
+            return
+        next_tick += interval
+        now = loop.time()
+        if next_tick < now:
+            # 跳过已经错过的采样时刻
+            next_tick += ((now - next_tick) // interval + 1) * interval
+        await asyncio.sleep(next_tick - now)
+
+
+def format_snapshot(current):
+    """单行状态摘要"""
+    player = current.player
+    parts = [
+        f"场景: {current.scene}",
+        f"HP: {player.hp}/{player.max_hp}",
+        f"MP: {player.mp}/{player.max_mp}",
+        f"金币: {player.gold}",
+        f"等级: {player.level} ({player.experience}经验)",
+    ]
+    if current.enemy:
+        parts.append(f"敌人: {current.enemy.name} {current.enemy.hp}/{current.enemy.max_hp}")
+    if current.battle.active:
+        parts.append(f"阶段: {current.battle.phase}")
+    return ", ".join(parts)
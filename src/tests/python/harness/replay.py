@@ -0,0 +1,406 @@
+"""
+输入录制与回放
+
+录制：在虚拟时钟下记录随机种子、初始存档和玩家操作（开始战斗、施法、撤退、休息、买卖素材、选择符文），
+每个操作带有页面内 performance.now() 的时间戳。回放：用同样的种子和存档打开页面，
+把虚拟时钟推进到每个操作的时间点再在页面内触发同一个操作，游戏状态逐帧一致；
+结束时比较最终状态的摘要。speed 控制回放时游戏时间相对真实时间的倍数，None 表示尽快回放。
+
+录制文件为紧凑的二进制格式（.mcr），数千个录制可以作为回归语料并行回放：
+    magic 'MCRP' | 版本 u8 | 种子 u32
+    存档: varint 长度 + zlib 压缩的 StorageData JSON（长度 0 表示没有存档）
+    字符串表: varint 个数 + (varint 长度 + UTF-8)...
+    开始时间: varint 毫秒
+    事件: varint 个数 + (varint 距上一事件的毫秒 + 操作 u8 + varint 参数)...
+    结尾: varint 最后一个事件之后的毫秒 + 8 字节最终状态摘要 + CRC32 u32
+参数为法术索引，或字符串表（敌人、素材、符文 ID）中的下标。
+"""
+import asyncio
+import hashlib
+import json
+import struct
+import zlib
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from .clock import VirtualClock
+from .hooks import install_game_hook
+from .rng import SeededRandom
+from .saves import SaveState, refresh_ui
+
+MAGIC = b'MCRP'
+VERSION = 1
+SUFFIX = '.mcr'
+
+# 同时回放的录制数（每个录制一个浏览器上下文）
+DEFAULT_CONCURRENCY = 4
+
+# 按倍速回放时，每推进多少毫秒游戏时间同步一次真实时间
+_PACE_MS = 100
+
+_DIGEST_SIZE = 8
+
+# 操作名称 -> (编码, 参数类型, CSS 选择器)；参数类型 index 为整数，string 进入字符串表
+# 开始战斗的参数为开发模式敌人选择框的值，选择符文没有界面，录制 engine.chooseRune 的调用
+ACTIONS = {
+    'start_battle': (1, 'string', '#start-battle-btn'),
+    'cast': (2, 'index', '.spell-button[data-spell-index="{arg}"]'),
+    'retreat': (3, None, '#retreat-button'),
+    'rest': (4, None, '#rest-btn'),
+    'buy': (5, 'string', '.buy-btn[data-material-id="{arg}"]'),
+    'sell': (6, 'string', '.sell-btn[data-material-id="{arg}"]'),
+    'rune_choice': (7, 'string', None),
+}
+_ACTION_NAMES = {code: name for name, (code, _, _) in ACTIONS.items()}
+
+INPUT_RECORDER = """(actions) => {
+    const log = { recording: false, events: [] };
+    Object.defineProperty(window, '__inputLog', { value: log });
+    const push = (action, arg) => {
+        if (log.recording) log.events.push([performance.now(), action, arg]);
+    };
+
+    // 捕获阶段监听：法术按钮的处理函数会 stopPropagation
+    window.addEventListener('click', (event) => {
+        const target = event.target instanceof Element ? event.target : null;
+        if (!target) return;
+        if (target.closest('#start-battle-btn')) {
+            const select = document.getElementById('dev-enemy-select');
+            push('start_battle', select ? select.value : 'random');
+            return;
+        }
+        for (const [action, selector, attribute] of actions) {
+            const element = target.closest(selector);
+            if (element) {
+                push(action, attribute ? element.getAttribute(attribute) : null);
+                return;
+            }
+        }
+    }, true);
+
+    window.__onGame((game) => {
+        const chooseRune = game.engine.chooseRune;
+        game.engine.chooseRune = (runeId) => {
+            push('rune_choice', runeId);
+            return chooseRune(runeId);
+        };
+    });
+}"""
+
+# 录制时监听的按钮：(操作, 选择器, 参数所在属性)
+_CLICK_TARGETS = [
+    ['cast', '.spell-button', 'data-spell-index'],
+    ['retreat', '#retreat-button', None],
+    ['rest', '#rest-btn', None],
+    ['buy', '.buy-btn', 'data-material-id'],
+    ['sell', '.sell-btn', 'data-material-id'],
+]
+
+_START = """() => {
+    const log = window.__inputLog;
+    log.events.length = 0;
+    log.recording = true;
+    return performance.now();
+}"""
+
+_STOP = """() => {
+    const log = window.__inputLog;
+    log.recording = false;
+    return { now: performance.now(), events: log.events };
+}"""
+
+# 回放：在页面内触发与录制时相同的操作（element.click() 不受元素是否可见影响）
+_DISPATCH = """([action, arg, selector]) => {
+    if (action === 'rune_choice') {
+        window.game.engine.chooseRune(arg);
+        return true;
+    }
+    if (action === 'start_battle') {
+        const select = document.getElementById('dev-enemy-select');
+        if (select) select.value = arg;
+    }
+    const element = document.querySelector(selector);
+    if (!element) return false;
+    element.click();
+    return true;
+}"""
+
+# 参与最终状态摘要的字段
+_FINAL_STATE = """() => {
+    const { state } = window.game;
+    return {
+        scene: state.scene,
+        player: state.player,
+        enemy: state.enemy ? { id: state.enemy.id, hp: state.enemy.hp } : null,
+        battle: {
+            active: state.battle.active,
+            phase: state.battle.phase,
+            playerAtb: state.battle.playerAtb,
+            enemyAtb: state.battle.enemyAtb,
+            playerStatus: state.battle.playerStatus,
+            enemyStatus: state.battle.enemyStatus,
+        },
+    };
+}"""
+
+
+def state_digest(state):
+    """最终状态（_FINAL_STATE 的结果）的摘要"""
+    text = json.dumps(state, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=_DIGEST_SIZE).digest()
+
+
+@dataclass
+class InputEvent:
+    """time: 页面 performance.now()（毫秒）；arg: 法术索引、敌人/素材/符文 ID 或 None"""
+    time: int
+    action: str
+    arg: int | str | None = None
+
+
+@dataclass
+class Recording:
+    seed: int
+    save: dict | None
+    start: int
+    events: list = field(default_factory=list)
+    # 录制结束时的 performance.now()
+    end: int = 0
+    digest: bytes = b''
+
+    def to_bytes(self):
+        strings = {}
+        body = bytearray()
+        previous = self.start
+        for event in self.events:
+            code, kind, _ = ACTIONS[event.action]
+            if kind == 'string':
+                arg = strings.setdefault(event.arg, len(strings))
+            else:
+                arg = event.arg if kind == 'index' else 0
+            body += _varint(event.time - previous)
+            body.append(code)
+            body += _varint(arg)
+            previous = event.time
+
+        out = bytearray(MAGIC) + struct.pack('<BI', VERSION, self.seed & 0xFFFFFFFF)
+        save = zlib.compress(json.dumps(self.save, ensure_ascii=False).encode('utf-8')) if self.save else b''
+        out += _varint(len(save)) + save
+        out += _varint(len(strings))
+        for text in strings:
+            encoded = text.encode('utf-8')
+            out += _varint(len(encoded)) + encoded
+        out += _varint(self.start) + _varint(len(self.events)) + body
+        out += _varint(self.end - previous) + self.digest.ljust(_DIGEST_SIZE, b'\0')
+        out += struct.pack('<I', zlib.crc32(out))
+        return bytes(out)
+
+    @classmethod
+    def from_bytes(cls, data):
+        if data[:4] != MAGIC:
+            raise ValueError("不是录制文件")
+        if zlib.crc32(data[:-4]) != struct.unpack('<I', data[-4:])[0]:
+            raise ValueError("录制文件校验失败")
+        version, seed = struct.unpack_from('<BI', data, 4)
+        if version != VERSION:
+            raise ValueError(f"不支持的录制文件版本: {version}")
+        reader = _Reader(data, 9)
+        save = reader.bytes(reader.varint())
+        strings = [reader.bytes(reader.varint()).decode('utf-8') for _ in range(reader.varint())]
+        start = time = reader.varint()
+        events = []
+        for _ in range(reader.varint()):
+            time += reader.varint()
+            name = _ACTION_NAMES[reader.byte()]
+            arg = reader.varint()
+            kind = ACTIONS[name][1]
+            if kind == 'string':
+                arg = strings[arg]
+            elif kind is None:
+                arg = None
+            events.append(InputEvent(time, name, arg))
+        end = time + reader.varint()
+        digest = reader.bytes(_DIGEST_SIZE)
+        return cls(seed, json.loads(zlib.decompress(save)) if save else None, start, events, end, digest)
+
+    def save_to(self, path):
+        Path(path).write_bytes(self.to_bytes())
+
+    @classmethod
+    def load(cls, path):
+        return cls.from_bytes(Path(path).read_bytes())
+
+
+def _varint(value):
+    if value < 0:
+        raise ValueError(f"varint 不能为负数: {value}")
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+class _Reader:
+    def __init__(self, data, offset=0):
+        self.data = data
+        self.offset = offset
+
+    def byte(self):
+        value = self.data[self.offset]
+        self.offset += 1
+        return value
+
+    def bytes(self, count):
+        value = self.data[self.offset:self.offset + count]
+        if len(value) != count:
+            raise ValueError("录制文件不完整")
+        self.offset += count
+        return value
+
+    def varint(self):
+        value = shift = 0
+        while True:
+            byte = self.byte()
+            value |= (byte & 0x7F) << shift
+            if not byte & 0x80:
+                return value
+            shift += 7
+
+
+def _ms(value):
+    """虚拟时钟下 performance.now() 为整数毫秒"""
+    return int(round(value))
+
+
+class InputRecorder:
+    """输入录制脚本，作为 BrowserPool.page 的 setup 使用"""
+
+    async def __call__(self, context):
+        await install_game_hook(context)
+        await context.add_init_script(script=f"({INPUT_RECORDER})({json.dumps(_CLICK_TARGETS)})")
+
+    @staticmethod
+    async def start(page):
+        """@returns 开始时的 performance.now()"""
+        return _ms(await page.evaluate(_START))
+
+    @staticmethod
+    async def stop(page):
+        """@returns (事件列表, 结束时的 performance.now())"""
+        data = await page.evaluate(_STOP)
+        events = []
+        for time, action, arg in data['events']:
+            if ACTIONS[action][1] == 'index':
+                arg = int(arg)
+            events.append(InputEvent(_ms(time), action, arg))
+        return events, _ms(data['now'])
+
+
+async def final_state(page):
+    return await page.evaluate(_FINAL_STATE)
+
+
+async def record(pool, play, seed=1, save=None):
+    """
+    录制一段操作
+    @param play 协程 play(page, clock)，在虚拟时钟下操作页面（点击按钮、推进时间）
+    @param save 初始存档 SaveState，None 表示新游戏
+    @returns Recording
+    """
+    clock = VirtualClock()
+    recorder = InputRecorder()
+    setup = ([save] if save is not None else []) + [SeededRandom(seed), clock, recorder]
+    async with pool.page(setup=setup) as page:
+        await refresh_ui(page)
+        start = await recorder.start(page)
+        await play(page, clock)
+        events, end = await recorder.stop(page)
+        digest = state_digest(await final_state(page))
+    return Recording(seed, save.validate().to_js() if save is not None else None, start, events, end, digest)
+
+
+@dataclass
+class ReplayResult:
+    recording: Recording
+    digest: bytes
+    state: dict
+    # 找不到目标元素的操作（例如按钮没有渲染出来）
+    missing: list = field(default_factory=list)
+    name: str = ''
+
+    @property
+    def passed(self):
+        return not self.missing and self.digest == self.recording.digest
+
+
+async def _advance_to(page, clock, now, target, speed):
+    """把虚拟时钟从 now 推进到 target（毫秒）；speed 不为 None 时按倍速同步真实时间"""
+    while now < target:
+        step = target - now if speed is None else min(_PACE_MS, target - now)
+        await clock.advance(step / 1000)
+        if speed is not None:
+            await asyncio.sleep(step / 1000 / speed)
+        now += step
+    return now
+
+
+async def replay(pool, recording, speed=None, name=''):
+    """
+    回放一段录制
+    @param speed 游戏时间相对真实时间的倍数，None 表示尽快回放
+    """
+    clock = VirtualClock()
+    setup = ([SaveState.from_js(recording.save)] if recording.save else []) + [SeededRandom(recording.seed), clock]
+    missing = []
+    async with pool.page(setup=setup) as page:
+        await refresh_ui(page)
+        now = _ms(await page.evaluate('() => performance.now()'))
+        now = await _advance_to(page, clock, now, recording.start, speed)
+        for event in recording.events:
+            now = await _advance_to(page, clock, now, event.time, speed)
+            selector = ACTIONS[event.action][2]
+            selector = selector.format(arg=event.arg) if selector else None
+            if not await page.evaluate(_DISPATCH, [event.action, event.arg, selector]):
+                missing.append(event)
+        await _advance_to(page, clock, now, recording.end, speed)
+        state = await final_state(page)
+    return ReplayResult(recording, state_digest(state), state, missing, name)
+
+
+async def replay_corpus(pool, paths, speed=None, concurrency=DEFAULT_CONCURRENCY, on_result=None):
+    """
+    并行回放多个录制文件，每个录制使用独立的浏览器上下文
+    @param paths 录制文件路径，或包含 .mcr 文件的目录
+    @param on_result 可选，每个录制回放完成后调用 on_result(result)
+    @returns 与路径顺序一致的 ReplayResult 列表
+    """
+    files = []
+    for path in ([paths] if isinstance(paths, (str, Path)) else paths):
+        path = Path(path)
+        files.extend(sorted(path.glob(f'*{SUFFIX}')) if path.is_dir() else [path])
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run(path):
+        async with semaphore:
+            result = await replay(pool, Recording.load(path), speed, name=path.name)
+        if on_result:
+            on_result(result)
+        return result
+
+    return await asyncio.gather(*(run(path) for path in files))
+
+
+def format_replay_result(result):
+    recording = result.recording
+    status = "一致" if result.passed else "不一致"
+    line = (f"{result.name or '录制'}: {status}, 种子 {recording.seed}, {len(recording.events)} 个操作, "
+            f"{(recording.end - recording.start) / 1000:.1f}s 游戏时间")
+    if result.missing:
+        line += f", {len(result.missing)} 个操作找不到目标: " + ", ".join(
+            f"{event.action}({event.arg})@{event.time}" for event in result.missing[:5])
+    return line
@@ -0,0 +1,107 @@
+"""
+可复现的随机数
+
+在页面脚本运行前把 Math.random 替换为带种子的 mulberry32，
+敌人选择（getRandomEnemy）、素材掉落、符文洗牌和 AI 技能选择因此都由种子决定。
+Python 端的 Mulberry32 与页面内的实现逐位一致，可以离线预测抽取结果、搜索种子。
+"""
+import math
+import secrets
+
+# getRandomEnemy 的候选敌人，顺序与 data/index.ts 中 ENEMIES 的键一致
+ENEMY_IDS = ('wolf', 'goblin', 'ogre')
+
+# 种子搜索的默认上限
+DEFAULT_SEARCH_LIMIT = 1_000_000
+
+_MASK = 0xFFFFFFFF
+
+# 页面内的 PRNG，window.__seededRandom 记录种子和已消耗的随机数个数
+MULBERRY32 = """(seed) => {
+    let a = seed >>> 0;
+    const info = { seed, calls: 0 };
+    Object.defineProperty(window, '__seededRandom', { value: info });
+    Math.random = function random() {
+        info.calls++;
+        a = (a + 0x6D2B79F5) | 0;
+        let t = Math.imul(a ^ (a >>> 15), 1 | a);
+        t = (t + Math.imul(t ^ (t >>> 7), 61 | t)) ^ t;
+        return ((t ^ (t >>> 14)) >>> 0) / 4294967296;
+    };
+}"""
+
+
+def _imul(a, b):
+    return (a * b) & _MASK
+
+
+class Mulberry32:
+    """与 MULBERRY32 逐位一致的 Python 实现，接口与 random.Random 的 random() 相同"""
+
+    def __init__(self, seed):
+        self.seed = seed
+        self.state = seed & _MASK
+        self.calls = 0
+
+    def random(self):
+        self.calls += 1
+        self.state = (self.state + 0x6D2B79F5) & _MASK
+        a = self.state
+        t = _imul(a ^ (a >> 15), 1 | a)
+        t = ((t + _imul(t ^ (t >> 7), 61 | t)) & _MASK) ^ t
+        return ((t ^ (t >> 14)) & _MASK) / 4294967296
+
+
+class SeededRandom:
+    """带种子的 Math.random，作为 BrowserPool.page 的 setup 使用"""
+
+    def __init__(self, seed=None):
+        self.seed = secrets.randbelow(2 ** 32) if seed is None else seed
+
+    async def __call__(self, context):
+        """注册 init script，必须在页面加载前调用"""
+        await context.add_init_script(script=f"({MULBERRY32})({self.seed})")
+
+    @staticmethod
+    async def calls(page):
+        """页面已经消耗的随机数个数"""
+        return await page.evaluate('() => window.__seededRandom.calls')
+
+
+def enemy_sequence(seed, battles, between=None, enemy_ids=ENEMY_IDS):
+    """
+    预测种子下依次遇到的敌人
+    @param between 可选，between(rng, enemy_id) 消耗两次选敌之间的其他随机数（掉落、符文洗牌等）；
+                   默认每场战斗只消耗选敌的一个随机数（例如撤退）
+    @returns 敌人ID列表
+    """
+    rng = Mulberry32(seed)
+    sequence = []
+    for _ in range(battles):
+        enemy_id = enemy_ids[math.floor(rng.random() * len(enemy_ids))]
+        sequence.append(enemy_id)
+        if between:
+            between(rng, enemy_id)
+    return sequence
+
+
+def find_seed(wanted, make_between=None, enemy_ids=ENEMY_IDS, start=0, limit=DEFAULT_SEARCH_LIMIT):
+    """
+    搜索依次遇到 wanted 中敌人的最小种子
+    @param wanted 期望的敌人ID序列
+    @param make_between 可选，每个候选种子调用一次，返回 enemy_sequence 的 between 回调，
+                        回调可以带状态（例如玩家经验），每个种子都从初始状态开始
+    @returns 种子
+    """
+    wanted = list(wanted)
+    for seed in range(start, start + limit):
+        rng = Mulberry32(seed)
+        between = make_between() if make_between else None
+        for enemy_id in wanted:
+            if enemy_ids[math.floor(rng.random() * len(enemy_ids))] != enemy_id:
+                break
+            if between:
+                between(rng, enemy_id)
+        else:
+            return seed
+    raise ValueError(f"在 {start}..{start + limit - 1} 中没有找到依次遇到 {wanted} 的种子")
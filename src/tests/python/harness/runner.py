@@ -0,0 +1,334 @@
+"""
+并行测试运行器
+
+发现 src/tests/python 下的浏览器测试协程（模块顶层、第一个参数为 pool 的 async def test_*），
+分发到多个工作进程执行。每个工作进程持有自己的 BrowserPool，从共享队列中逐个领取测试，
+先做完的进程继续领取，长短不一的测试会自然摊开到所有核心上。
+每个测试有独立的超时，输出被单独捕获，结果汇总为 JSON / JUnit XML 报告。
+指定跟踪目录时，每个测试写出一个 Chrome trace-event JSON，最慢步骤的汇总表附在测试输出末尾。
+"""
+import ast
+import asyncio
+import contextlib
+import importlib
+import io
+import json
+import multiprocessing
+import os
+import queue
+import sys
+import time
+import traceback
+import xml.etree.ElementTree as ET
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from unittest import SkipTest
+
+from .pool import BrowserPool
+from .trace import format_trace_summary, tracing
+
+TESTS_DIR = Path(__file__).resolve().parent.parent
+
+# 单个测试的默认超时（秒）
+DEFAULT_TIMEOUT = 300
+
+# 超时后等待协程响应取消的时间（秒），仍未返回的工作进程会被强制终止
+KILL_GRACE = 10
+
+# 主进程轮询结果队列的间隔（秒）
+_POLL_INTERVAL = 0.5
+
+STATUSES = ('passed', 'failed', 'error', 'timeout', 'skipped')
+
+
+@dataclass(frozen=True)
+class BrowserTest:
+    """一个测试协程：module.name(pool)"""
+    module: str
+    name: str
+
+    @property
+    def id(self):
+        return f"{self.module}::{self.name}"
+
+
+@dataclass
+class CaseResult:
+    """
+    单个测试的结果
+    status: passed / failed（断言失败或返回 False）/ error（其他异常、工作进程退出）/ timeout /
+            skipped（测试抛出 unittest.SkipTest，例如缺少基准数据）
+    """
+    module: str
+    name: str
+    status: str
+    duration: float
+    message: str | None = None
+    output: str = ''
+    worker: int | None = None
+
+    @property
+    def id(self):
+        return f"{self.module}::{self.name}"
+
+    @property
+    def passed(self):
+        return self.status == 'passed'
+
+
+def _takes_pool(node):
+    args = node.args.posonlyargs + node.args.args
+    return bool(args) and args[0].arg == 'pool'
+
+
+def discover(directory=TESTS_DIR, keywords=()):
+    """
+    静态解析 test_*.py，收集顶层的 async def test_*(pool, ...)
+    不导入模块；pytest 单元测试（普通函数）和自行启动浏览器的示例脚本（没有 pool 参数）不会被收集
+    @param keywords 可选，只保留 id 中包含任一关键字的测试
+    @returns BrowserTest 列表，按文件名和定义顺序排列
+    """
+    tests = []
+    for path in sorted(Path(directory).glob('test_*.py')):
+        tree = ast.parse(path.read_text(encoding='utf-8'), filename=str(path))
+        for node in tree.body:
+            if isinstance(node, ast.AsyncFunctionDef) and node.name.startswith('test_') and _takes_pool(node):
+                test = BrowserTest(path.stem, node.name)
+                if not keywords or any(keyword in test.id for keyword in keywords):
+                    tests.append(test)
+    return tests
+
+
+def order_by_history(tests, report_path):
+    """按上一次报告中的耗时从长到短排列，没有记录的测试排在最前；长测试先开始，总耗时更短"""
+    try:
+        with open(report_path, encoding='utf-8') as f:
+            history = {case['id']: case['duration'] for case in json.load(f)['tests']}
+    except (OSError, ValueError, KeyError, TypeError):
+        return list(tests)
+    return sorted(tests, key=lambda test: -history.get(test.id, float('inf')))
+
+
+def trace_path(trace_dir, test):
+    """测试的跟踪文件路径"""
+    return Path(trace_dir) / f"{test.module}.{test.name}.json"
+
+
+async def _run_case(pool, test, timeout, worker_id, trace_dir=None):
+    """在当前进程中运行一个测试，捕获输出并分类结果"""
+    output = io.StringIO()
+    started = time.perf_counter()
+    status, message = 'passed', None
+    with contextlib.redirect_stdout(output), contextlib.redirect_stderr(output), \
+            (tracing(test.id) if trace_dir else contextlib.nullcontext()) as tracer:
+        try:
+            function = getattr(importlib.import_module(test.module), test.name)
+            # 只有测试整体超过截止时间才记为 timeout；测试内部的等待抛出的 TimeoutError 按异常处理
+            task = asyncio.ensure_future(function(pool))
+            done, _ = await asyncio.wait({task}, timeout=timeout)
+            if not done:
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+                status, message = 'timeout', f'超过 {timeout} 秒未完成'
+            elif task.result() is False:
+                status, message = 'failed', '测试返回 False'
+        except SkipTest as e:
+            status, message = 'skipped', str(e)
+        except AssertionError as e:
+            status, message = 'failed', str(e) or 'AssertionError'
+            traceback.print_exc()
+        except Exception as e:
+            status, message = 'error', f'{type(e).__name__}: {e}'
+            traceback.print_exc()
+        if tracer is not None:
+            path = tracer.write(trace_path(trace_dir, test))
+            print(f"\n跟踪文件: {path}")
+            print(format_trace_summary(tracer))
+    return CaseResult(test.module, test.name, status, time.perf_counter() - started, message,
+                      output.getvalue(), worker_id)
+
+
+async def _serve(worker_id, tasks, results, headless, timeout, trace_dir):
+    loop = asyncio.get_running_loop()
+    # 浏览器在第一个测试打开页面时才启动
+    pool = BrowserPool(headless=headless)
+    try:
+        while True:
+            test = await loop.run_in_executor(None, tasks.get)
+            if test is None:
+                break
+            results.put(('start', worker_id, test))
+            results.put(('done', worker_id, await _run_case(pool, test, timeout, worker_id, trace_dir)))
+    finally:
+        await pool.close()
+
+
+def _worker(worker_id, directory, tasks, results, headless, timeout, trace_dir):
+    """工作进程入口：领取测试直到收到 None"""
+    sys.path.insert(0, str(directory))
+    asyncio.run(_serve(worker_id, tasks, results, headless, timeout, trace_dir))
+
+
+class _Supervisor:
+    """主进程：启动工作进程、收集结果，处理进程崩溃和无法取消的测试"""
+
+    def __init__(self, tests, workers, directory, headless, timeout, kill_grace, on_result, trace_dir):
+        # spawn 在 Windows 和 Linux 上行为一致，子进程也不会继承主进程的事件循环
+        self.mp = multiprocessing.get_context('spawn')
+        self.tests = tests
+        self.directory = directory
+        self.headless = headless
+        self.timeout = timeout
+        self.kill_grace = kill_grace
+        self.on_result = on_result
+        self.trace_dir = trace_dir
+        self.tasks = self.mp.Queue()
+        self.results = self.mp.Queue()
+        self.processes = {}
+        # 工作进程编号 -> (测试, 开始时间)
+        self.running = {}
+        self.done = {}
+        self._next_worker = 0
+        for test in tests:
+            self.tasks.put(test)
+        for _ in range(workers):
+            self._spawn()
+
+    def _spawn(self):
+        worker_id = self._next_worker
+        self._next_worker += 1
+        # 每个工作进程对应一个结束标记
+        self.tasks.put(None)
+        process = self.mp.Process(
+            target=_worker,
+            args=(worker_id, self.directory, self.tasks, self.results, self.headless, self.timeout, self.trace_dir),
+            daemon=True,
+        )
+        process.start()
+        self.processes[worker_id] = process
+
+    def _finish(self, result):
+        if result.id in self.done:
+            return
+        self.done[result.id] = result
+        if self.on_result:
+            self.on_result(result)
+
+    def run(self):
+        while len(self.done) < len(self.tests):
+            try:
+                event, worker_id, payload = self.results.get(timeout=_POLL_INTERVAL)
+            except queue.Empty:
+                self._check_workers()
+                continue
+            if event == 'start':
+                self.running[worker_id] = (payload, time.perf_counter())
+            else:
+                self.running.pop(worker_id, None)
+                self._finish(payload)
+        self._shutdown()
+        return [self.done[test.id] for test in self.tests]
+
+    def _check_workers(self):
+        now = time.perf_counter()
+        for worker_id, process in list(self.processes.items()):
+            test, started = self.running.get(worker_id, (None, now))
+            if process.is_alive():
+                if test is None or now - started <= self.timeout + self.kill_grace:
+                    continue
+                # 测试阻塞了事件循环，wait_for 无法取消它
+                process.kill()
+                process.join()
+                status, message = 'timeout', f'超过 {self.timeout} 秒未完成，工作进程被终止'
+            else:
+                status, message = 'error', f'工作进程异常退出（退出码 {process.exitcode}）'
+
+            del self.processes[worker_id]
+            if test is not None:
+                del self.running[worker_id]
+                self._finish(CaseResult(test.module, test.name, status, now - started, message, worker=worker_id))
+            if process.exitcode != 0 and len(self.done) + len(self.running) < len(self.tests):
+                self._spawn()
+
+        if not self.processes:
+            # 所有进程都已退出但仍有测试没有结果（例如 start 消息随崩溃的进程丢失）
+            for test in self.tests:
+                self._finish(CaseResult(test.module, test.name, 'error', 0.0, '测试未运行'))
+
+    def _shutdown(self):
+        for process in self.processes.values():
+            process.join(self.kill_grace)
+            if process.is_alive():
+                process.kill()
+                process.join()
+
+
+def run(tests, workers=None, directory=TESTS_DIR, headless=True, timeout=DEFAULT_TIMEOUT,
+        kill_grace=KILL_GRACE, on_result=None, trace_dir=None):
+    """
+    在多个工作进程中运行测试
+    @param workers 工作进程数，默认等于 CPU 核心数（不超过测试数）
+    @param timeout 单个测试的超时（秒）
+    @param on_result 可选，每个测试结束时在主进程中调用 on_result(result)
+    @param trace_dir 可选，每个测试的 Chrome 跟踪文件写入该目录
+    @returns 与 tests 顺序一致的 CaseResult 列表
+    """
+    if not tests:
+        return []
+    workers = max(1, min(workers or os.cpu_count() or 1, len(tests)))
+    trace_dir = str(Path(trace_dir).resolve()) if trace_dir else None
+    return _Supervisor(tests, workers, directory, headless, timeout, kill_grace, on_result, trace_dir).run()
+
+
+def summarize(results):
+    """各状态的测试数"""
+    counts = dict.fromkeys(STATUSES, 0)
+    for result in results:
+        counts[result.status] += 1
+    return counts
+
+
+def write_json(results, path, wall_time):
+    """JSON 报告：汇总信息和每个测试的耗时、状态、输出"""
+    report = {
+        'summary': {
+            'total': len(results),
+            **summarize(results),
+            'wall_time': wall_time,
+            'test_time': sum(result.duration for result in results),
+        },
+        'tests': [{'id': result.id, **asdict(result)} for result in results],
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+def write_junit(results, path, wall_time, suite='browser'):
+    """JUnit XML 报告，timeout 记为 error"""
+    counts = summarize(results)
+    testsuite = ET.Element('testsuite', {
+        'name': suite,
+        'tests': str(len(results)),
+        'failures': str(counts['failed']),
+        'errors': str(counts['error'] + counts['timeout']),
+        'skipped': str(counts['skipped']),
+        'time': f'{wall_time:.3f}',
+    })
+    for result in results:
+        testcase = ET.SubElement(testsuite, 'testcase', {
+            'classname': result.module,
+            'name': result.name,
+            'time': f'{result.duration:.3f}',
+        })
+        if result.status == 'failed':
+            ET.SubElement(testcase, 'failure', {'message': result.message or ''})
+        elif result.status in ('error', 'timeout'):
+            ET.SubElement(testcase, 'error', {'type': result.status, 'message': result.message or ''})
+        elif result.status == 'skipped':
+            ET.SubElement(testcase, 'skipped', {'message': result.message or ''})
+        if result.output:
+            ET.SubElement(testcase, 'system-out').text = result.output
+    testsuites = ET.Element('testsuites')
+    testsuites.append(testsuite)
+    ET.indent(testsuites)
+    ET.ElementTree(testsuites).write(path, encoding='utf-8', xml_declaration=True)
@@ -0,0 +1,265 @@
+"""
+预置存档
+
+storage.loadGame 在初始化时从 localStorage 的 magic-coding-adventure-save 读取 StorageData。
+在页面脚本运行前写入构造好的存档，测试可以直接从 5 级、满金币、额外法术卡槽等后期状态开始，
+不需要先打几十场战斗。
+字段与 types/index.ts 中的 StorageData 对应；Python 端使用 snake_case，写入时转换为 camelCase。
+"""
+import json
+from dataclasses import dataclass, field
+
+from sim.data import ENEMIES, MATERIALS, RUNES
+from sim.rewards import (
+    ADVANCED_RUNES,
+    BASIC_RUNES,
+    HP_PER_LEVEL,
+    INTERMEDIATE_RUNES,
+    MP_PER_LEVEL,
+    SLOT_LEVEL_INTERVAL,
+    SPEED_PER_LEVEL,
+    exp_needed,
+)
+
+from .clock import EPOCH
+from .trace import traced
+
+# storage.ts 中的存储键名
+STORAGE_KEY = 'magic-coding-adventure-save'
+
+# 标记当前标签页已经写入过存档：刷新页面时 init script 会再次运行，不能覆盖游戏自己保存的进度
+_INJECTED_FLAG = '__saveInjected'
+
+# 初始玩家属性，对应 engine.ts 中的 state.player
+BASE_HP = 100
+BASE_MP = 50
+BASE_SPEED = 12
+INITIAL_SPELLS = (('firebolt',), ('amp', 'firebolt'), ('heal',))
+INITIAL_RUNES = ('firebolt', 'heal', 'amp')
+
+# 可以出现在 unlockedRunes 中的符文：升级时 battleSystem 会提供 data/index.ts 中尚未定义的中级、高级符文，
+# 游戏自己保存的进度里也会有它们；卡槽中的符文必须有定义，否则无法计算法术
+UNLOCKABLE_RUNES = frozenset(RUNES) | frozenset(BASIC_RUNES + INTERMEDIATE_RUNES + ADVANCED_RUNES)
+
+# 读档之后 UI 仍停留在 ui.init 时渲染的初始状态（main.ts 先初始化 UI 再读档），
+# 按 gameRestart 事件的处理方式重新渲染（依赖开发模式下的 window.game）
+_REFRESH_UI = """() => {
+    const { ui, state } = window.game;
+    ui.switchScene(state.scene);
+    ui.renderRuneLibrary();
+    ui.renderSpellSlots();
+    ui.renderSpellPreview(0);
+    ui.updateStatusBar();
+    ui.renderResourceInfo();
+    ui.renderShop();
+}"""
+
+
+def _default_spells():
+    return [list(spell) for spell in INITIAL_SPELLS]
+
+
+@dataclass
+class PlayerSave:
+    """StorageData.player"""
+    hp: float = BASE_HP
+    max_hp: float = BASE_HP
+    mp: float = BASE_MP
+    max_mp: float = BASE_MP
+    speed: float = BASE_SPEED
+    spells: list = field(default_factory=_default_spells)
+    gold: int = 0
+    experience: int = 0
+    level: int = 1
+    materials: dict = field(default_factory=dict)
+    unlocked_runes: list = field(default_factory=lambda: list(INITIAL_RUNES))
+
+    @classmethod
+    def at_level(cls, level, **overrides):
+        """
+        与逐级升级（battleSystem.checkLevelUp）结果一致的属性：HP/MP/速度成长、每 3 级一个新卡槽，HP/MP 回满
+        @param overrides 覆盖其他字段，如 gold、unlocked_runes
+        """
+        gained = level - 1
+        max_hp = BASE_HP + HP_PER_LEVEL * gained
+        max_mp = BASE_MP + MP_PER_LEVEL * gained
+        slots = sum(1 for reached in range(2, level + 1) if reached % SLOT_LEVEL_INTERVAL == 0)
+        values = dict(
+            hp=max_hp, max_hp=max_hp, mp=max_mp, max_mp=max_mp, speed=BASE_SPEED + SPEED_PER_LEVEL * gained,
+            spells=_default_spells() + [[] for _ in range(slots)], level=level,
+        )
+        values.update(overrides)
+        return cls(**values)
+
+    def to_js(self):
+        return {
+            'hp': self.hp,
+            'maxHp': self.max_hp,
+            'mp': self.mp,
+            'maxMp': self.max_mp,
+            'speed': self.speed,
+            'spells': [list(spell) for spell in self.spells],
+            'gold': self.gold,
+            'experience': self.experience,
+            'level': self.level,
+            'materials': dict(self.materials),
+            'unlockedRunes': list(self.unlocked_runes),
+        }
+
+    @classmethod
+    def from_js(cls, data):
+        """由 StorageData.player 原始对象构造，与 to_js 互逆"""
+        return cls(
+            hp=data['hp'], max_hp=data['maxHp'], mp=data['mp'], max_mp=data['maxMp'], speed=data['speed'],
+            spells=[list(spell) for spell in data['spells']], gold=data['gold'], experience=data['experience'],
+            level=data['level'], materials=dict(data['materials']), unlocked_runes=list(data['unlockedRunes']),
+        )
+
+
+@dataclass
+class SaveState:
+    """
+    StorageData
+    last_scene 为 'battle' 时 loadGame 还会恢复 enemy 和 battle（state.enemy / state.battle 的原始对象）
+    """
+    player: PlayerSave = field(default_factory=PlayerSave)
+    last_scene: str = 'camp'
+    timestamp: int = EPOCH
+    enemy: dict | None = None
+    battle: dict | None = None
+
+    def validate(self):
+        """检查存档引用的符文、素材、敌人都存在，错误时抛出 ValueError"""
+        player = self.player
+        if self.last_scene not in ('camp', 'battle'):
+            raise ValueError(f"未知场景: {self.last_scene}")
+        unknown = [rune_id for rune_id in player.unlocked_runes if rune_id not in UNLOCKABLE_RUNES]
+        unknown += [rune_id for spell in player.spells for rune_id in spell if rune_id not in RUNES]
+        if unknown:
+            raise ValueError(f"未知符文: {', '.join(unknown)}")
+        unknown = [material_id for material_id in player.materials if material_id not in MATERIALS]
+        if unknown:
+            raise ValueError(f"未知素材: {', '.join(unknown)}")
+        if not 0 <= player.hp <= player.max_hp or not 0 <= player.mp <= player.max_mp:
+            raise ValueError(f"HP/MP 超出范围: HP {player.hp}/{player.max_hp}, MP {player.mp}/{player.max_mp}")
+        if self.last_scene == 'battle':
+            if not self.enemy or not self.battle:
+                raise ValueError("战斗中的存档需要 enemy 和 battle")
+            if self.enemy.get('id') not in ENEMIES:
+                raise ValueError(f"未知敌人: {self.enemy.get('id')}")
+        return self
+
+    def to_js(self):
+        data = {'player': self.player.to_js(), 'lastScene': self.last_scene, 'timestamp': self.timestamp}
+        if self.enemy is not None:
+            data['enemy'] = self.enemy
+        if self.battle is not None:
+            data['battle'] = self.battle
+        return data
+
+    @classmethod
+    def from_js(cls, data):
+        """由 StorageData 原始对象（read_save 的结果、录制文件中的存档）构造"""
+        return cls(PlayerSave.from_js(data['player']), data.get('lastScene', 'camp'), data.get('timestamp', EPOCH),
+                   data.get('enemy'), data.get('battle'))
+
+    def to_json(self):
+        return json.dumps(self.validate().to_js(), ensure_ascii=False)
+
+    def init_script(self):
+        """在页面脚本之前写入 localStorage；同一标签页中只写入一次"""
+        key, value, flag = json.dumps(STORAGE_KEY), json.dumps(self.to_json()), json.dumps(_INJECTED_FLAG)
+        return f"""(() => {{
+    try {{
+        if (sessionStorage.getItem({flag})) return;
+        localStorage.setItem({key}, {value});
+        sessionStorage.setItem({flag}, '1');
+    }} catch (e) {{
+        // about:blank 等没有存储的页面
+    }}
+}})()"""
+
+    async def __call__(self, context):
+        """作为 BrowserPool.page 的 setup 使用，必须在页面加载前调用"""
+        await context.add_init_script(script=self.init_script())
+
+    def storage_state(self, url):
+        """
+        Playwright storage_state，作为 BrowserPool.page 的 new_context 参数使用
+        与 init script 不同，刷新页面不会受影响，但需要知道页面的 origin
+        """
+        scheme, _, rest = url.partition('://')
+        origin = f"{scheme}://{rest.split('/', 1)[0]}"
+        return {
+            'cookies': [],
+            'origins': [{'origin': origin, 'localStorage': [{'name': STORAGE_KEY, 'value': self.to_json()}]}],
+        }
+
+
+@traced('action.refresh_ui')
+async def refresh_ui(page):
+    """读档后重新渲染营地（符文库、卡槽、资源、商店）并切换到存档中的场景"""
+    await page.evaluate(_REFRESH_UI)
+
+
+async def read_save(page):
+    """读取页面中当前的存档（StorageData 原始对象），没有时返回 None"""
+    text = await page.evaluate(f"() => localStorage.getItem({json.dumps(STORAGE_KEY)})")
+    return json.loads(text) if text else None
+
+
+def _fresh():
+    return SaveState()
+
+
+def _about_to_reach_level_5():
+    """4 级且差 1 点经验升级，下一场胜利升到 5 级，符文选项开始包含中级符文"""
+    return SaveState(PlayerSave.at_level(4, experience=exp_needed(4) - 1,
+                                         unlocked_runes=list(INITIAL_RUNES) + ['iceShard', 'quick']))
+
+
+def _level_5():
+    """刚升到 5 级，已解锁全部基础符文，还没有中级符文"""
+    return SaveState(PlayerSave.at_level(5, gold=120, unlocked_runes=list(INITIAL_RUNES) + BASIC_RUNES))
+
+
+def _level_6_extra_slots():
+    """6 级，3 级和 6 级各获得一个空卡槽（共 5 个），已解锁全部基础和中级符文"""
+    return SaveState(PlayerSave.at_level(
+        6, gold=300, unlocked_runes=list(INITIAL_RUNES) + BASIC_RUNES + INTERMEDIATE_RUNES,
+    ))
+
+
+def _rich_shopper():
+    """1000 金币和每种素材各 5 个，用于商店买卖"""
+    return SaveState(PlayerSave(gold=1000, materials=dict.fromkeys(MATERIALS, 5)))
+
+
+def _all_runes():
+    """10 级，解锁 data/index.ts 中定义的所有符文"""
+    return SaveState(PlayerSave.at_level(10, gold=500, unlocked_runes=list(RUNES)))
+
+
+def _low_hp():
+    """HP 和 MP 都只剩一点，用于失败、休息流程"""
+    return SaveState(PlayerSave(hp=5, mp=5, gold=50))
+
+
+# 场景名称 -> 构造函数，每次调用返回新的存档对象
+SAVE_SCENARIOS = {
+    'fresh': _fresh,
+    'about_to_reach_level_5': _about_to_reach_level_5,
+    'level_5': _level_5,
+    'level_6_extra_slots': _level_6_extra_slots,
+    'rich_shopper': _rich_shopper,
+    'all_runes': _all_runes,
+    'low_hp': _low_hp,
+}
+
+
+def save_scenario(name):
+    """按名称构造预置存档"""
+    try:
+        return SAVE_SCENARIOS[name]()
+    except KeyError:
+        raise ValueError(f"未知存档场景: {name}，可选: {', '.join(SAVE_SCENARIOS)}") from None
@@ -0,0 +1,131 @@
+"""
+并行敌人场景
+
+每个敌人场景在独立的 BrowserContext 中运行，通过开发模式的 #dev-enemy-select
+指定敌人（即 engine.startBattle(enemyId)），多个场景同时进行，
+最后把各场景的控制台日志按场景顺序合并成一份报告。
+"""
+import asyncio
+import time
+from dataclasses import dataclass, field
+
+from .clock import IN_CAMP, PLAYER_TURN, VirtualClock
+from .rng import SeededRandom
+from .waits import (
+    TURN_TIMEOUT,
+    ConsoleMarkers,
+    cast_first_available,
+    start_battle,
+    wait_for_battle_end,
+    wait_for_player_turn,
+)
+
+# 开发模式可选的敌人（敌人ID -> UI选项文本）
+DEV_ENEMIES = {
+    'wolf': '恶狼',
+    'goblin': '哥布林',
+    'ogre': '食人魔',
+}
+
+# 默认并发上限
+DEFAULT_CONCURRENCY = 3
+
+
+@dataclass
+class ScenarioResult:
+    """单个敌人场景的结果"""
+    enemy_id: str
+    enemy_name: str
+    spells_used: int = 0
+    victory: bool | None = None
+    error: str | None = None
+    elapsed: float = 0.0
+    game_time: float | None = None
+    seed: int | None = None
+    logs: list = field(default_factory=list)
+
+
+async def run_enemy_scenario(pool, enemy_id, max_spells=3, battle_timeout=15, virtual_clock=False, seed=None):
+    """
+    在独立上下文中与指定敌人战斗
+    @param max_spells 最多施放的法术次数
+    @param battle_timeout 施法结束后等待战斗结束的截止时间（秒）
+    @param virtual_clock 是否使用虚拟时钟；启用后截止时间按游戏时间计算
+    @param seed 可选，Math.random 的种子，记录在结果中用于复现
+    """
+    result = ScenarioResult(enemy_id, DEV_ENEMIES.get(enemy_id, enemy_id), seed=seed)
+    started = time.perf_counter()
+    clock = VirtualClock() if virtual_clock else None
+    setup = [callback for callback in (clock, seed is not None and SeededRandom(seed)) if callback]
+
+    async with pool.page(setup=setup) as page:
+        markers = ConsoleMarkers(page)
+        try:
+            battle_since = markers.mark()
+            await start_battle(page, markers, enemy_id)
+
+            while result.spells_used < max_spells:
+                if clock:
+                    await clock.run_until(page, PLAYER_TURN, limit=TURN_TIMEOUT)
+                else:
+                    await wait_for_player_turn(page)
+                if await cast_first_available(page, markers) is None:
+                    break
+                result.spells_used += 1
+
+            try:
+                if clock:
+                    await clock.run_until(page, IN_CAMP, limit=battle_timeout)
+                result.victory = await wait_for_battle_end(page, markers, since=battle_since, timeout=battle_timeout)
+            except TimeoutError:
+                # 战斗超时，victory 保持 None
+                pass
+        except Exception as e:
+            result.error = str(e)
+        result.logs = markers.texts()
+
+    result.elapsed = time.perf_counter() - started
+    if clock:
+        result.game_time = clock.elapsed
+    return result
+
+
+async def run_enemy_scenarios(pool, enemy_ids=None, concurrency=DEFAULT_CONCURRENCY, **kwargs):
+    """
+    并行运行多个敌人场景
+    @param enemy_ids 敌人ID列表，默认所有开发模式敌人
+    @param concurrency 同时运行的上下文数量上限
+    @returns 与 enemy_ids 顺序一致的结果列表
+    """
+    enemy_ids = list(enemy_ids or DEV_ENEMIES)
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def limited(enemy_id):
+        async with semaphore:
+            return await run_enemy_scenario(pool, enemy_id, **kwargs)
+
+    return await asyncio.gather(*(limited(enemy_id) for enemy_id in enemy_ids))
+
+
+def format_report(results, keywords=("战斗", "伤害", "获得")):
+    """把各场景的日志按场景顺序合并为一份报告"""
+    lines = []
+    for result in results:
+        if result.error:
+            outcome = f"出错: {result.error}"
+        elif result.victory is None:
+            outcome = "未结束"
+        else:
+            outcome = "胜利" if result.victory else "失败"
+        lines.append(f"=== {result.enemy_name} ({result.enemy_id}) ===")
+        timing = f"耗时: {result.elapsed:.2f}s"
+        if result.game_time is not None:
+            timing += f", 游戏时间: {result.game_time:.2f}s"
+        if result.seed is not None:
+            timing += f", 种子: {result.seed}"
+        lines.append(f"结果: {outcome}, 使用法术: {result.spells_used}, {timing}")
+        for log in result.logs:
+            if any(keyword in log for keyword in keywords):
+                lines.append(f"[Console] {log}")
+        lines.append("")
+    return "\n".join(lines)
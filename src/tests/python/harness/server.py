@@ -0,0 +1,294 @@
+"""
+dist/ 静态服务器
+
+在测试进程的事件循环中启动一个只读 HTTP 服务器，监听临时端口，提供 vite build 生成的 dist/，
+不需要手动启动 Vite 开发服务器，也没有开发服务器逐个模块转换带来的加载延迟。
+- /test/ 下的路径映射到 dist/（vite.config.ts 的 base），/service-worker.js 等根路径同样映射到 dist/
+- assets/ 下带哈希的文件长期缓存，index.html、manifest.json、service-worker.js 每次重新验证
+- 请求带 Accept-Encoding 时优先返回预压缩的 .br / .gz 文件
+"""
+import asyncio
+import gzip
+import hashlib
+import mimetypes
+import os
+import shutil
+import subprocess
+from email.utils import formatdate
+from pathlib import Path
+from urllib.parse import unquote, urlsplit
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+PROJECT_DIR = Path(__file__).resolve().parents[4]
+DIST_DIR = PROJECT_DIR / 'dist'
+
+# 与 vite.config.ts 的 base / build.assetsDir 一致
+BASE_PATH = '/test/'
+ASSETS_DIR = 'assets'
+
+CACHE_IMMUTABLE = 'public, max-age=31536000, immutable'
+CACHE_REVALIDATE = 'no-cache'
+
+# 预压缩的文件类型和最小大小（字节）
+COMPRESSIBLE = ('.html', '.js', '.mjs', '.css', '.json', '.map', '.svg', '.txt', '.webmanifest')
+MIN_COMPRESS_SIZE = 1024
+
+# 按优先级排列的预压缩格式：(Content-Encoding, 文件后缀)
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+_CONTENT_TYPES = {
+    '.js': 'text/javascript',
+    '.mjs': 'text/javascript',
+    '.json': 'application/json',
+    '.webmanifest': 'application/manifest+json',
+    '.map': 'application/json',
+    '.svg': 'image/svg+xml',
+}
+
+_REASONS = {200: 'OK', 301: 'Moved Permanently', 304: 'Not Modified', 400: 'Bad Request', 404: 'Not Found',
+            405: 'Method Not Allowed'}
+
+# 请求头的最大行数，防止异常请求占用连接
+_MAX_HEADERS = 100
+
+
+def content_type(path):
+    suffix = path.suffix.lower()
+    kind = _CONTENT_TYPES.get(suffix) or mimetypes.guess_type(path.name)[0] or 'application/octet-stream'
+    if kind.startswith('text/') or kind in ('application/json', 'application/manifest+json', 'image/svg+xml'):
+        kind += '; charset=utf-8'
+    return kind
+
+
+def accepted_encodings(header):
+    """解析 Accept-Encoding，忽略 q=0 的编码"""
+    accepted = set()
+    for item in header.split(','):
+        name, *params = [part.strip() for part in item.split(';')]
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition('=')
+            if key.strip() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name and quality > 0:
+            accepted.add(name.lower())
+    return accepted
+
+
+def _compressors():
+    """(文件后缀, 压缩函数)；gzip 固定 mtime，相同输入生成相同文件"""
+    compressors = [('.gz', lambda raw: gzip.compress(raw, 9, mtime=0))]
+    if brotli is not None:
+        compressors.append(('.br', brotli.compress))
+    return compressors
+
+
+def precompress(root=DIST_DIR, min_size=MIN_COMPRESS_SIZE):
+    """
+    为可压缩的文件生成 .gz（以及安装了 brotli 时的 .br），已是最新的文件跳过
+    @returns 新生成的文件数
+    """
+    written = 0
+    for path in Path(root).rglob('*'):
+        if not path.is_file() or path.suffix.lower() not in COMPRESSIBLE or path.stat().st_size < min_size:
+            continue
+        data = None
+        for suffix, compress in _compressors():
+            target = path.with_name(path.name + suffix)
+            if target.exists() and target.stat().st_mtime >= path.stat().st_mtime:
+                continue
+            data = path.read_bytes() if data is None else data
+            target.write_bytes(compress(data))
+            written += 1
+    return written
+
+
+def build_dist(project_dir=PROJECT_DIR, dev_globals=True):
+    """
+    运行 npm run build 生成 dist/
+    @param dev_globals 以 NODE_ENV=development 构建，保留 main.ts 中的 window.game（探针、虚拟时钟条件依赖它）
+    @returns dist 目录
+    """
+    env = dict(os.environ)
+    if dev_globals:
+        env['NODE_ENV'] = 'development'
+    npm = shutil.which('npm') or 'npm'
+    subprocess.run([npm, 'run', 'build'], cwd=project_dir, env=env, check=True)
+    return Path(project_dir) / 'dist'
+
+
+class StaticServer:
+    """
+    提供 dist/ 的异步 HTTP/1.1 服务器
+    用法: async with StaticServer() as server: await page.goto(server.url)
+    """
+
+    def __init__(self, root=DIST_DIR, host='127.0.0.1', port=0, base=BASE_PATH):
+        self.root = Path(root).resolve()
+        self.host = host
+        self.port = port
+        self.base = base
+        self.ready = asyncio.Event()
+        self.requests = 0
+        self._server = None
+        # 路径 -> (mtime_ns, 内容, ETag)，dist 很小，全部缓存在内存中
+        self._files = {}
+
+    @property
+    def url(self):
+        """游戏页面地址（base 路径）"""
+        return f"http://{self.host}:{self.port}{self.base}"
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def start(self):
+        """
+        绑定端口并用一次真实请求确认 index.html 可以访问
+        @returns 游戏页面地址
+        """
+        if not (self.root / 'index.html').is_file():
+            raise FileNotFoundError(f"{self.root} 中没有 index.html，请先运行 npm run build")
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        status = await self._probe()
+        if status != 200:
+            await self.close()
+            raise RuntimeError(f"静态服务器自检失败: GET {self.base} 返回 {status}")
+        self.ready.set()
+        return self.url
+
+    async def close(self):
+        self.ready.clear()
+        if self._server is not None:
+            self._server.close()
+            # 浏览器可能仍持有 keep-alive 连接，wait_closed 会等待所有连接关闭
+            self._server.close_clients()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _probe(self):
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            writer.write(f"HEAD {self.base} HTTP/1.1\r\nHost: {self.host}\r\nConnection: close\r\n\r\n".encode())
+            await writer.drain()
+            status_line = await reader.readline()
+        finally:
+            writer.close()
+            await writer.wait_closed()
+        return int(status_line.split()[1])
+
+    async def _handle(self, reader, writer):
+        """一个连接上依次处理请求，直到客户端关闭或要求 Connection: close"""
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                method, target, headers = request
+                keep_alive = method != 'BAD' and headers.get('connection', '').lower() != 'close'
+                status, response_headers, body = self._respond(method, target, headers)
+                response_headers['Connection'] = 'keep-alive' if keep_alive else 'close'
+                self._write(writer, status, response_headers, b'' if method == 'HEAD' else body)
+                await writer.drain()
+                self.requests += 1
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _read_request(reader):
+        line = await reader.readline()
+        if not line.strip():
+            return None
+        parts = line.decode('latin-1').split()
+        if len(parts) != 3:
+            return 'BAD', '', {}
+        headers = {}
+        for _ in range(_MAX_HEADERS):
+            header = await reader.readline()
+            if header in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = header.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        return parts[0], parts[1], headers
+
+    @staticmethod
+    def _write(writer, status, headers, body):
+        lines = [f"HTTP/1.1 {status} {_REASONS.get(status, '')}"]
+        lines.extend(f"{name}: {value}" for name, value in headers.items())
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body)
+
+    def _resolve(self, path):
+        """URL 路径 -> dist 中的文件，越界或不存在时返回 None"""
+        if path.startswith(self.base):
+            path = path[len(self.base):]
+        relative = path.lstrip('/')
+        if relative == '' or relative.endswith('/'):
+            relative += 'index.html'
+        candidate = (self.root / relative).resolve()
+        if not candidate.is_relative_to(self.root) or not candidate.is_file():
+            return None
+        return candidate
+
+    def _read(self, path):
+        """读取文件内容和 ETag，按修改时间缓存；@returns (内容, ETag, 修改时间)"""
+        stat = path.stat()
+        cached = self._files.get(path)
+        if cached is None or cached[0] != stat.st_mtime_ns:
+            body = path.read_bytes()
+            cached = (stat.st_mtime_ns, body, '"' + hashlib.blake2b(body, digest_size=12).hexdigest() + '"')
+            self._files[path] = cached
+        return cached[1], cached[2], stat.st_mtime
+
+    def _respond(self, method, target, headers):
+        """@returns (状态码, 响应头, 响应体)"""
+        plain = {'Content-Type': 'text/plain; charset=utf-8'}
+        if method not in ('GET', 'HEAD'):
+            status = 400 if method == 'BAD' else 405
+            body = _REASONS[status].encode()
+            return status, {**plain, 'Content-Length': str(len(body))}, body
+
+        path = unquote(urlsplit(target).path)
+        if path == self.base.rstrip('/'):
+            return 301, {'Location': self.base, 'Content-Length': '0'}, b''
+        file = self._resolve(path)
+        if file is None:
+            body = f"Not Found: {path}".encode()
+            return 404, {**plain, 'Content-Length': str(len(body))}, body
+
+        response = {'Content-Type': content_type(file), 'Vary': 'Accept-Encoding'}
+        relative = file.relative_to(self.root)
+        immutable = relative.parts[0] == ASSETS_DIR and len(relative.parts) > 1
+        response['Cache-Control'] = CACHE_IMMUTABLE if immutable else CACHE_REVALIDATE
+
+        served = file
+        accepted = accepted_encodings(headers.get('accept-encoding', ''))
+        for encoding, suffix in ENCODINGS:
+            variant = file.with_name(file.name + suffix)
+            if encoding in accepted and variant.is_file():
+                served = variant
+                response['Content-Encoding'] = encoding
+                break
+
+        body, etag, mtime = self._read(served)
+        response['ETag'] = etag
+        response['Last-Modified'] = formatdate(mtime, usegmt=True)
+        if etag in [tag.strip() for tag in headers.get('if-none-match', '').split(',')]:
+            return 304, {key: response[key] for key in ('ETag', 'Cache-Control', 'Vary')}, b''
+        response['Content-Length'] = str(len(body))
+        return 200, response, body
@@ -0,0 +1,254 @@
+"""
+长时间运行的内存泄漏检测
+
+在同一个页面中连续进行数百场战斗（虚拟时钟快进），每场战斗结束并休息后强制 GC，
+通过 CDP 读取 JSHeapUsedSize、DOM 节点数和事件监听器数。
+跳过预热阶段后对每个指标做线性拟合，斜率（每场战斗的增长量）超过阈值即判定为泄漏。
+EventSystem.on 注册的监听器、AISystem.aiStates 和战斗日志节点不直接暴露，
+它们的增长分别体现在堆大小和 DOM 节点数上；定期的堆快照摘要用于定位增长最多的区间里是哪些对象。
+"""
+import json
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from .clock import IN_CAMP, PLAYER_TURN, VirtualClock
+from .logs import BattleEnd
+from .perf import performance_metrics
+from .rng import SeededRandom
+from .waits import TURN_TIMEOUT, ConsoleMarkers, cast_first_available, rest, start_battle
+
+# 默认战斗场数
+DEFAULT_BATTLES = 200
+
+# 拟合前跳过的场数（JIT、惰性初始化的缓存等一次性增长）
+DEFAULT_WARMUP = 10
+
+# 每隔多少场战斗保存一次堆快照摘要
+DEFAULT_SNAPSHOT_EVERY = 20
+
+# 指标 -> 每场战斗允许的最大增长
+DEFAULT_THRESHOLDS = {
+    'heap_used': 16 * 1024,
+    'nodes': 1.0,
+    'listeners': 0.5,
+}
+
+# 战斗结束后等待回到营地的游戏时间上限（秒），包含 2 秒的场景切换延迟
+_CAMP_LIMIT = 10.0
+
+# 保留构造函数名的堆节点类型，其他类型按 "(类型)" 汇总
+_NAMED_NODE_TYPES = ('object', 'closure', 'native', 'regexp')
+
+
+@dataclass
+class SoakSample:
+    """第 battle 场战斗结束、GC 之后的计数"""
+    battle: int
+    heap_used: float
+    nodes: int
+    listeners: int
+    documents: int
+    victory: bool | None = None
+
+
+@dataclass
+class GrowthFit:
+    """metric 对战斗场数的线性拟合，slope 为每场战斗的增长量"""
+    metric: str
+    slope: float
+    intercept: float
+    threshold: float
+
+    @property
+    def passed(self):
+        return self.slope <= self.threshold
+
+
+@dataclass
+class HeapDiff:
+    """两次堆快照之间某类对象的变化"""
+    label: str
+    count: int
+    size: int
+
+
+@dataclass
+class SoakReport:
+    samples: list
+    fits: list
+    # 堆增长最多的快照区间（起止战斗场数）以及区间内的对象变化
+    worst_interval: tuple | None = None
+    heap_diff: list = field(default_factory=list)
+
+    @property
+    def passed(self):
+        return all(fit.passed for fit in self.fits)
+
+
+def fit_growth(samples, warmup=DEFAULT_WARMUP, thresholds=DEFAULT_THRESHOLDS):
+    """对预热之后的样本做最小二乘直线拟合"""
+    used = [sample for sample in samples if sample.battle > warmup]
+    if len(used) < 2:
+        return []
+    battles = np.array([sample.battle for sample in used], dtype=np.float64)
+    fits = []
+    for metric, threshold in thresholds.items():
+        values = np.array([getattr(sample, metric) for sample in used], dtype=np.float64)
+        slope, intercept = np.polyfit(battles, values, 1)
+        fits.append(GrowthFit(metric, float(slope), float(intercept), threshold))
+    return fits
+
+
+def summarize_heap_snapshot(data):
+    """
+    把 V8 堆快照（.heapsnapshot 的 JSON）按构造函数名汇总
+    @returns {标签: (对象数, 自身大小)}
+    """
+    meta = data['snapshot']['meta']
+    node_fields = meta['node_fields']
+    type_names = meta['node_types'][0]
+    strings = data['strings']
+    nodes = np.asarray(data['nodes'], dtype=np.int64).reshape(-1, len(node_fields))
+    types = nodes[:, node_fields.index('type')]
+    names = nodes[:, node_fields.index('name')]
+    sizes = nodes[:, node_fields.index('self_size')]
+
+    named = np.isin(types, [type_names.index(name) for name in _NAMED_NODE_TYPES if name in type_names])
+    # 非负键为字符串表中的名称，负键为节点类型
+    keys = np.where(named, names, -1 - types)
+    unique, inverse = np.unique(keys, return_inverse=True)
+    counts = np.bincount(inverse)
+    totals = np.bincount(inverse, weights=sizes)
+
+    summary = {}
+    for key, count, size in zip(unique.tolist(), counts.tolist(), totals.tolist()):
+        label = strings[key] if key >= 0 else f"({type_names[-1 - key]})"
+        old_count, old_size = summary.get(label, (0, 0))
+        summary[label] = (old_count + count, old_size + int(size))
+    return summary
+
+
+def diff_heap_summaries(before, after, top=20):
+    """按自身大小增长从多到少列出变化的对象类型"""
+    diffs = []
+    for label in before.keys() | after.keys():
+        old_count, old_size = before.get(label, (0, 0))
+        new_count, new_size = after.get(label, (0, 0))
+        if new_count != old_count or new_size != old_size:
+            diffs.append(HeapDiff(label, new_count - old_count, new_size - old_size))
+    diffs.sort(key=lambda item: (-item.size, -item.count, item.label))
+    return diffs[:top]
+
+
+def worst_interval(samples, snapshots):
+    """
+    相邻两次堆快照之间 heap_used 增长最多的区间
+    @param snapshots {战斗场数: 堆摘要}
+    @returns (起始场数, 结束场数)，快照不足两次时返回 None
+    """
+    heap = {sample.battle: sample.heap_used for sample in samples}
+    battles = sorted(snapshots)
+    pairs = [(start, end) for start, end in zip(battles, battles[1:]) if start in heap and end in heap]
+    if not pairs:
+        return None
+    return max(pairs, key=lambda pair: heap[pair[1]] - heap[pair[0]])
+
+
+async def take_heap_summary(cdp):
+    """通过 HeapProfiler 拍摄堆快照并汇总（不保存完整快照）"""
+    chunks = []
+
+    def on_chunk(params):
+        chunks.append(params['chunk'])
+
+    cdp.on('HeapProfiler.addHeapSnapshotChunk', on_chunk)
+    try:
+        await cdp.send('HeapProfiler.takeHeapSnapshot', {'reportProgress': False})
+    finally:
+        cdp.remove_listener('HeapProfiler.addHeapSnapshotChunk', on_chunk)
+    return summarize_heap_snapshot(json.loads(''.join(chunks)))
+
+
+async def sample_counters(cdp, battle, victory=None):
+    """强制 GC 后读取堆大小、DOM 节点数和监听器数"""
+    await cdp.send('HeapProfiler.collectGarbage')
+    metrics = await performance_metrics(cdp, ('JSHeapUsedSize', 'Nodes', 'JSEventListeners', 'Documents'))
+    return SoakSample(battle, metrics['JSHeapUsedSize'], int(metrics['Nodes']), int(metrics['JSEventListeners']),
+                      int(metrics['Documents']), victory)
+
+
+async def _play_battle(page, markers, clock, enemy_id):
+    """打一场战斗：轮到玩家就施放第一个可用法术，没有可用法术时撤退；回到营地后休息"""
+    since = markers.mark()
+    await start_battle(page, markers, enemy_id)
+    victory = None
+    while True:
+        await clock.run_until(page, PLAYER_TURN, limit=TURN_TIMEOUT)
+        if not await page.evaluate('() => window.game.state.battle.active'):
+            break
+        if await cast_first_available(page, markers) is None:
+            await page.click('#retreat-button')
+            break
+    await clock.run_until(page, IN_CAMP, limit=_CAMP_LIMIT)
+    for record in markers.logs.query(BattleEnd, since=since):
+        victory = record.victory
+    await rest(page, markers)
+    return victory
+
+
+async def soak(pool, battles=DEFAULT_BATTLES, enemy_id=None, seed=1, warmup=DEFAULT_WARMUP,
+               snapshot_every=DEFAULT_SNAPSHOT_EVERY, thresholds=DEFAULT_THRESHOLDS, on_sample=None):
+    """
+    在一个页面中连续进行 battles 场战斗并检测内存增长
+    @param enemy_id 开发模式下固定的敌人，None 表示随机（由 seed 决定）
+    @param snapshot_every 每隔多少场拍摄一次堆快照摘要，0 表示不拍摄
+    @param on_sample 可选，每场战斗采样后调用 on_sample(sample)
+    @returns SoakReport
+    """
+    clock = VirtualClock()
+    samples = []
+    snapshots = {}
+    async with pool.page(setup=[clock, SeededRandom(seed)]) as page:
+        cdp = await page.context.new_cdp_session(page)
+        await cdp.send('Performance.enable')
+        markers = ConsoleMarkers(page)
+        for battle in range(1, battles + 1):
+            victory = await _play_battle(page, markers, clock, enemy_id)
+            sample = await sample_counters(cdp, battle, victory)
+            samples.append(sample)
+            if on_sample:
+                on_sample(sample)
+            if snapshot_every and battle >= warmup and (battle - warmup) % snapshot_every == 0:
+                snapshots[battle] = await take_heap_summary(cdp)
+        await cdp.detach()
+
+    report = SoakReport(samples, fit_growth(samples, warmup, thresholds))
+    report.worst_interval = worst_interval(samples, snapshots)
+    if report.worst_interval:
+        start, end = report.worst_interval
+        report.heap_diff = diff_heap_summaries(snapshots[start], snapshots[end])
+    return report
+
+
+_FIT_LABELS = {'heap_used': 'JS堆', 'nodes': 'DOM节点', 'listeners': '事件监听器'}
+
+
+def format_soak_report(report):
+    """拟合结果和增长最多区间的对象变化"""
+    lines = []
+    if report.samples:
+        first, last = report.samples[0], report.samples[-1]
+        lines.append(
+            f"{len(report.samples)} 场战斗, JS堆 {first.heap_used / 1024:.0f}KB -> {last.heap_used / 1024:.0f}KB, "
+            f"DOM节点 {first.nodes} -> {last.nodes}, 事件监听器 {first.listeners} -> {last.listeners}"
+        )
+    for fit in report.fits:
+        status = "通过" if fit.passed else "超出阈值"
+        lines.append(f"{_FIT_LABELS.get(fit.metric, fit.metric)}: 每场 {fit.slope:+.2f} (阈值 {fit.threshold}) {status}")
+    if report.worst_interval:
+        start, end = report.worst_interval
+        lines.append(f"堆增长最多的区间: 第 {start} - {end} 场")
+        for item in report.heap_diff:
+            lines.append(f"  {item.label}: {item.count:+d} 个, {item.size:+d} 字节")
+    return "\n".join(lines)
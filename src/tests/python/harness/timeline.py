@@ -0,0 +1,306 @@
+"""
+ATB 时间线记录与一致性检查
+
+页面加载前包装 window.game.engine.updateBattle，每帧在 GameLoop 调用前后记录 deltaTime、
+双方 ATB、阶段、当前行动者和状态，写入 Float64Array；攒满一批后 base64 编码，
+通过 expose_binding 发送给 Python，解码为 NumPy 数组。
+检查时把整条时间线与 ATBSystem.predictATB 的解析曲线比较：
+- drift: 连续充能区间内实际 ATB 偏离解析值
+- overshoot: ATB 超出 0 ~ 100
+- missed_transition: ATB 已满但没有进入行动阶段，或轮到了错误的行动者
+- turn_order: 同一帧内双方 ATB 都充满（deltaTime 很大，如后台标签页恢复），解析上先充满的一方却没有先行动
+- long_frame: deltaTime 超过 max_frame_dt，仅作提示，main.ts 没有限制 deltaTime
+"""
+import asyncio
+import base64
+import json
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from sim.atb import MAX_ATB, atb_gain
+
+from .hooks import install_game_hook
+
+# 每批发送的帧数
+DEFAULT_BATCH = 512
+
+# 解析值与实际值允许的误差（浮点累加误差远小于该值）
+DRIFT_TOLERANCE = 1e-6
+
+# 超过该值（秒）的 deltaTime 记为长帧
+MAX_FRAME_DT = 0.25
+
+# 等待最后一批数据到达 Python 的时间上限（秒）
+_FLUSH_TIMEOUT = 5.0
+
+PHASES = ('preparation', 'action', 'resolution')
+ACTORS = (None, 'player', 'enemy')
+STATUSES = ('preparing', 'channeling', 'stunned')
+
+# 每帧一行，列顺序与 ATB_RECORDER 写入顺序一致
+COLUMNS = (
+    'time', 'dt',
+    'player_before', 'enemy_before', 'player_after', 'enemy_after',
+    'phase_before', 'phase_after', 'actor_after',
+    'player_status', 'enemy_status',
+    'player_speed', 'enemy_speed',
+)
+_COLUMN = {name: index for index, name in enumerate(COLUMNS)}
+
+# 会导致测试失败的问题类型；long_frame 只用于说明
+FAILING_KINDS = ('drift', 'overshoot', 'missed_transition', 'turn_order')
+
+ATB_RECORDER = """(batchSize) => {
+    const FIELDS = %(fields)d;
+    const PHASES = %(phases)s;
+    const ACTORS = %(actors)s;
+    const STATUSES = %(statuses)s;
+    const recorder = { recording: false, buffer: new Float64Array(batchSize * FIELDS), count: 0, batches: 0 };
+    Object.defineProperty(window, '__atbTimeline', { value: recorder });
+
+    recorder.take = () => {
+        const bytes = new Uint8Array(recorder.buffer.buffer, 0, recorder.count * FIELDS * 8);
+        let binary = '';
+        for (let i = 0; i < bytes.length; i += 0x8000) {
+            binary += String.fromCharCode.apply(null, bytes.subarray(i, i + 0x8000));
+        }
+        recorder.count = 0;
+        return btoa(binary);
+    };
+
+    const wrap = (game) => {
+        const engine = game.engine;
+        const updateBattle = engine.updateBattle;
+        engine.updateBattle = (deltaTime) => {
+            if (!recorder.recording) return updateBattle(deltaTime);
+            const battle = game.state.battle;
+            const enemy = game.state.enemy;
+            const row = recorder.count * FIELDS;
+            const buffer = recorder.buffer;
+            buffer[row] = performance.now();
+            buffer[row + 1] = deltaTime;
+            buffer[row + 2] = battle.playerAtb;
+            buffer[row + 3] = battle.enemyAtb;
+            buffer[row + 6] = PHASES.indexOf(battle.phase);
+            buffer[row + 9] = STATUSES.indexOf(battle.playerStatus);
+            buffer[row + 10] = STATUSES.indexOf(battle.enemyStatus);
+            buffer[row + 11] = game.state.player.speed;
+            buffer[row + 12] = enemy ? enemy.speed : NaN;
+            const result = updateBattle(deltaTime);
+            buffer[row + 4] = battle.playerAtb;
+            buffer[row + 5] = battle.enemyAtb;
+            buffer[row + 7] = PHASES.indexOf(battle.phase);
+            buffer[row + 8] = ACTORS.indexOf(battle.currentActor);
+            recorder.count++;
+            if (recorder.count === batchSize) {
+                recorder.batches++;
+                window.__atbBatch(recorder.take());
+            }
+            return result;
+        };
+    };
+
+    window.__onGame(wrap);
+}""" % {
+    'fields': len(COLUMNS),
+    'phases': json.dumps(PHASES),
+    'actors': json.dumps(ACTORS),
+    'statuses': json.dumps(STATUSES),
+}
+
+_START = """() => {
+    const recorder = window.__atbTimeline;
+    recorder.count = 0;
+    recorder.batches = 0;
+    recorder.recording = true;
+}"""
+
+_STOP = """() => {
+    const recorder = window.__atbTimeline;
+    recorder.recording = false;
+    return { batches: recorder.batches, rest: recorder.take() };
+}"""
+
+
+def _decode(data):
+    return np.frombuffer(base64.b64decode(data), dtype='<f8').reshape(-1, len(COLUMNS))
+
+
+@dataclass
+class Timeline:
+    """每帧一行的记录，列见 COLUMNS；阶段、行动者和状态为 PHASES / ACTORS / STATUSES 中的下标"""
+    frames: np.ndarray
+
+    def __len__(self):
+        return len(self.frames)
+
+    def __getattr__(self, name):
+        if name in _COLUMN:
+            return self.frames[:, _COLUMN[name]]
+        raise AttributeError(name)
+
+    @classmethod
+    def from_batches(cls, batches):
+        batches = [batch for batch in batches if len(batch)]
+        return cls(np.concatenate(batches) if batches else np.empty((0, len(COLUMNS))))
+
+    @property
+    def duration(self):
+        return float(self.dt.sum())
+
+
+class AtbRecorder:
+    """
+    ATB 时间线记录，作为 BrowserPool.page 的 setup 使用
+    用法: await recorder.start(page) ... timeline = await recorder.stop(page)
+    """
+
+    def __init__(self, batch_size=DEFAULT_BATCH):
+        self.batch_size = batch_size
+        self.batches = []
+
+    async def __call__(self, context):
+        await context.expose_binding('__atbBatch', self._on_batch)
+        await install_game_hook(context)
+        await context.add_init_script(script=f"({ATB_RECORDER})({self.batch_size})")
+
+    def _on_batch(self, source, data):
+        self.batches.append(_decode(data))
+
+    async def start(self, page):
+        self.batches = []
+        await page.evaluate(_START)
+
+    async def stop(self, page):
+        """停止记录，等待已发送的批次全部到达后返回 Timeline"""
+        result = await page.evaluate(_STOP)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + _FLUSH_TIMEOUT
+        while len(self.batches) < result['batches']:
+            if loop.time() > deadline:
+                raise TimeoutError(f"只收到 {len(self.batches)}/{result['batches']} 批 ATB 记录")
+            await asyncio.sleep(0.01)
+        return Timeline.from_batches(self.batches + [_decode(result['rest'])])
+
+
+@dataclass
+class Violation:
+    kind: str
+    frame: int
+    time: float
+    detail: str
+
+
+@dataclass
+class TimelineReport:
+    frames: int
+    duration: float
+    violations: list = field(default_factory=list)
+    max_drift: float = 0.0
+    max_dt: float = 0.0
+
+    @property
+    def counts(self):
+        counts = dict.fromkeys(FAILING_KINDS + ('long_frame',), 0)
+        for violation in self.violations:
+            counts[violation.kind] += 1
+        return counts
+
+    @property
+    def passed(self):
+        return not any(violation.kind in FAILING_KINDS for violation in self.violations)
+
+
+def _segment_offsets(breaks):
+    """breaks[i] 为真表示第 i 帧开始新区间；@returns 每帧所在区间起点的下标"""
+    starts = np.where(breaks, np.arange(len(breaks)), 0)
+    return np.maximum.accumulate(starts)
+
+
+def _analytic_drift(before, after, dt, speed, charging):
+    """
+    连续充能区间内，实际 ATB 与从区间起点按 predictATB 推算的值之差
+    区间在不充能的帧、或帧之间 ATB 被外部修改（施法、眩晕重置）时断开
+    """
+    count = len(before)
+    drift = np.zeros(count)
+    if count == 0:
+        return drift
+    continuous = np.zeros(count, dtype=bool)
+    continuous[1:] = charging[:-1] & (before[1:] == after[:-1]) & (speed[1:] == speed[:-1])
+    breaks = charging & ~continuous
+    start = _segment_offsets(breaks | ~charging)
+    elapsed = np.cumsum(dt)
+    since_start = elapsed - elapsed[start] + dt[start]
+    predicted = np.minimum(before[start] + atb_gain(speed, since_start), MAX_ATB)
+    drift[charging] = (after - predicted)[charging]
+    return drift
+
+
+def check_timeline(timeline, tolerance=DRIFT_TOLERANCE, max_frame_dt=MAX_FRAME_DT):
+    """把时间线与解析曲线和 updatePreparationPhase 的阶段切换规则比较"""
+    t = timeline
+    report = TimelineReport(len(t), t.duration if len(t) else 0.0)
+    if not len(t):
+        return report
+    report.max_dt = float(t.dt.max())
+
+    preparation = t.phase_before == PHASES.index('preparation')
+    player_charging = preparation & np.isin(t.player_status, [STATUSES.index('preparing'), STATUSES.index('stunned')])
+    enemy_charging = preparation & (t.enemy_status == STATUSES.index('preparing'))
+
+    def add(kind, frames, describe):
+        for frame in np.flatnonzero(frames):
+            report.violations.append(Violation(kind, int(frame), float(t.time[frame]), describe(int(frame))))
+
+    # 与解析曲线的偏差
+    player_drift = _analytic_drift(t.player_before, t.player_after, t.dt, t.player_speed, player_charging)
+    enemy_drift = _analytic_drift(t.enemy_before, t.enemy_after, t.dt, t.enemy_speed, enemy_charging)
+    report.max_drift = float(max(np.abs(player_drift).max(), np.abs(enemy_drift).max()))
+    add('drift', np.abs(player_drift) > tolerance, lambda i: f"玩家 ATB 偏离解析值 {player_drift[i]:+.6g}")
+    add('drift', np.abs(enemy_drift) > tolerance, lambda i: f"敌人 ATB 偏离解析值 {enemy_drift[i]:+.6g}")
+
+    # 超出范围
+    for name, after in (('玩家', t.player_after), ('敌人', t.enemy_after)):
+        add('overshoot', (after > MAX_ATB + tolerance) | (after < -tolerance),
+            lambda i, name=name, after=after: f"{name} ATB = {after[i]:.6g}")
+
+    # 阶段切换：玩家优先，其次敌人
+    player_ready = player_charging & (t.player_after >= MAX_ATB)
+    enemy_ready = enemy_charging & (t.enemy_after >= MAX_ATB) & ~player_ready
+    action = t.phase_after == PHASES.index('action')
+    add('missed_transition', player_ready & ~(action & (t.actor_after == ACTORS.index('player'))),
+        lambda i: f"玩家 ATB 已满但阶段为 {PHASES[int(t.phase_after[i])]}, 行动者 {ACTORS[int(t.actor_after[i])]}")
+    add('missed_transition', enemy_ready & ~(action & (t.actor_after == ACTORS.index('enemy'))),
+        lambda i: f"敌人 ATB 已满但阶段为 {PHASES[int(t.phase_after[i])]}, 行动者 {ACTORS[int(t.actor_after[i])]}")
+
+    # 同一帧内双方都充满：比较解析上的充满时刻
+    with np.errstate(divide='ignore', invalid='ignore'):
+        player_at = (MAX_ATB - t.player_before) / atb_gain(t.player_speed, 1)
+        enemy_at = (MAX_ATB - t.enemy_before) / atb_gain(t.enemy_speed, 1)
+    both = player_charging & enemy_charging & (t.player_after >= MAX_ATB) & (t.enemy_after >= MAX_ATB)
+    add('turn_order', both & (enemy_at < player_at - tolerance),
+        lambda i: f"deltaTime {t.dt[i] * 1000:.0f}ms 内双方 ATB 都充满，敌人应在 {enemy_at[i] * 1000:.0f}ms 先行动，"
+                  f"玩家在 {player_at[i] * 1000:.0f}ms")
+
+    add('long_frame', t.dt > max_frame_dt, lambda i: f"deltaTime {t.dt[i] * 1000:.0f}ms")
+    report.violations.sort(key=lambda violation: (violation.frame, violation.kind))
+    return report
+
+
+_KIND_LABELS = {'drift': '偏离解析值', 'overshoot': '超出范围', 'missed_transition': '阶段切换错误',
+                'turn_order': '行动顺序错误', 'long_frame': '长帧'}
+
+
+def format_timeline_report(report, limit=10):
+    lines = [
+        f"{report.frames} 帧, {report.duration:.1f}s, 最大 deltaTime {report.max_dt * 1000:.0f}ms, "
+        f"最大偏差 {report.max_drift:.3g}",
+        ", ".join(f"{_KIND_LABELS[kind]} {count}" for kind, count in report.counts.items()),
+    ]
+    for violation in report.violations[:limit]:
+        lines.append(f"  第 {violation.frame} 帧 [{_KIND_LABELS[violation.kind]}] {violation.detail}")
+    if len(report.violations) > limit:
+        lines.append(f"  ... 另有 {len(report.violations) - limit} 条")
+    return "\n".join(lines)
@@ -0,0 +1,212 @@
+"""
+Chrome 跟踪事件
+
+把测试中的每一步 harness 操作和等待（加载页面、开始战斗、等待ATB、施法、
+endBattle 之后 2 秒回到营地……）记录为带单调时间戳的命名区间；
+页面关闭前导入页面内的 performance 条目（导航时间、paint、mark / measure），
+对齐到同一时间轴后写成一个 Chrome trace-event JSON，可在 chrome://tracing 或 Perfetto 中打开。
+
+当前任务没有启用跟踪时，被 @traced 包装的函数只多一次 ContextVar 读取。
+"""
+import asyncio
+import functools
+import json
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from dataclasses import dataclass
+from pathlib import Path
+
+# 跟踪文件中的进程编号：harness 一行，每个页面一行
+HARNESS_PID = 1
+PAGE_PID_BASE = 100
+
+_current = ContextVar('tracer', default=None)
+
+# 读取页面内的 performance 条目；now 用于把页面时间对齐到 harness 的时钟
+_PAGE_ENTRIES = """() => {
+    const nav = performance.getEntriesByType('navigation')[0];
+    const pick = (entry) => ({ name: entry.name, startTime: entry.startTime, duration: entry.duration });
+    return {
+        now: performance.now(),
+        navigation: nav ? {
+            dns: [nav.domainLookupStart, nav.domainLookupEnd],
+            connect: [nav.connectStart, nav.connectEnd],
+            request: [nav.requestStart, nav.responseStart],
+            response: [nav.responseStart, nav.responseEnd],
+            domInteractive: [nav.responseEnd, nav.domInteractive],
+            domContentLoaded: [nav.domContentLoadedEventStart, nav.domContentLoadedEventEnd],
+            load: [nav.loadEventStart, nav.loadEventEnd],
+        } : {},
+        paint: performance.getEntriesByType('paint').map(pick),
+        marks: performance.getEntriesByType('mark').map(pick),
+        measures: performance.getEntriesByType('measure').map(pick),
+    };
+}"""
+
+
+@dataclass
+class StepStats:
+    """同名区间的统计（毫秒）"""
+    name: str
+    count: int
+    total: float
+    longest: float
+
+    @property
+    def mean(self):
+        return self.total / self.count
+
+
+class Tracer:
+    """一个测试的跟踪记录"""
+
+    def __init__(self, name):
+        self.name = name
+        self.events = []
+        self._origin = time.perf_counter_ns()
+        self._threads = {}
+        self._pages = 0
+
+    def now(self):
+        """距跟踪开始的微秒数"""
+        return (time.perf_counter_ns() - self._origin) / 1000
+
+    def _thread(self):
+        """每个 asyncio 任务一行，避免并发任务的区间互相嵌套"""
+        try:
+            task = asyncio.current_task()
+        except RuntimeError:
+            task = None
+        key = id(task)
+        if key not in self._threads:
+            self._threads[key] = (len(self._threads) + 1, task.get_name() if task else 'main')
+        return self._threads[key][0]
+
+    @contextmanager
+    def span(self, name, **args):
+        """记录一个区间；区间内抛出异常时在 args 中记录异常类型"""
+        tid = self._thread()
+        start = self.now()
+        try:
+            yield
+        except BaseException as e:
+            args['error'] = type(e).__name__
+            raise
+        finally:
+            self.events.append({'name': name, 'cat': 'harness', 'ph': 'X', 'pid': HARNESS_PID, 'tid': tid,
+                                'ts': start, 'dur': self.now() - start, 'args': args})
+
+    def instant(self, name, **args):
+        self.events.append({'name': name, 'cat': 'harness', 'ph': 'i', 's': 't', 'pid': HARNESS_PID,
+                            'tid': self._thread(), 'ts': self.now(), 'args': args})
+
+    async def import_page(self, page, label=None):
+        """
+        导入页面的 performance 条目
+        页面时间以 performance.now() 的读取时刻对齐：取 evaluate 往返的中点作为该时刻在 harness 时钟上的位置
+        """
+        before = self.now()
+        entries = await page.evaluate(_PAGE_ENTRIES)
+        offset = (before + self.now()) / 2 - entries['now'] * 1000
+        self._pages += 1
+        pid = PAGE_PID_BASE + self._pages
+        self.events.append({'name': 'process_name', 'ph': 'M', 'pid': pid,
+                            'args': {'name': label or f'page {self._pages}'}})
+
+        def complete(name, cat, start, duration):
+            self.events.append({'name': name, 'cat': cat, 'ph': 'X', 'pid': pid, 'tid': 1,
+                                'ts': offset + start * 1000, 'dur': max(0.0, duration * 1000)})
+
+        for name, (start, end) in entries['navigation'].items():
+            if end > 0:
+                complete(name, 'navigation', start, end - start)
+        for entry in entries['measures']:
+            complete(entry['name'], 'measure', entry['startTime'], entry['duration'])
+        for cat in ('paint', 'marks'):
+            for entry in entries[cat]:
+                self.events.append({'name': entry['name'], 'cat': cat.rstrip('s'), 'ph': 'i', 's': 'p', 'pid': pid,
+                                    'tid': 1, 'ts': offset + entry['startTime'] * 1000})
+
+    def to_json(self):
+        metadata = [{'name': 'process_name', 'ph': 'M', 'pid': HARNESS_PID, 'args': {'name': f'harness: {self.name}'}}]
+        metadata += [{'name': 'thread_name', 'ph': 'M', 'pid': HARNESS_PID, 'tid': tid, 'args': {'name': name}}
+                     for tid, name in self._threads.values()]
+        return {'traceEvents': metadata + self.events, 'displayTimeUnit': 'ms'}
+
+    def write(self, path):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_json(), f, ensure_ascii=False)
+        return path
+
+    def summary(self):
+        """
+        按名称汇总 harness 区间和页面 measure
+        @returns StepStats 列表，按总耗时从长到短排列
+        """
+        stats = {}
+        for event in self.events:
+            if event['ph'] != 'X' or event['cat'] not in ('harness', 'measure'):
+                continue
+            duration = event['dur'] / 1000
+            entry = stats.setdefault(event['name'], StepStats(event['name'], 0, 0.0, 0.0))
+            entry.count += 1
+            entry.total += duration
+            entry.longest = max(entry.longest, duration)
+        return sorted(stats.values(), key=lambda entry: -entry.total)
+
+
+def current_tracer():
+    """当前任务的 Tracer，没有启用跟踪时为 None"""
+    return _current.get()
+
+
+@contextmanager
+def tracing(name):
+    """在当前上下文中启用跟踪，之后创建的任务继承同一个 Tracer"""
+    tracer = Tracer(name)
+    token = _current.set(tracer)
+    try:
+        yield tracer
+    finally:
+        _current.reset(token)
+
+
+def span(name, **args):
+    """当前 Tracer 的区间，没有启用跟踪时什么也不做"""
+    tracer = _current.get()
+    return tracer.span(name, **args) if tracer else nullcontext()
+
+
+def traced(name, describe=None):
+    """
+    把异步函数的每次调用记录为一个区间
+    @param name 区间名称，或接受与被包装函数相同的参数、返回名称的函数
+    @param describe 可选，接受与被包装函数相同的参数，返回写入 args 的字典
+    """
+    def decorate(function):
+        @functools.wraps(function)
+        async def wrapper(*args, **kwargs):
+            tracer = _current.get()
+            if tracer is None:
+                return await function(*args, **kwargs)
+            span_name = name(*args, **kwargs) if callable(name) else name
+            with tracer.span(span_name, **(describe(*args, **kwargs) if describe else {})):
+                return await function(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def format_trace_summary(tracer, limit=10):
+    """最慢步骤的汇总表"""
+    stats = tracer.summary()
+    if not stats:
+        return "没有记录到任何步骤"
+    width = max(len(entry.name) for entry in stats[:limit])
+    lines = [f"{'步骤':<{width}}  {'次数':>6}  {'总计ms':>10}  {'平均ms':>9}  {'最长ms':>9}"]
+    for entry in stats[:limit]:
+        lines.append(f"{entry.name:<{width}}  {entry.count:>6}  {entry.total:>10.1f}  {entry.mean:>9.1f}  "
+                     f"{entry.longest:>9.1f}")
+    return '\n'.join(lines)
@@ -0,0 +1,396 @@
+"""
+截图视觉回归
+
+在固定视口、虚拟时钟和固定随机种子下截取营地、商店、战斗和升级时的符文选择画面，
+与基准截图逐像素比较。
+- 解码、遮罩、比较和编码都在线程池中进行（NumPy 和 zlib 计算时释放 GIL），截图协程提交后立即继续下一张
+- ATB 槽等随帧变化的区域按 CSS 选择器遮罩，不参与比较
+- 像素先按通道容差过滤，再按 YIQ 色差判断人眼是否可见（与 pixelmatch 相同的公式）
+- 基准截图按遮罩后像素的 SHA-256 存放（objects/<前两位>/<哈希>.png），manifest.json 记录 画面@视口 -> 哈希；
+  哈希与 manifest 一致时直接通过，不读写任何图片文件
+"""
+import asyncio
+import hashlib
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from .clock import PLAYER_TURN, VirtualClock
+from .png import decode_png, encode_png
+from .rng import SeededRandom
+from .saves import refresh_ui, save_scenario
+from .waits import ConsoleMarkers, cast_first_available, start_battle
+
+TESTS_DIR = Path(__file__).resolve().parents[1]
+GOLDEN_DIR = TESTS_DIR / 'goldens' / 'visual'
+# 不一致时写出实际截图和差异图，供人工检查
+DIFF_DIR = TESTS_DIR / 'visual-diffs'
+
+# 视口名称 -> (宽, 高)
+VIEWPORTS = {
+    'desktop': (1280, 720),
+    'mobile': (390, 844),
+}
+
+# 单个通道允许的差值（抗锯齿、字体渲染的细微差别）
+DEFAULT_CHANNEL_TOLERANCE = 8
+
+# YIQ 色差阈值，0 ~ 1，pixelmatch 的默认值
+DEFAULT_THRESHOLD = 0.1
+
+# 允许变化的像素比例
+DEFAULT_MAX_CHANGED_RATIO = 0.001
+
+DEFAULT_WORKERS = 4
+
+# YIQ 色差的最大值（黑白之间）
+_MAX_YIQ_DELTA = 35215.0
+
+# ATB 槽随时间填充，遮罩整个容器（填充条本身的尺寸会变）
+ATB_MASKS = ('.atb-container',)
+
+_MASK_RECTS = """(selectors) => selectors.flatMap(selector =>
+    [...document.querySelectorAll(selector)].map(element => {
+        const rect = element.getBoundingClientRect();
+        return [rect.left, rect.top, rect.right, rect.bottom];
+    })
+)"""
+
+_BATTLE_ACTIVE = '() => window.game.state.battle.active'
+
+
+async def _camp(page, markers, clock):
+    pass
+
+
+async def _shop(page, markers, clock):
+    await page.click('.tab-button[data-tab="shop"]')
+
+
+async def _battle(page, markers, clock):
+    await start_battle(page, markers, 'wolf')
+    await clock.run_until(page, PLAYER_TURN)
+
+
+async def _rune_choice(page, markers, clock):
+    """
+    游戏没有符文选择界面，升级时 battleSystem 把三个选项写进战斗日志；
+    打赢升到 5 级的战斗后、切回营地前截取战斗场景
+    """
+    await start_battle(page, markers, 'wolf')
+    while True:
+        await clock.run_until(page, PLAYER_TURN)
+        if not await page.evaluate(_BATTLE_ACTIVE):
+            break
+        if await cast_first_available(page, markers) is None:
+            raise RuntimeError("没有可用的法术，无法打赢升级战斗")
+
+
+@dataclass(frozen=True)
+class Screen:
+    """
+    一个需要截图的画面
+    @param save 预置存档场景名称
+    @param prepare 读档后把页面切换到该画面的协程 prepare(page, markers, clock)
+    @param masks 不参与比较的区域（CSS 选择器）
+    """
+    name: str
+    save: str
+    prepare: object
+    masks: tuple = ()
+
+
+SCREENS = (
+    Screen('camp', 'fresh', _camp),
+    Screen('shop', 'rich_shopper', _shop),
+    Screen('battle', 'fresh', _battle, ATB_MASKS),
+    Screen('rune-choice', 'about_to_reach_level_5', _rune_choice, ATB_MASKS),
+)
+
+
+@dataclass
+class ImageDiff:
+    changed: int
+    total: int
+    # 变化像素的包围盒 (x0, y0, x1, y1)，没有变化时为 None
+    bbox: tuple | None
+    # 最大的 YIQ 色差（0 ~ 1）
+    max_delta: float
+    highlight: np.ndarray | None = None
+
+    @property
+    def ratio(self):
+        return self.changed / self.total if self.total else 0.0
+
+
+@dataclass
+class VisualResult:
+    """
+    status: unchanged（哈希一致）、passed（在容差内）、changed、missing（没有基准）、updated（已更新基准）
+    """
+    key: str
+    status: str
+    digest: str
+    diff: ImageDiff | None = None
+
+    @property
+    def passed(self):
+        return self.status in ('unchanged', 'passed', 'updated')
+
+
+def build_mask(shape, rects):
+    """
+    @param rects 视口坐标 (left, top, right, bottom)，向外取整
+    @returns 遮罩区域为 True 的 (高, 宽) 数组
+    """
+    height, width = shape[:2]
+    mask = np.zeros((height, width), dtype=bool)
+    for left, top, right, bottom in rects:
+        x0, y0 = max(0, int(np.floor(left))), max(0, int(np.floor(top)))
+        x1, y1 = min(width, int(np.ceil(right))), min(height, int(np.ceil(bottom)))
+        if x0 < x1 and y0 < y1:
+            mask[y0:y1, x0:x1] = True
+    return mask
+
+
+def _rgb(pixels):
+    """统一为 RGB；截图不透明，直接丢弃透明通道"""
+    if pixels.ndim == 2:
+        pixels = pixels[:, :, None]
+    if pixels.shape[2] in (1, 2):
+        return np.repeat(pixels[:, :, :1], 3, axis=2)
+    return pixels[:, :, :3]
+
+
+def pixel_digest(pixels, mask=None):
+    """遮罩区域置零后的像素哈希"""
+    pixels = np.ascontiguousarray(_rgb(pixels))
+    if mask is not None and mask.any():
+        pixels = pixels.copy()
+        pixels[mask] = 0
+    digest = hashlib.sha256(np.array(pixels.shape, dtype=np.int64).tobytes())
+    digest.update(pixels.tobytes())
+    return digest.hexdigest()
+
+
+def _yiq_delta(expected, actual):
+    """每个像素的 YIQ 色差，已归一化到 0 ~ 1"""
+    delta = expected.astype(np.float32) - actual.astype(np.float32)
+    r, g, b = delta[..., 0], delta[..., 1], delta[..., 2]
+    y = r * 0.29889531 + g * 0.58662247 + b * 0.11448223
+    i = r * 0.59597799 - g * 0.27417610 - b * 0.32180189
+    q = r * 0.21147017 - g * 0.52261711 + b * 0.31114694
+    return (0.5053 * y * y + 0.299 * i * i + 0.1957 * q * q) / _MAX_YIQ_DELTA
+
+
+def diff_images(expected, actual, mask=None, channel_tolerance=DEFAULT_CHANNEL_TOLERANCE,
+                threshold=DEFAULT_THRESHOLD, highlight=False):
+    """
+    比较两张同尺寸的截图
+    @param mask 不参与比较的区域
+    @param highlight 是否生成差异图：变暗的基准截图上标出变化（红）和遮罩（蓝）
+    """
+    expected, actual = _rgb(expected), _rgb(actual)
+    if expected.shape != actual.shape:
+        raise ValueError(f"截图尺寸不同: {expected.shape[1]}x{expected.shape[0]} -> "
+                         f"{actual.shape[1]}x{actual.shape[0]}")
+    if mask is None:
+        mask = np.zeros(expected.shape[:2], dtype=bool)
+
+    over_tolerance = (np.abs(expected.astype(np.int16) - actual.astype(np.int16)) > channel_tolerance).any(axis=2)
+    delta = _yiq_delta(expected, actual)
+    delta[mask] = 0
+    changed = over_tolerance & (delta > threshold * threshold) & ~mask
+
+    rows, cols = np.nonzero(changed)
+    bbox = (int(cols.min()), int(rows.min()), int(cols.max()) + 1, int(rows.max()) + 1) if rows.size else None
+    result = ImageDiff(int(rows.size), int((~mask).sum()), bbox, float(np.sqrt(delta.max())) if delta.size else 0.0)
+    if highlight:
+        faded = (255 - (255 - expected.astype(np.uint16)) // 4).astype(np.uint8)
+        faded[mask] = (faded[mask] // 2) + np.array([0, 0, 127], dtype=np.uint8)
+        faded[changed] = (255, 0, 0)
+        result.highlight = faded
+    return result
+
+
+class GoldenStore:
+    """
+    按内容寻址的基准截图
+    manifest.json: {画面@视口: 哈希}，objects/<哈希前两位>/<哈希>.png 为截图（未遮罩）
+    reads / writes 统计图片文件的读写次数
+    """
+
+    def __init__(self, directory=GOLDEN_DIR):
+        self.directory = Path(directory)
+        self.manifest_path = self.directory / 'manifest.json'
+        self.manifest = json.loads(self.manifest_path.read_text(encoding='utf-8')) \
+            if self.manifest_path.is_file() else {}
+        self.reads = 0
+        self.writes = 0
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    def object_path(self, digest):
+        return self.directory / 'objects' / digest[:2] / f"{digest}.png"
+
+    def expected(self, key):
+        return self.manifest.get(key)
+
+    def load(self, digest):
+        with self._lock:
+            self.reads += 1
+        return decode_png(self.object_path(digest).read_bytes())
+
+    def store(self, key, pixels, digest):
+        """保存截图并更新 manifest；相同内容的文件已存在时不重复写入"""
+        path = self.object_path(digest)
+        if not path.is_file():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(encode_png(pixels))
+            with self._lock:
+                self.writes += 1
+        with self._lock:
+            if self.manifest.get(key) != digest:
+                self.manifest[key] = digest
+                self._dirty = True
+
+    def save(self):
+        """manifest 有变化时写回"""
+        with self._lock:
+            if not self._dirty:
+                return False
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self.manifest_path.write_text(json.dumps(self.manifest, indent=2, sort_keys=True) + '\n',
+                                          encoding='utf-8')
+            self._dirty = False
+            return True
+
+
+def has_goldens(directory=GOLDEN_DIR):
+    """是否已经生成过基准截图（manifest.json 存在）"""
+    return (Path(directory) / 'manifest.json').is_file()
+
+
+class VisualChecker:
+    """
+    在线程池中检查截图
+    用法: checker.submit(key, png, rects) 立即返回；全部截完后 await checker.results()
+    @param update 把当前截图保存为新的基准
+    """
+
+    def __init__(self, store=None, update=False, diff_dir=DIFF_DIR, workers=DEFAULT_WORKERS,
+                 channel_tolerance=DEFAULT_CHANNEL_TOLERANCE, threshold=DEFAULT_THRESHOLD,
+                 max_changed_ratio=DEFAULT_MAX_CHANGED_RATIO):
+        self.store = store if store is not None else GoldenStore()
+        self.update = update
+        self.diff_dir = Path(diff_dir)
+        self.channel_tolerance = channel_tolerance
+        self.threshold = threshold
+        self.max_changed_ratio = max_changed_ratio
+        self._executor = ThreadPoolExecutor(workers, thread_name_prefix='visual')
+        self._pending = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+
+    def submit(self, key, png, rects=()):
+        """提交一张截图，返回 asyncio Future（VisualResult）"""
+        future = asyncio.get_running_loop().run_in_executor(self._executor, self.check, key, png, rects)
+        self._pending.append(future)
+        return future
+
+    async def results(self):
+        """等待已提交的截图全部检查完毕；update 模式下写回 manifest"""
+        results = await asyncio.gather(*self._pending)
+        self._pending.clear()
+        if self.update:
+            self.store.save()
+        return results
+
+    def check(self, key, png, rects=()):
+        """同步检查一张截图（在工作线程中运行）"""
+        pixels = decode_png(png)
+        mask = build_mask(pixels.shape, rects)
+        digest = pixel_digest(pixels, mask)
+        expected = self.store.expected(key)
+        if digest == expected:
+            return VisualResult(key, 'unchanged', digest)
+        if self.update:
+            self.store.store(key, pixels, digest)
+            return VisualResult(key, 'updated', digest)
+        if expected is None:
+            self._write_diff(key, png)
+            return VisualResult(key, 'missing', digest)
+
+        try:
+            diff = diff_images(self.store.load(expected), pixels, mask, self.channel_tolerance, self.threshold,
+                               highlight=True)
+        except ValueError:
+            self._write_diff(key, png)
+            return VisualResult(key, 'changed', digest)
+        if diff.ratio <= self.max_changed_ratio:
+            return VisualResult(key, 'passed', digest, diff)
+        self._write_diff(key, png, diff.highlight)
+        return VisualResult(key, 'changed', digest, diff)
+
+    def _write_diff(self, key, png, highlight=None):
+        directory = self.diff_dir / key.replace('@', '-')
+        directory.mkdir(parents=True, exist_ok=True)
+        (directory / 'actual.png').write_bytes(png)
+        if highlight is not None:
+            (directory / 'diff.png').write_bytes(encode_png(highlight))
+
+
+def screen_key(screen, viewport):
+    return f"{screen.name}@{viewport}"
+
+
+async def capture_screen(pool, screen, viewport, seed=1):
+    """
+    在新的上下文中载入存档、切换到画面并截图
+    @returns (PNG 数据, 遮罩矩形)
+    """
+    width, height = VIEWPORTS[viewport]
+    clock = VirtualClock()
+    setup = [save_scenario(screen.save), SeededRandom(seed), clock]
+    async with pool.page(setup=setup, viewport={'width': width, 'height': height}, device_scale_factor=1) as page:
+        await refresh_ui(page)
+        await screen.prepare(page, ConsoleMarkers(page), clock)
+        rects = await page.evaluate(_MASK_RECTS, list(screen.masks)) if screen.masks else []
+        png = await page.screenshot(animations='disabled', caret='hide')
+    return png, rects
+
+
+async def capture_screens(pool, checker, screens=SCREENS, viewports=tuple(VIEWPORTS), seed=1):
+    """依次截取所有 画面 x 视口，截图提交给 checker 后立即开始下一张；@returns VisualResult 列表"""
+    for viewport in viewports:
+        for screen in screens:
+            png, rects = await capture_screen(pool, screen, viewport, seed)
+            checker.submit(screen_key(screen, viewport), png, rects)
+    return await checker.results()
+
+
+_STATUS_LABELS = {'unchanged': '未变化', 'passed': '容差内', 'changed': '有变化', 'missing': '无基准',
+                  'updated': '已更新'}
+
+
+def format_visual_results(results, diff_dir=DIFF_DIR):
+    lines = []
+    for result in results:
+        line = f"{result.key}: {_STATUS_LABELS[result.status]}"
+        if result.diff is not None:
+            line += f", 变化像素 {result.diff.changed} ({result.diff.ratio:.3%}), 区域 {result.diff.bbox}"
+        if not result.passed:
+            line += f" -> {diff_dir / result.key.replace('@', '-')}"
+        lines.append(line)
+    return "\n".join(lines)
@@ -0,0 +1,232 @@
+"""
+事件驱动的等待工具
+
+监听 battleSystem.ts 输出的 [EVENT] / [SCENE] / [BATTLE] / [ENEMY] 控制台标记，
+以及 #battle-scene.active / #camp-scene.active 场景切换，代替固定时长的 asyncio.sleep。
+开始战斗、休息、重开按钮在营地的“冒险”标签页中，默认激活的是“魔法台”，点击前先切换标签页。
+每次等待都有独立的截止时间，超时抛出 TimeoutError。
+"""
+import asyncio
+import re
+
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+from .logs import DEFAULT_CAPACITY, LogStream
+from .trace import traced
+from .widgets import spell_buttons, spell_locator
+
+# 默认截止时间（秒）
+SCENE_TIMEOUT = 10.0
+TURN_TIMEOUT = 15.0
+CAST_TIMEOUT = 5.0
+BATTLE_TIMEOUT = 60.0
+
+# 控制台标记
+MARKER_BATTLE_START = '[BATTLE] 遇到了'
+MARKER_BATTLE_END = '[EVENT] 结束战斗'
+MARKER_CAMP_SCENE = '[SCENE] 切换到营地场景'
+MARKER_CAST_RESULT = 'Start cast result:'
+MARKER_REST = '[REST]'
+
+# 开始战斗 / 休息 / 重开按钮所在的标签页
+ADVENTURE_TAB = 'adventure'
+
+# 页面内等待条件的前置检查：没有 window.game 时让 wait_for_function 立即失败，而不是把条件当作已满足
+_REQUIRE_GAME = "if (!window.game) throw new Error('页面没有 window.game，需要以 NODE_ENV=development 构建');"
+
+_ENEMY_PATTERN = re.compile(r'\[BATTLE\] 遇到了 (\S+) \(HP: (\d+)')
+
+
+class ConsoleMarkers:
+    """
+    收集页面控制台输出，并按标记唤醒等待者
+    消息保存在 LogStream 的环形缓冲区中（logs 属性），同一页面不需要再单独挂一个 LogStream，
+    长时间运行时内存占用保持不变
+    """
+
+    def __init__(self, page=None, logs=None, capacity=DEFAULT_CAPACITY):
+        """
+        @param page 监听其 console 事件；为 None 时由调用者通过 feed 送入消息（如 EventChannel）
+        @param logs 可选，保存消息的 LogStream，不能再直接监听同一页面；默认新建一个容量为 capacity 的
+        """
+        self.logs = logs if logs is not None else LogStream(capacity=capacity)
+        self._waiters = []
+        if page is not None:
+            page.on('console', self._on_console)
+
+    def _on_console(self, msg):
+        self.feed(msg.text)
+
+    def feed(self, text):
+        """记录一条消息并唤醒匹配的等待者"""
+        record = self.logs.feed(text)
+        for waiter in self._waiters[:]:
+            predicate, future = waiter
+            if future.done():
+                self._waiters.remove(waiter)
+            elif predicate(text):
+                future.set_result((record.seq, text))
+                self._waiters.remove(waiter)
+
+    def mark(self):
+        """返回当前位置（下一条消息的 seq），用于只匹配之后产生的日志"""
+        return self.logs.mark()
+
+    def texts(self, since=None):
+        """since（含）之后仍在缓冲区中的消息文本，默认为缓冲区中的全部消息"""
+        return [record.text for record in self.logs.since(self.logs.oldest if since is None else since)]
+
+    @traced(lambda self, marker, *args, **kwargs: f"wait.console {getattr(marker, 'pattern', marker)}")
+    async def wait_for(self, marker, since=None, timeout=SCENE_TIMEOUT):
+        """
+        等待包含 marker 的控制台消息
+        @param marker 字符串（子串匹配）或已编译的正则
+        @param since mark() 返回的位置，默认只等待新消息；已被环形缓冲区覆盖的消息不再参与匹配
+        @param timeout 截止时间（秒）
+        @returns 匹配到的消息文本
+        """
+        if isinstance(marker, re.Pattern):
+            predicate = lambda text: marker.search(text) is not None
+        else:
+            predicate = lambda text: marker in text
+
+        start = self.mark() if since is None else since
+        for text in self.texts(start):
+            if predicate(text):
+                return text
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append((predicate, future))
+        try:
+            _, text = await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"等待控制台标记 {marker!r} 超时 ({timeout}s)") from None
+        return text
+
+
+@traced('wait.scene', lambda page, scene, *args, **kwargs: {'scene': scene})
+async def wait_for_scene(page, scene, timeout=SCENE_TIMEOUT):
+    """等待 #<scene>-scene.active 出现"""
+    await page.wait_for_selector(f'#{scene}-scene.active', timeout=timeout * 1000)
+
+
+async def open_tab(page, tab, timeout=SCENE_TIMEOUT):
+    """点击营地的标签按钮并等待对应的 .tab-content 激活（已激活时点击无副作用）"""
+    await page.click(f'.tab-button[data-tab="{tab}"]', timeout=timeout * 1000)
+    await page.wait_for_selector(f'.tab-content[data-tab="{tab}"].active', timeout=timeout * 1000)
+
+
+@traced('wait.player_turn')
+async def wait_for_player_turn(page, timeout=TURN_TIMEOUT):
+    """
+    等待玩家ATB充满并进入行动阶段，战斗已经结束时立即返回
+    依赖开发模式下的 window.game，页面没有 window.game 时抛出异常而不是直接返回
+    """
+    await page.wait_for_function(
+        f"""() => {{
+            {_REQUIRE_GAME}
+            const battle = window.game.state.battle;
+            return !battle.active || (battle.phase === 'action' && battle.currentActor === 'player');
+        }}""",
+        polling='raf',
+        timeout=timeout * 1000,
+    )
+
+
+@traced('action.start_battle', lambda page, markers, enemy_id=None, *args, **kwargs: {'enemy': enemy_id})
+async def start_battle(page, markers, enemy_id=None, timeout=SCENE_TIMEOUT):
+    """
+    点击开始战斗并等待进入战斗场景
+    @param enemy_id 开发模式下指定的敌人ID，None 表示随机
+    @returns 遇到的敌人名称
+    """
+    if enemy_id is not None:
+        dev_select = await page.wait_for_selector('#dev-enemy-select', timeout=timeout * 1000)
+        await dev_select.select_option(enemy_id)
+
+    await open_tab(page, ADVENTURE_TAB, timeout)
+    since = markers.mark()
+    start_battle_btn = await page.wait_for_selector('#start-battle-btn', timeout=timeout * 1000)
+    await start_battle_btn.click()
+
+    text = await markers.wait_for(MARKER_BATTLE_START, since=since, timeout=timeout)
+    await wait_for_scene(page, 'battle', timeout)
+    match = _ENEMY_PATTERN.search(text)
+    return match.group(1) if match else "未知"
+
+
+async def _click_and_wait(page, markers, index, timeout):
+    since = markers.mark()
+    try:
+        # 游戏状态已轮到玩家时，按钮的禁用状态最多晚一帧刷新，定位器会等待其可用
+        await spell_locator(page, index).click(timeout=timeout * 1000)
+        text = await markers.wait_for(MARKER_CAST_RESULT, since=since, timeout=timeout)
+    except (TimeoutError, PlaywrightTimeoutError):
+        # 按钮一直被禁用，或点击后没有产生施法日志
+        return False
+    return text.endswith('true')
+
+
+@traced('action.cast_spell', lambda page, markers, index, *args, **kwargs: {'index': index})
+async def cast_spell(page, markers, index, timeout=CAST_TIMEOUT):
+    """
+    点击第 index 个法术按钮，等待 UI 返回施法结果
+    先一次往返读取全部按钮，按钮不存在、不可见或MP不足时不点击
+    @returns 是否开始吟唱
+    """
+    bar = await spell_buttons(page)
+    button = bar.get(index)
+    if button is None or not button.visible or not bar.affordable(button):
+        return False
+    return await _click_and_wait(page, markers, index, timeout)
+
+
+@traced('action.cast_first_available')
+async def cast_first_available(page, markers, timeout=CAST_TIMEOUT):
+    """
+    按顺序施放第一个可以施放的法术
+    @returns 施放的法术索引，没有可施放的法术时返回 None
+    """
+    bar = await spell_buttons(page)
+    for button in bar.castable():
+        if await _click_and_wait(page, markers, button.index, timeout):
+            return button.index
+    return None
+
+
+@traced('wait.battle_end')
+async def wait_for_battle_end(page, markers, since=None, timeout=BATTLE_TIMEOUT):
+    """
+    等待战斗结束并回到营地
+    @returns 是否胜利
+    """
+    text = await markers.wait_for(MARKER_BATTLE_END, since=since, timeout=timeout)
+    await markers.wait_for(MARKER_CAMP_SCENE, since=since, timeout=SCENE_TIMEOUT)
+    await wait_for_scene(page, 'camp', SCENE_TIMEOUT)
+    return '胜利' in text
+
+
+@traced('action.rest')
+async def rest(page, markers, timeout=SCENE_TIMEOUT):
+    """点击休息按钮并等待HP/MP恢复日志"""
+    await open_tab(page, ADVENTURE_TAB, timeout)
+    since = markers.mark()
+    rest_btn = await page.wait_for_selector('#rest-btn', timeout=timeout * 1000)
+    await rest_btn.click()
+    await markers.wait_for(MARKER_REST, since=since, timeout=timeout)
+
+
+@traced('action.restart_game')
+async def restart_game(page, timeout=SCENE_TIMEOUT):
+    """点击营地的重开按钮，等待玩家状态回到初始值（依赖开发模式下的 window.game）"""
+    await open_tab(page, ADVENTURE_TAB, timeout)
+    restart_btn = await page.wait_for_selector('#camp-restart-btn', timeout=timeout * 1000)
+    await restart_btn.click()
+    await page.wait_for_function(
+        f"""() => {{
+            {_REQUIRE_GAME}
+            const player = window.game.state.player;
+            return player.level === 1 && player.experience === 0 && player.gold === 0;
+        }}""",
+        timeout=timeout * 1000,
+    )
@@ -0,0 +1,123 @@
+"""
+批量读取控件状态
+
+一次 page.evaluate 收集一组控件（法术按钮、商店物品）的文本、可见性、禁用状态和价格，
+再通过稳定的定位器操作选中的元素。ui.renderPlayerSpells 每次施法后都会重建按钮，
+按 data-spell-index / data-material-id 定位不会拿到过期的元素句柄。
+"""
+import re
+from dataclasses import dataclass
+
+_SPELL_TEXT_PATTERN = re.compile(r'^(⚠️\s*)?(.*?)\s*\(MP: (\d+)\)$')
+_PRICE_PATTERN = re.compile(r'(\d+)')
+
+# 与 Playwright 的可见性判断一致：包围盒非空且没有 visibility: hidden
+_VISIBLE = """(el) => {
+    const rect = el.getBoundingClientRect();
+    return rect.width > 0 && rect.height > 0 && getComputedStyle(el).visibility !== 'hidden';
+}"""
+
+_SPELL_BUTTONS = f"""() => {{
+    const visible = {_VISIBLE};
+    const state = window.game?.state;
+    return {{
+        mp: state ? state.player.mp : null,
+        buttons: [...document.querySelectorAll('.spell-button')].map(el => ({{
+            index: Number(el.dataset.spellIndex),
+            text: el.textContent.trim(),
+            visible: visible(el),
+            disabled: el.disabled,
+        }})),
+    }};
+}}"""
+
+_SHOP_ITEMS = f"""() => {{
+    const visible = {_VISIBLE};
+    return [...document.querySelectorAll('.shop-item')].map(item => {{
+        const button = item.querySelector('.buy-btn');
+        return {{
+            materialId: button ? button.dataset.materialId : null,
+            name: item.querySelector('.name')?.textContent.trim() ?? '',
+            price: item.querySelector('.price')?.textContent.trim() ?? '',
+            visible: button ? visible(button) : false,
+            disabled: button ? button.disabled : true,
+        }};
+    }});
+}}"""
+
+
+@dataclass
+class SpellButton:
+    index: int
+    text: str
+    name: str
+    cost: int | None
+    visible: bool
+    disabled: bool
+    # 按钮文本带 ⚠️，表示 engine.willCastBeInterrupted 预测施法会被打断
+    interrupt_warning: bool = False
+
+
+@dataclass
+class SpellBar:
+    """全部法术按钮和当前MP（开发模式下读取 window.game，否则为 None）"""
+    mp: float | None
+    buttons: list
+
+    def get(self, index):
+        for button in self.buttons:
+            if button.index == index:
+                return button
+        return None
+
+    def affordable(self, button):
+        return self.mp is None or button.cost is None or button.cost <= self.mp
+
+    def castable(self):
+        """可见且MP足够的按钮；禁用状态由 UI 每帧刷新，可能比游戏状态晚一帧，不作为过滤条件"""
+        return [button for button in self.buttons if button.visible and self.affordable(button)]
+
+
+@dataclass
+class ShopItem:
+    material_id: str | None
+    name: str
+    price: int | None
+    visible: bool
+    disabled: bool
+
+
+def _spell_button(data):
+    match = _SPELL_TEXT_PATTERN.match(data['text'])
+    if match:
+        warning, name, cost = match.group(1) is not None, match.group(2), int(match.group(3))
+    else:
+        warning, name, cost = False, data['text'], None
+    return SpellButton(data['index'], data['text'], name, cost, data['visible'], data['disabled'], warning)
+
+
+async def spell_buttons(page):
+    """一次往返读取所有法术按钮"""
+    data = await page.evaluate(_SPELL_BUTTONS)
+    return SpellBar(data['mp'], [_spell_button(button) for button in data['buttons']])
+
+
+async def shop_items(page):
+    """一次往返读取所有商店物品"""
+    items = []
+    for data in await page.evaluate(_SHOP_ITEMS):
+        price = _PRICE_PATTERN.search(data['price'])
+        items.append(ShopItem(
+            data['materialId'], data['name'], int(price.group(1)) if price else None, data['visible'], data['disabled'],
+        ))
+    return items
+
+
+def spell_locator(page, index):
+    """第 index 个法术的按钮，按钮重建后仍然有效"""
+    return page.locator(f'.spell-button[data-spell-index="{index}"]')
+
+
+def buy_locator(page, material_id):
+    """购买指定素材的按钮"""
+    return page.locator(f'.buy-btn[data-material-id="{material_id}"]')
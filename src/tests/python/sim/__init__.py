@@ -0,0 +1,38 @@
+"""
+无浏览器战斗模拟器
+
+复现 calculator.ts、atb.ts、ai.ts 和 battleSystem.ts 的规则，
+数据直接读取自 src/data/index.ts。
+"""
+from .battle import (
+    DEFAULT_RULES,
+    DEFAULT_TICK_MS,
+    Battle,
+    BattleResult,
+    Rules,
+    default_player,
+    first_available,
+    random_enemy_id,
+    scripted,
+    simulate,
+)
+from .calculator import Spell, calculate_spell
+from .data import ENEMIES, MATERIALS, RUNES
+
+__all__ = [
+    'DEFAULT_RULES',
+    'DEFAULT_TICK_MS',
+    'ENEMIES',
+    'MATERIALS',
+    'RUNES',
+    'Battle',
+    'BattleResult',
+    'Rules',
+    'Spell',
+    'calculate_spell',
+    'default_player',
+    'first_available',
+    'random_enemy_id',
+    'scripted',
+    'simulate',
+]
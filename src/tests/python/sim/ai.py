@@ -0,0 +1,112 @@
+"""
+敌人AI，对应 src/modules/ai.ts
+"""
+
+
+def basic_attack(enemy):
+    """没有可用技能时的普通攻击"""
+    return {
+        'id': 'basic_attack',
+        'name': '普通攻击',
+        'damage': enemy.get('dmg') or 10,
+        'cost': 0,
+        'channelTime': 0,
+        'probability': 1,
+        'conditions': {},
+    }
+
+
+def skill_weight(skill, weights):
+    """技能权重：策略权重 > 技能概率 > 0.5"""
+    return weights.get(skill['id']) or skill.get('probability') or 0.5
+
+
+class AISystem:
+    """敌人AI状态与技能选择"""
+
+    def __init__(self, rng):
+        self.rng = rng
+        self.ai_states = {}
+
+    def initialize_ai(self, enemy_id, strategy):
+        self.ai_states[enemy_id] = {
+            'skillCooldowns': {},
+            'lastUsedSkill': None,
+            'strategy': strategy,
+        }
+
+    def select_skill(self, enemy):
+        if not enemy or not enemy.get('skills'):
+            return basic_attack(enemy)
+
+        enemy_id = enemy.get('id') or 'unknown'
+        if enemy_id not in self.ai_states:
+            self.initialize_ai(enemy_id, enemy.get('aiStrategy') or {'type': 'balanced', 'skillWeights': {}})
+
+        ai_state = self.ai_states[enemy_id]
+        available = self.available_skills(enemy, ai_state)
+        if not available:
+            return basic_attack(enemy)
+
+        selected = self.weighted_random_selection(available, ai_state['strategy']['skillWeights'])
+
+        cooldown = (selected.get('conditions') or {}).get('cooldown')
+        if cooldown:
+            ai_state['skillCooldowns'][selected['id']] = cooldown
+
+        ai_state['lastUsedSkill'] = selected['id']
+        return selected
+
+    @staticmethod
+    def available_skills(enemy, ai_state):
+        available = []
+        hp_percent = enemy['hp'] / enemy['maxHp']
+        for skill in enemy['skills']:
+            conditions = skill.get('conditions') or {}
+            # MP不足
+            if skill.get('cost') and (enemy.get('mp') or 0) < skill['cost']:
+                continue
+            # 冷却中
+            if ai_state['skillCooldowns'].get(skill['id'], 0) > 0:
+                continue
+            # HP条件
+            if conditions.get('minHpPercent') and hp_percent < conditions['minHpPercent']:
+                continue
+            if conditions.get('maxHpPercent') and hp_percent > conditions['maxHpPercent']:
+                continue
+            available.append(skill)
+        return available
+
+    def weighted_random_selection(self, skills, weights):
+        total_weight = 0
+        for skill in skills:
+            total_weight += skill_weight(skill, weights)
+
+        remaining = self.rng.random() * total_weight
+        for skill in skills:
+            remaining -= skill_weight(skill, weights)
+            if remaining <= 0:
+                return skill
+        return skills[0]
+
+    def update_ai(self, enemy, delta_time):
+        """冷却时间递减"""
+        if not enemy:
+            return
+        ai_state = self.ai_states.get(enemy.get('id') or 'unknown')
+        if not ai_state:
+            return
+        cooldowns = ai_state['skillCooldowns']
+        for skill_id in cooldowns:
+            cooldowns[skill_id] = max(0, cooldowns[skill_id] - delta_time)
+
+    def has_cooldowns(self):
+        """是否存在未结束的冷却"""
+        return any(
+            value > 0
+            for ai_state in self.ai_states.values()
+            for value in ai_state['skillCooldowns'].values()
+        )
+
+    def reset_ai(self, enemy_id):
+        self.ai_states.pop(enemy_id, None)
@@ -0,0 +1,41 @@
+"""
+ATB计算，对应 src/modules/atb.ts
+"""
+
+# 基础ATB增长速率
+BASE_RATE = 200
+
+# ATB满值
+MAX_ATB = 100
+
+# 速度修正的除数（speed / 10），写死在 atb.ts 中
+SPEED_DIVISOR = 10
+
+# deltaTime 的倍数（deltaTime * 10），对应 GameConfig.atb.speedMultiplier
+SPEED_MULTIPLIER = 10
+
+
+def atb_gain(speed, delta_time, base_rate=BASE_RATE, speed_multiplier=SPEED_MULTIPLIER):
+    """一帧的ATB增长量，运算顺序与 updatePlayerATB/updateEnemyATB 一致"""
+    speed_factor = speed / SPEED_DIVISOR
+    return (base_rate * speed_factor * delta_time * speed_multiplier) / 60
+
+
+def update_atb(speed, delta_time, current_atb, base_rate=BASE_RATE):
+    """更新ATB值，上限为 MAX_ATB"""
+    return min(current_atb + atb_gain(speed, delta_time, base_rate), MAX_ATB)
+
+
+def is_ready(atb):
+    return atb >= MAX_ATB
+
+
+def predict_atb(current_atb, speed, time, base_rate=BASE_RATE):
+    """解析预测ATB值，对应 ATBSystem.predictATB"""
+    return update_atb(speed, time, current_atb, base_rate)
+
+
+def time_to_ready(current_atb, speed, base_rate=BASE_RATE):
+    """ATB从当前值充满所需的时间（秒）"""
+    rate = atb_gain(speed, 1, base_rate)
+    return max(MAX_ATB - current_atb, 0) / rate
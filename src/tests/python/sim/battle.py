@@ -0,0 +1,470 @@
+"""
+无浏览器战斗模拟，对应 src/modules/battle/battleSystem.ts
+
+以固定帧间隔推进，逐帧复现 updateBattle 的准备/行动/结算阶段、
+吟唱与打断、眩晕计时，以及 AISystem 的技能选择。玩家输入由策略函数提供，
+在两帧之间调用，相当于玩家点击法术按钮。
+"""
+import math
+import random
+from dataclasses import dataclass, field
+
+from .ai import AISystem
+from .atb import atb_gain
+from .calculator import cached_spell
+from .data import ENEMIES
+from .rewards import grant_rewards
+
+# Playwright 虚拟时钟的 requestAnimationFrame 间隔（毫秒）
+DEFAULT_TICK_MS = 16
+
+# 模拟的最长游戏时间（秒）
+DEFAULT_MAX_TIME = 300.0
+
+
+@dataclass(frozen=True)
+class Rules:
+    """战斗中写死在 battleSystem.ts / atb.ts 里的参数"""
+    base_rate: float = 200
+    focus_value: float = 25
+    stun_duration: float = 1
+    speed_multiplier: float = 10
+    # 法术吟唱时间的倍数
+    cast_time_scale: float = 1
+
+    @classmethod
+    def from_config(cls, config):
+        """
+        由 GameConfig（defaultConfig 或 difficultyPresets 中的一项）构造
+        baseSpeed / speedMultiplier 对应 atb.ts 的 baseRate 和 deltaTime 的倍数（defaultConfig 与 atb.ts 一致），
+        speed / 10 的除数写死在 atb.ts 中；interruptThreshold 对应打断施法所需的伤害（battleSystem.ts 中的 focusValue）；
+        游戏目前没有读取 config/game.ts，这些参数只在模拟中生效
+        """
+        return cls(
+            base_rate=config['atb']['baseSpeed'],
+            focus_value=config['battle']['interruptThreshold'],
+            stun_duration=config['battle']['stunDuration'],
+            speed_multiplier=config['atb']['speedMultiplier'],
+            cast_time_scale=config['cast']['baseTime'] * config['cast']['timeMultiplier'],
+        )
+
+
+DEFAULT_RULES = Rules()
+
+
+def default_player():
+    """初始玩家状态，对应 engine.resetState"""
+    return {
+        'hp': 100,
+        'maxHp': 100,
+        'mp': 50,
+        'maxMp': 50,
+        'speed': 12,
+        'spells': [['firebolt'], ['amp', 'firebolt'], ['heal']],
+        'gold': 0,
+        'experience': 0,
+        'level': 1,
+        'materials': {},
+        'unlockedRunes': ['firebolt', 'heal', 'amp'],
+    }
+
+
+def random_enemy_id(rng, enemies=ENEMIES):
+    """对应 getRandomEnemy：按声明顺序等概率选择"""
+    enemy_ids = list(enemies)
+    return enemy_ids[math.floor(rng.random() * len(enemy_ids))]
+
+
+def first_available(battle):
+    """默认策略：按顺序使用第一个可以施放的法术"""
+    for index in range(len(battle.player['spells'])):
+        if battle.can_cast(index):
+            return index
+    return None
+
+
+def scripted(indices):
+    """
+    按顺序施放给定的法术索引，用完后不再行动
+    与浏览器回放使用同一份脚本，便于交叉验证
+    """
+    queue = list(indices)
+
+    def policy(battle):
+        return queue.pop(0) if queue else None
+
+    return policy
+
+
+@dataclass
+class BattleResult:
+    """一场战斗的结果"""
+    enemy_id: str
+    victory: bool | None
+    time: float
+    frames: int
+    player_hp: float
+    player_mp: float
+    enemy_hp: float
+    casts: list = field(default_factory=list)
+    interrupts: int = 0
+    enemy_actions: int = 0
+    rewards: dict | None = None
+
+
+class Battle:
+    """
+    单场战斗
+    player 字典会被直接修改（HP/MP/奖励/升级），便于连续模拟多场战斗
+    """
+
+    def __init__(self, player, enemy_id, rng=None, tick_ms=DEFAULT_TICK_MS, rules=DEFAULT_RULES, enemies=ENEMIES):
+        self.rng = rng or random.Random()
+        self.player = player
+        # 战斗中只会修改敌人的 hp，浅拷贝即可
+        self.enemy = dict(enemies[enemy_id])
+        self.tick_ms = tick_ms
+        self.delta_time = tick_ms / 1000
+        self.rules = rules
+        self.ai = AISystem(self.rng)
+        self.ai.initialize_ai(self.enemy.get('id') or 'unknown',
+                              self.enemy.get('aiStrategy') or {'type': 'balanced', 'skillWeights': {}})
+
+        self.now = 0
+        self.frames = 0
+        self.active = True
+        self.victory = None
+        self.rewards = None
+        self.phase = 'preparation'
+        self.current_actor = None
+        self.player_atb = 0
+        self.enemy_atb = 0
+        self.player_status = 'preparing'
+        self.enemy_status = 'preparing'
+        self.cast_progress = 0
+        self.current_spell_index = -1
+        self.current_spell = None
+        self.stun_timer = 0
+        self.focus_value = rules.focus_value
+
+        self._casting = False
+        self._cast_start = 0
+        self._cast_duration = 0
+        self._player_gain = atb_gain(player['speed'], self.delta_time, rules.base_rate, rules.speed_multiplier)
+        self._enemy_gain = atb_gain(self.enemy['speed'], self.delta_time, rules.base_rate, rules.speed_multiplier)
+
+        self.casts = []
+        self.interrupts = 0
+        self.enemy_actions = 0
+
+    @property
+    def awaiting_input(self):
+        """是否处于等待玩家输入的行动阶段"""
+        return self.active and self.phase == 'action' and self.current_actor == 'player'
+
+    def step(self):
+        """推进一帧，对应 GameLoop 中的一次 engine.updateBattle(deltaTime)"""
+        self.now += self.tick_ms
+        self.frames += 1
+        if not self.active:
+            return
+
+        delta_time = self.delta_time
+        self.ai.update_ai(self.enemy, delta_time)
+
+        # 处理眩晕
+        if self.stun_timer > 0:
+            self.stun_timer -= delta_time
+            if self.stun_timer <= 0:
+                self.player_status = 'preparing'
+
+        if self.phase == 'preparation':
+            self._update_preparation()
+        elif self.phase == 'action':
+            if self.current_actor == 'enemy':
+                self._enemy_action()
+        else:
+            self._update_resolution()
+
+    def _update_preparation(self):
+        player_status = self.player_status
+        if player_status == 'preparing' or player_status == 'stunned':
+            self.player_atb = min(self.player_atb + self._player_gain, 100)
+        elif player_status == 'channeling':
+            self.player_atb = 0
+            self._update_cast()
+            if self._casting and self.cast_progress >= 1:
+                self.phase = 'resolution'
+
+        if self.enemy_status == 'preparing':
+            self.enemy_atb = min(self.enemy_atb + self._enemy_gain, 100)
+        elif self.enemy_status == 'channeling':
+            self.enemy_atb = 0
+
+        if self.player_atb >= 100 and (self.player_status == 'preparing' or self.player_status == 'stunned'):
+            self.phase = 'action'
+            self.current_actor = 'player'
+        elif self.enemy_atb >= 100 and self.enemy_status == 'preparing':
+            self.phase = 'action'
+            self.current_actor = 'enemy'
+
+    def _update_cast(self):
+        """对应 ATBSystem.updateCast，按 JS 语义处理 0 时长"""
+        if not self._casting:
+            return
+        elapsed = self.now - self._cast_start
+        if self._cast_duration:
+            progress = elapsed / self._cast_duration
+        else:
+            progress = math.inf if elapsed > 0 else math.nan
+        # Math.min(NaN, 1) 为 NaN
+        self.cast_progress = progress if math.isnan(progress) else min(progress, 1)
+
+    def _update_resolution(self):
+        if self.player_status == 'channeling':
+            self._finish_cast()
+        if self.enemy_status == 'channeling':
+            self._finish_enemy_cast()
+        self.phase = 'preparation'
+        self.current_actor = None
+
+    def can_cast(self, index):
+        """法术按钮是否可点击（ui.renderPlayerSpells 的 canCast）"""
+        spell = cached_spell(tuple(self.player['spells'][index]))
+        return self.active and self.player['mp'] >= spell.cost and self.player_status == 'preparing'
+
+    def cast(self, index):
+        """点击法术按钮：先经过 UI 的检查，再调用 start_cast"""
+        if not self.can_cast(index):
+            return False
+        return self.start_cast(index)
+
+    def start_cast(self, index):
+        """对应 BattleSystem.startCast"""
+        if not self.active or self.phase != 'action' or self.current_actor != 'player':
+            return False
+        chain = self.player['spells'][index] if index < len(self.player['spells']) else None
+        if not chain:
+            return False
+
+        spell = cached_spell(tuple(chain))
+        if self.player['mp'] < spell.cost:
+            return False
+
+        self.player['mp'] -= spell.cost
+        self.player_status = 'channeling'
+        self._casting = True
+        self._cast_start = self.now
+        self._cast_duration = spell.time * self.rules.cast_time_scale * 1000
+        self.cast_progress = 0
+        self.current_spell_index = index
+        self.current_spell = spell
+        self.casts.append(index)
+
+        self.phase = 'preparation'
+        self.current_actor = None
+        return True
+
+    def _finish_cast(self):
+        spell = self.current_spell
+        if not spell:
+            return
+
+        if spell.dmg > 0:
+            self.enemy['hp'] -= spell.dmg
+            if self.enemy['hp'] <= 0:
+                self.end(True)
+                return
+        elif spell.heal > 0:
+            self.player['hp'] = min(self.player['hp'] + spell.heal, self.player['maxHp'])
+
+        self.player_status = 'preparing'
+        self.player_atb = 0
+        self.cast_progress = 0
+        self.current_spell_index = -1
+        self.current_spell = None
+        self._reset_cast()
+
+    def _enemy_action(self):
+        skill = self.ai.select_skill(self.enemy)
+
+        if skill['channelTime'] > 0:
+            self.enemy_status = 'channeling'
+        else:
+            damage = skill['damage']
+            self.player['hp'] -= damage
+            self.enemy_actions += 1
+
+            if self.player_status == 'channeling' and damage >= self.focus_value:
+                self.interrupt_cast()
+
+            if self.player['hp'] <= 0:
+                self.end(False)
+                return
+
+            self.enemy_status = 'preparing'
+            self.enemy_atb = 0
+
+        self.phase = 'preparation'
+        self.current_actor = None
+
+    def _finish_enemy_cast(self):
+        damage = self.enemy['dmg'] * 1.5
+        self.player['hp'] -= damage
+        self.enemy_actions += 1
+
+        if self.player['hp'] <= 0:
+            self.end(False)
+            return
+
+        self.enemy_status = 'preparing'
+        self.enemy_atb = 0
+
+    def interrupt_cast(self):
+        """对应 BattleSystem.interruptCast"""
+        if self.player_status != 'channeling':
+            return
+        self.interrupts += 1
+        self.player_status = 'stunned'
+        self.stun_timer = self.rules.stun_duration
+        self.cast_progress = 0
+        self.current_spell_index = -1
+        self.current_spell = None
+        self._reset_cast()
+
+    def _reset_cast(self):
+        self._casting = False
+        self._cast_start = 0
+        self._cast_duration = 0
+
+    def end(self, victory):
+        """对应 BattleSystem.endBattle"""
+        self.active = False
+        self.victory = victory
+        if victory:
+            self.rewards = grant_rewards(self.player, self.enemy, self.rng)
+
+    def _advance_preparation(self, max_frames):
+        """
+        连续推进准备阶段的帧，直到阶段切换或达到 max_frames
+        与逐帧调用 step() 结果完全一致，只是把状态放在局部变量里；
+        仅在没有技能冷却时使用（此时 updateAI 不改变任何状态）
+        """
+        tick_ms = self.tick_ms
+        delta_time = self.delta_time
+        player_gain = self._player_gain
+        enemy_gain = self._enemy_gain
+        casting = self._casting
+        cast_start = self._cast_start
+        cast_duration = self._cast_duration
+        now = self.now
+        frames = self.frames
+        stun_timer = self.stun_timer
+        player_status = self.player_status
+        enemy_status = self.enemy_status
+        player_atb = self.player_atb
+        enemy_atb = self.enemy_atb
+        cast_progress = self.cast_progress
+        phase = 'preparation'
+        actor = None
+
+        while frames < max_frames:
+            now += tick_ms
+            frames += 1
+
+            if stun_timer > 0:
+                stun_timer -= delta_time
+                if stun_timer <= 0:
+                    player_status = 'preparing'
+
+            if player_status == 'preparing' or player_status == 'stunned':
+                player_atb += player_gain
+                if player_atb > 100:
+                    player_atb = 100
+            elif player_status == 'channeling':
+                player_atb = 0
+                if casting:
+                    if cast_duration:
+                        cast_progress = min((now - cast_start) / cast_duration, 1)
+                    else:
+                        cast_progress = 1 if now > cast_start else math.nan
+                    if cast_progress >= 1:
+                        phase = 'resolution'
+
+            if enemy_status == 'preparing':
+                enemy_atb += enemy_gain
+                if enemy_atb > 100:
+                    enemy_atb = 100
+            elif enemy_status == 'channeling':
+                enemy_atb = 0
+
+            if player_atb >= 100 and (player_status == 'preparing' or player_status == 'stunned'):
+                phase = 'action'
+                actor = 'player'
+            elif enemy_atb >= 100 and enemy_status == 'preparing':
+                phase = 'action'
+                actor = 'enemy'
+
+            if phase != 'preparation':
+                break
+
+        self.now = now
+        self.frames = frames
+        self.stun_timer = stun_timer
+        self.player_status = player_status
+        self.player_atb = player_atb
+        self.enemy_atb = enemy_atb
+        self.cast_progress = cast_progress
+        self.phase = phase
+        self.current_actor = actor
+
+    def run(self, policy=first_available, max_time=DEFAULT_MAX_TIME):
+        """
+        运行到战斗结束、策略放弃行动或超过 max_time
+        @returns BattleResult，未分出胜负时 victory 为 None
+        """
+        max_frames = int(max_time * 1000 / self.tick_ms)
+        step = self.step
+        while self.active and self.frames < max_frames:
+            if self.phase == 'preparation' and not self.ai.has_cooldowns():
+                self._advance_preparation(max_frames)
+            else:
+                step()
+            if self.phase == 'action' and self.current_actor == 'player' and self.active:
+                if self.player_status == 'stunned':
+                    # 眩晕结束前法术按钮不可点击
+                    continue
+                index = policy(self)
+                # 玩家不行动时游戏停在行动阶段，不会再有任何变化
+                if index is None or not self.cast(index):
+                    break
+        return self.result()
+
+    def result(self):
+        return BattleResult(
+            enemy_id=self.enemy['id'],
+            victory=self.victory,
+            time=self.now / 1000,
+            frames=self.frames,
+            player_hp=self.player['hp'],
+            player_mp=self.player['mp'],
+            enemy_hp=self.enemy['hp'],
+            casts=list(self.casts),
+            interrupts=self.interrupts,
+            enemy_actions=self.enemy_actions,
+            rewards=self.rewards,
+        )
+
+
+def simulate(enemy_id=None, player=None, policy=first_available, rng=None, **kwargs):
+    """
+    模拟一场战斗
+    @param enemy_id 敌人ID，None 时按 getRandomEnemy 随机选择
+    @param player 玩家状态，默认使用初始状态
+    """
+    rng = rng or random.Random()
+    if enemy_id is None:
+        enemy_id = random_enemy_id(rng)
+    max_time = kwargs.pop('max_time', DEFAULT_MAX_TIME)
+    battle = Battle(player if player is not None else default_player(), enemy_id, rng, **kwargs)
+    return battle.run(policy, max_time)
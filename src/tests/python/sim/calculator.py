@@ -0,0 +1,115 @@
+"""
+法术计算，对应 src/modules/calculator.ts
+
+保留原实现的细节：修饰符暂存到下一个核心符时才生效，多个 count 修饰符只有最后一个生效，
+末尾没有核心符的修饰符被丢弃，最终数值使用 JS 的 Math.round 取整。
+"""
+import math
+from dataclasses import dataclass
+from functools import lru_cache
+
+from .data import RUNES
+
+
+@dataclass(frozen=True)
+class Spell:
+    """法术属性，对应 types/index.ts 中的 Spell"""
+    name: str
+    cost: int
+    time: float
+    dmg: int
+    heal: int
+    description: str
+
+
+INVALID_SPELL = Spell('无效法术', 0, 0, 0, 0, '无效法术')
+
+
+def js_round(value):
+    """JS Math.round：.5 向正无穷取整"""
+    return math.floor(value + 0.5)
+
+
+def apply_core(rune, mods):
+    """
+    把暂存的修饰符应用到一个核心符
+    @returns (cost, time, dmg, heal)，均为乘以次数后的未取整值
+    """
+    dmg = rune.get('baseDmg') or 0
+    heal = rune.get('baseHeal') or 0
+    cost = rune['cost']
+    time = rune['time']
+    count = 1
+
+    for mod in mods:
+        if mod.get('dmgMult'):
+            dmg *= mod['dmgMult']
+        if mod.get('costMult'):
+            cost *= mod['costMult']
+        if mod.get('timeMult'):
+            time *= mod['timeMult']
+        if mod.get('timeAdd'):
+            time += mod['timeAdd']
+        if mod.get('count'):
+            # 简单起见，最后一个多重符生效
+            count = mod['count']
+
+    return (
+        cost * count,
+        time * count,
+        dmg * count if dmg > 0 else 0,
+        heal * count if heal > 0 else 0,
+    )
+
+
+def spell_name(chain, runes=RUNES):
+    """法术名称：符文名去掉第一个"术"字后直接连接"""
+    name = ''.join(runes[rune_id]['name'].replace('术', '', 1) if rune_id in runes else rune_id for rune_id in chain)
+    return name or '无效法术'
+
+
+def calculate_spell(chain, runes=RUNES):
+    """
+    计算一个法术链的属性
+    @param chain 符文ID列表
+    @returns Spell
+    """
+    if not chain:
+        return INVALID_SPELL
+
+    total_cost = 0
+    total_time = 0
+    total_dmg = 0
+    total_heal = 0
+    pending_mods = []
+
+    for rune_id in chain:
+        rune = runes.get(rune_id)
+        if not rune:
+            continue
+        if rune['type'] == 'MOD':
+            pending_mods.append(rune)
+        elif rune['type'] == 'CORE':
+            cost, time, dmg, heal = apply_core(rune, pending_mods)
+            # 累加顺序与 calculator.ts 一致，保证浮点结果相同
+            total_cost += cost
+            total_time += time
+            total_dmg += dmg
+            total_heal += heal
+            pending_mods = []
+
+    name = spell_name(chain, runes)
+    return Spell(
+        name=name,
+        cost=js_round(total_cost),
+        time=total_time,
+        dmg=js_round(total_dmg),
+        heal=js_round(total_heal),
+        description=name,
+    )
+
+
+@lru_cache(maxsize=4096)
+def cached_spell(chain):
+    """按默认符文表计算并缓存，chain 必须是元组"""
+    return calculate_spell(chain)
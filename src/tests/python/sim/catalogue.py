@@ -0,0 +1,255 @@
+"""
+法术链枚举与法术目录
+
+calculateSpell 把修饰符暂存到下一个核心符时才结算，因此一个法术链可以拆成若干"段"
+（若干修饰符 + 一个核心符），法术属性是各段属性依次累加的结果：
+- enumerate_chains 深度优先遍历所有法术链，子链直接复用前缀的累加状态
+- distinct_spells 按段做动态规划，属性相同的链（例如段的不同排列）合并为一项，
+  状态数远少于链的条数，长度 8 的目录约 1 秒即可建好
+末尾没有核心符的修饰符不影响属性，这样的链不计入。
+"""
+from dataclasses import dataclass
+from functools import lru_cache
+from itertools import product
+
+import numpy as np
+
+from .calculator import Spell, apply_core, js_round
+from .data import RUNES
+
+# 目录支持的排序指标
+METRICS = ('dmg_per_sec', 'dmg_per_mp', 'heal_per_mp')
+
+# 合并属性时保留的小数位，吸收不同累加顺序造成的浮点误差
+_KEY_DIGITS = 9
+
+
+def _split_runes(unlocked, runes):
+    """过滤未知符文并按类型分组，保持 unlocked 的顺序"""
+    unlocked = [rune_id for rune_id in (unlocked if unlocked is not None else runes) if rune_id in runes]
+    cores = [rune_id for rune_id in unlocked if runes[rune_id]['type'] == 'CORE']
+    mods = [rune_id for rune_id in unlocked if runes[rune_id]['type'] == 'MOD']
+    return unlocked, cores, mods
+
+
+@lru_cache(maxsize=None)
+def _default_segment(mods, core):
+    return apply_core(RUNES[core], [RUNES[mod] for mod in mods])
+
+
+def segment_stats(mods, core, runes=RUNES):
+    """
+    一段（修饰符元组 + 核心符）的未取整属性，默认符文表的结果会被缓存
+    @returns (cost, time, dmg, heal)
+    """
+    if runes is RUNES:
+        return _default_segment(tuple(mods), core)
+    return apply_core(runes[core], [runes[mod] for mod in mods])
+
+
+def enumerate_chains(unlocked=None, max_length=3, runes=RUNES):
+    """
+    按字典序（以 unlocked 的顺序为准）生成所有以核心符结尾、长度不超过 max_length 的法术链
+    每个前缀的累加状态只计算一次，由所有以它开头的链共享
+    @param unlocked 可用的符文ID，默认为全部符文
+    @returns 生成 (符文ID元组, Spell)，结果与 calculate_spell 完全一致
+    """
+    unlocked, _, _ = _split_runes(unlocked, runes)
+    fragments = {rune_id: runes[rune_id]['name'].replace('术', '', 1) for rune_id in unlocked}
+
+    # 栈中保存前缀及其状态：(链, 名称, cost, time, dmg, heal, 暂存的修饰符)
+    stack = [((), '', 0, 0, 0, 0, ())]
+    while stack:
+        chain, name, cost, time, dmg, heal, pending = stack.pop()
+        if chain and not pending:
+            yield chain, Spell(name, js_round(cost), time, js_round(dmg), js_round(heal), name)
+        if len(chain) == max_length:
+            continue
+
+        children = []
+        for rune_id in unlocked:
+            child = chain + (rune_id,)
+            child_name = name + fragments[rune_id]
+            if runes[rune_id]['type'] == 'MOD':
+                children.append((child, child_name, cost, time, dmg, heal, pending + (rune_id,)))
+            else:
+                seg_cost, seg_time, seg_dmg, seg_heal = segment_stats(pending, rune_id, runes)
+                # 累加顺序与 calculator.ts 一致
+                children.append((
+                    child, child_name,
+                    cost + seg_cost, time + seg_time, dmg + seg_dmg, heal + seg_heal,
+                    (),
+                ))
+        stack.extend(reversed(children))
+
+
+def _segment_table(cores, mods, max_length, runes):
+    """
+    所有长度不超过 max_length 的段，按 (长度, 属性) 合并
+    @returns (段列表, 长度数组, 属性数组 (n, 4), 段数数组)
+    """
+    groups = {}
+    for mod_count in range(max_length):
+        for mod_chain in product(mods, repeat=mod_count):
+            for core in cores:
+                stats = segment_stats(mod_chain, core, runes)
+                key = (mod_count + 1,) + tuple(round(value, _KEY_DIGITS) for value in stats)
+                if key in groups:
+                    groups[key][3] += 1
+                else:
+                    groups[key] = [mod_chain + (core,), mod_count + 1, stats, 1]
+    chains, lengths, stats, counts = zip(*groups.values()) if groups else ((), (), (), ())
+    return (
+        list(chains),
+        np.array(lengths, dtype=np.intp),
+        np.array(stats, dtype=float).reshape(-1, 4),
+        np.array(counts, dtype=np.int64),
+    )
+
+
+def _merge(totals, counts, parents):
+    """
+    合并属性相同的行，保留第一次出现的行作为代表，条数相加
+    @returns (totals, counts, parents)
+    """
+    keys = np.round(totals, _KEY_DIGITS)
+    _, first, inverse = np.unique(keys, axis=0, return_index=True, return_inverse=True)
+    merged = np.zeros(len(first), dtype=np.int64)
+    np.add.at(merged, inverse.reshape(-1), counts)
+    # 按首次出现的位置排序，保证代表链的顺序稳定
+    order = np.argsort(first, kind='stable')
+    return totals[first[order]], merged[order], parents[first[order]]
+
+
+@dataclass(frozen=True)
+class CatalogueEntry:
+    """一组属性相同的法术链，chain 为其中最短、最先生成的一条"""
+    chain: tuple
+    spell: Spell
+    variants: int = 1
+
+
+def distinct_spells(unlocked=None, max_length=3, runes=RUNES):
+    """
+    按属性去重的法术列表
+    以段为单位做动态规划：第 n 层是长度恰好为 n 的链能达到的所有属性，
+    由第 n - k 层的每个状态接上长度为 k 的段得到，每层用 NumPy 整体计算并合并。
+    每条链唯一地拆分为段，因此 variants（属性相同的链的条数）是精确的；
+    代表链的属性按链的顺序逐段累加，与 calculate_spell 一致。
+    @returns CatalogueEntry 列表，按代表链长度排序
+    """
+    _, cores, mods = _split_runes(unlocked, runes)
+    seg_chains, seg_lengths, seg_stats, seg_counts = _segment_table(cores, mods, max_length, runes)
+
+    # 每层：(属性数组, 条数数组, 父指针数组)，父指针为 (上一层长度, 上一层下标, 段下标)
+    layers = [(np.zeros((1, 4)), np.ones(1, dtype=np.int64), np.full((1, 3), -1, dtype=np.intp))]
+    for length in range(1, max_length + 1):
+        totals, counts, parents = [], [], []
+        for previous in range(length):
+            segments = np.flatnonzero(seg_lengths == length - previous)
+            prev_totals, prev_counts, _ = layers[previous]
+            if not len(segments) or not len(prev_counts):
+                continue
+            states = np.repeat(np.arange(len(prev_counts)), len(segments))
+            chosen = np.tile(segments, len(prev_counts))
+            totals.append(prev_totals[states] + seg_stats[chosen])
+            counts.append(prev_counts[states] * seg_counts[chosen])
+            parents.append(np.column_stack([np.full(len(states), previous), states, chosen]))
+        if totals:
+            layers.append(_merge(np.concatenate(totals), np.concatenate(counts), np.concatenate(parents)))
+        else:
+            layers.append((np.zeros((0, 4)), np.zeros(0, dtype=np.int64), np.zeros((0, 3), dtype=np.intp)))
+
+    # 跨层合并，较短的链优先作为代表
+    sources = np.concatenate([
+        np.column_stack([np.full(len(counts), length), np.arange(len(counts))])
+        for length, (_, counts, _) in enumerate(layers) if length
+    ]) if max_length > 0 else np.zeros((0, 2), dtype=np.intp)
+    if not len(sources):
+        return []
+    totals = np.concatenate([layer[0] for layer in layers[1:]])
+    counts = np.concatenate([layer[1] for layer in layers[1:]])
+    totals, counts, sources = _merge(totals, counts, sources)
+
+    def chain_of(length, index):
+        parts = []
+        while length:
+            previous, index, segment = layers[length][2][index]
+            parts.append(seg_chains[segment])
+            length = previous
+        return tuple(rune_id for part in reversed(parts) for rune_id in part)
+
+    fragments = {rune_id: runes[rune_id]['name'].replace('术', '', 1) for rune_id in cores + mods}
+    entries = []
+    for (cost, time, dmg, heal), count, (length, index) in zip(totals.tolist(), counts.tolist(), sources.tolist()):
+        chain = chain_of(length, index)
+        name = ''.join(fragments[rune_id] for rune_id in chain)
+        entries.append(CatalogueEntry(chain, Spell(name, js_round(cost), time, js_round(dmg), js_round(heal), name), count))
+    return entries
+
+
+def _ratio(numerator, denominator):
+    """逐项相除，分母为 0 时分子为正记为 inf，否则记为 0"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        result = numerator / denominator
+    return np.where(denominator > 0, result, np.where(numerator > 0, np.inf, 0.0))
+
+
+class SpellCatalogue:
+    """
+    法术目录：按 dmg/sec、dmg/MP、heal/MP 排好序的索引，支持 Pareto 前沿查询
+    """
+
+    def __init__(self, entries):
+        self.entries = list(entries)
+        cost = np.array([entry.spell.cost for entry in self.entries], dtype=float)
+        time = np.array([entry.spell.time for entry in self.entries], dtype=float)
+        dmg = np.array([entry.spell.dmg for entry in self.entries], dtype=float)
+        heal = np.array([entry.spell.heal for entry in self.entries], dtype=float)
+        self.cost = cost
+        self.metrics = {
+            'dmg_per_sec': _ratio(dmg, time),
+            'dmg_per_mp': _ratio(dmg, cost),
+            'heal_per_mp': _ratio(heal, cost),
+        }
+        # 各指标从高到低的下标，同值时保持目录顺序
+        self.index = {name: np.argsort(-values, kind='stable') for name, values in self.metrics.items()}
+
+    @classmethod
+    def build(cls, unlocked=None, max_length=3, runes=RUNES):
+        return cls(distinct_spells(unlocked, max_length, runes))
+
+    def __len__(self):
+        return len(self.entries)
+
+    def top(self, metric, count=10, max_cost=None):
+        """
+        按指标取前 count 个法术
+        @param max_cost 可选，只考虑耗蓝不超过该值的法术
+        """
+        order = self.index[metric]
+        if max_cost is not None:
+            order = order[self.cost[order] <= max_cost]
+        return [self.entries[index] for index in order[:count]]
+
+    def pareto(self, metrics=METRICS, max_cost=None):
+        """
+        在给定指标上不被任何其他法术支配的法术
+        @returns CatalogueEntry 列表，按第一个指标从高到低排列
+        """
+        candidates = np.arange(len(self.entries))
+        if max_cost is not None:
+            candidates = candidates[self.cost <= max_cost]
+        points = np.column_stack([self.metrics[name][candidates] for name in metrics])
+
+        # 按指标字典序从高到低扫描，一个点只可能被排在它前面的点支配
+        order = np.lexsort([-points[:, column] for column in reversed(range(len(metrics)))])
+        frontier = []
+        for position in order:
+            point = points[position]
+            if frontier:
+                front = points[frontier]
+                if np.any(np.all(front >= point, axis=1) & np.any(front > point, axis=1)):
+                    continue
+            frontier.append(position)
+        return [self.entries[candidates[position]] for position in frontier]
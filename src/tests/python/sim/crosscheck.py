@@ -0,0 +1,96 @@
+"""
+模拟器与真实页面的交叉验证
+
+同一份法术脚本分别在模拟器和虚拟时钟下的游戏页面中回放，比较战斗结果。
+"""
+import random
+from dataclasses import dataclass
+
+from harness.clock import VirtualClock
+from harness.probe import snapshot
+from harness.waits import ConsoleMarkers, cast_spell, start_battle
+
+from .battle import Battle, default_player, scripted
+
+# 玩家可以点击法术按钮，或战斗已经结束
+_READY_OR_OVER = """() => {
+    const battle = window.game.state.battle;
+    return !battle.active ||
+        (battle.phase === 'action' && battle.currentActor === 'player' && battle.playerStatus === 'preparing');
+}"""
+
+# 默认的交叉验证脚本：(敌人ID, 依次施放的法术索引)
+DEFAULT_SCRIPTS = [
+    ('wolf', [0, 0, 0]),
+    ('goblin', [1, 0]),
+    ('ogre', [1, 1, 0, 2, 0]),
+    ('wolf', [2, 1, 1]),
+]
+
+
+@dataclass
+class Outcome:
+    """可比较的战斗结果"""
+    victory: bool | None
+    player_hp: float
+    player_mp: float
+    enemy_hp: float
+    casts: int
+
+
+@dataclass
+class CrossCheckResult:
+    enemy_id: str
+    spells: list
+    simulated: Outcome
+    actual: Outcome
+
+    @property
+    def matches(self):
+        return self.simulated == self.actual
+
+
+def simulate_script(enemy_id, spells, seed=0):
+    """在模拟器中回放脚本"""
+    battle = Battle(default_player(), enemy_id, random.Random(seed))
+    result = battle.run(scripted(spells))
+    return Outcome(result.victory, result.player_hp, result.player_mp, result.enemy_hp, len(result.casts))
+
+
+async def replay_script(pool, enemy_id, spells, turn_limit=30.0):
+    """在虚拟时钟下的游戏页面中回放脚本"""
+    clock = VirtualClock()
+    async with pool.page(setup=[clock]) as page:
+        markers = ConsoleMarkers(page)
+        await start_battle(page, markers, enemy_id)
+
+        casts = 0
+        for index in spells:
+            await clock.run_until(page, _READY_OR_OVER, limit=turn_limit)
+            if not await cast_spell(page, markers, index):
+                break
+            casts += 1
+
+        # 脚本用完后玩家不再行动，游戏会停在行动阶段
+        await clock.run_until(page, _READY_OR_OVER, limit=turn_limit)
+        state = await snapshot(page)
+
+    enemy_hp = state.enemy.hp if state.enemy else None
+    if state.battle.active:
+        victory = None
+    else:
+        victory = enemy_hp is not None and enemy_hp <= 0
+    return Outcome(victory, state.player.hp, state.player.mp, enemy_hp, casts)
+
+
+async def cross_check(pool, scripts=DEFAULT_SCRIPTS):
+    """
+    逐个回放脚本并与模拟结果比较
+    @returns CrossCheckResult 列表
+    """
+    results = []
+    for enemy_id, spells in scripts:
+        simulated = simulate_script(enemy_id, spells)
+        actual = await replay_script(pool, enemy_id, spells)
+        results.append(CrossCheckResult(enemy_id, list(spells), simulated, actual))
+    return results
@@ -0,0 +1,83 @@
+"""
+游戏数据加载
+
+直接从 TypeScript 源文件读取 `export const NAME = { ... };` 形式的对象字面量，
+保证模拟器与游戏使用同一份符文、敌人、素材和难度配置。
+"""
+import json
+import re
+from functools import lru_cache
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parents[3]
+DATA_PATH = SRC_DIR / 'data' / 'index.ts'
+CONFIG_PATH = SRC_DIR / 'config' / 'game.ts'
+
+_EXPORT_PATTERN = re.compile(r'export const (\w+)(?:\s*:\s*[^=]+)?\s*=\s*\{')
+_STRING_PATTERN = re.compile(r"'((?:[^'\\]|\\.)*)'")
+_KEY_PATTERN = re.compile(r'([{,]\s*)([A-Za-z_$][\w$]*)\s*:')
+_TRAILING_COMMA_PATTERN = re.compile(r',(\s*[}\]])')
+_COMMENT_PATTERN = re.compile(r'//[^\n]*')
+
+
+def _find_block_end(source, start):
+    """从 start 处的 '{' 开始，返回与之匹配的 '}' 之后的位置"""
+    depth = 0
+    quote = None
+    for index in range(start, len(source)):
+        char = source[index]
+        if quote:
+            if char == '\\':
+                continue
+            if char == quote and source[index - 1] != '\\':
+                quote = None
+        elif char in '\'"`':
+            quote = char
+        elif char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                return index + 1
+    raise ValueError("对象字面量缺少闭合括号")
+
+
+def _to_json(literal):
+    """把只包含字面量的 JS 对象转换为 JSON 文本"""
+    literal = _STRING_PATTERN.sub(lambda m: json.dumps(m.group(1)), literal)
+    literal = _KEY_PATTERN.sub(r'\1"\2":', literal)
+    return _TRAILING_COMMA_PATTERN.sub(r'\1', literal)
+
+
+def parse_ts_objects(source):
+    """
+    解析源码中所有导出的对象字面量常量
+    @returns {常量名: 对象} 字典，保留键的声明顺序
+    """
+    objects = {}
+    source = _COMMENT_PATTERN.sub('', source)
+    for match in _EXPORT_PATTERN.finditer(source):
+        start = match.end() - 1
+        end = _find_block_end(source, start)
+        objects[match.group(1)] = json.loads(_to_json(source[start:end]))
+    return objects
+
+
+@lru_cache(maxsize=None)
+def _load(path):
+    return parse_ts_objects(Path(path).read_text(encoding='utf-8'))
+
+
+def load_game_data(path=DATA_PATH):
+    """读取 data/index.ts，返回 (RUNES, ENEMIES, MATERIALS)"""
+    objects = _load(str(path))
+    return objects['RUNES'], objects['ENEMIES'], objects['MATERIALS']
+
+
+def load_game_config(path=CONFIG_PATH):
+    """读取 config/game.ts，返回 (defaultConfig, difficultyPresets)"""
+    objects = _load(str(path))
+    return objects['defaultConfig'], objects['difficultyPresets']
+
+
+RUNES, ENEMIES, MATERIALS = load_game_data()
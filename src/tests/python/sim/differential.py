@@ -0,0 +1,165 @@
+"""
+法术计算的差分测试：Python 模型与页面中的 calculateSpell 批量比较
+
+一批法术链只调用一次 page.evaluate，在页面里对整个数组调用 window.game.engine.calculateSpell，
+不超过 DEFAULT_BATCH_SIZE 条链只需要一次往返。不一致的链用逐个删除符文的方式缩小到最小，
+缩小过程中每一轮的所有候选链同样合并成一次调用。
+"""
+import random
+from dataclasses import dataclass, field
+from itertools import product
+
+from .calculator import calculate_spell
+from .data import RUNES
+
+# 每次 page.evaluate 发送的最大链数，避免单条消息过大（10 万条长度 10 以内的链约 5MB JSON）
+DEFAULT_BATCH_SIZE = 100000
+
+# 页面中批量计算，结果按 SPELL_FIELDS 的顺序压成数组以减少传输量
+SPELL_FIELDS = ('name', 'cost', 'time', 'dmg', 'heal', 'description')
+
+_CALCULATE_BATCH = """(chains) => {
+    const calculate = window.game.engine.calculateSpell;
+    return chains.map(chain => {
+        const spell = calculate(chain);
+        return [spell.name, spell.cost, spell.time, spell.dmg, spell.heal, spell.description];
+    });
+}"""
+
+# 未知符文ID：calculateSpell 跳过它，但名称中保留原ID
+UNKNOWN_RUNE = 'unknown'
+
+
+def spell_row(spell):
+    """把 Spell 转为与页面结果相同的元组"""
+    return tuple(getattr(spell, name) for name in SPELL_FIELDS)
+
+
+def random_chains(count, rng=None, max_length=6, alphabet=None):
+    """
+    随机生成法术链，长度在 0..max_length 之间均匀分布
+    @param alphabet 可选的符文ID，默认为全部符文加一个未知ID
+    """
+    rng = rng or random.Random(0)
+    alphabet = list(alphabet) if alphabet is not None else [*RUNES, UNKNOWN_RUNE]
+    return [tuple(rng.choices(alphabet, k=rng.randint(0, max_length))) for _ in range(count)]
+
+
+def exhaustive_chains(max_length=4, alphabet=None):
+    """按长度生成所有法术链（包括空链和末尾只有修饰符的链）"""
+    alphabet = list(alphabet) if alphabet is not None else list(RUNES)
+    chains = []
+    for length in range(max_length + 1):
+        chains.extend(product(alphabet, repeat=length))
+    return chains
+
+
+async def page_spells(page, chains, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    在页面中批量计算法术
+    @returns 与 chains 一一对应的元组列表
+    """
+    rows = []
+    for start in range(0, len(chains), batch_size):
+        batch = [list(chain) for chain in chains[start:start + batch_size]]
+        rows.extend(tuple(row) for row in await page.evaluate(_CALCULATE_BATCH, batch))
+    return rows
+
+
+@dataclass
+class Mismatch:
+    chain: tuple
+    expected: tuple
+    actual: tuple
+
+
+@dataclass
+class DifferentialReport:
+    total: int
+    round_trips: int
+    mismatches: list = field(default_factory=list)
+    minimal: list = field(default_factory=list)
+
+    @property
+    def passed(self):
+        return not self.mismatches
+
+
+class _Evaluator:
+    """包装页面批量计算，统计往返次数"""
+
+    def __init__(self, page, batch_size):
+        self.page = page
+        self.batch_size = batch_size
+        self.round_trips = 0
+
+    async def __call__(self, chains):
+        if not chains:
+            return []
+        self.round_trips += -(-len(chains) // self.batch_size)
+        return await page_spells(self.page, chains, self.batch_size)
+
+
+def _disagreements(chains, rows, model):
+    mismatches = []
+    for chain, row in zip(chains, rows):
+        expected = spell_row(model(list(chain)))
+        if expected != row:
+            mismatches.append(Mismatch(chain, expected, row))
+    return mismatches
+
+
+def _deletions(chain):
+    return [chain[:index] + chain[index + 1:] for index in range(len(chain))]
+
+
+async def minimize(mismatches, evaluate, model=calculate_spell):
+    """
+    把不一致的链缩小到最小：每一轮对所有链尝试删除每一个符文，仍不一致的最短候选替换原链，
+    直到删除任何一个符文都会变得一致
+    @param evaluate 异步函数，输入链列表，返回页面结果列表
+    @returns 去重后按长度排序的 Mismatch 列表
+    """
+    current = {mismatch.chain: mismatch for mismatch in mismatches}
+    minimal = {}
+    while current:
+        chains = list(dict.fromkeys(candidate for chain in current for candidate in _deletions(chain)))
+        still = {mismatch.chain: mismatch for mismatch in _disagreements(chains, await evaluate(chains), model)}
+
+        reduced = {}
+        for chain, mismatch in current.items():
+            smaller = [candidate for candidate in _deletions(chain) if candidate in still]
+            if smaller:
+                best = min(smaller)
+                reduced[best] = still[best]
+            else:
+                minimal[chain] = mismatch
+        current = {chain: mismatch for chain, mismatch in reduced.items() if chain not in minimal}
+    return sorted(minimal.values(), key=lambda mismatch: (len(mismatch.chain), mismatch.chain))
+
+
+async def differential_test(page, chains, model=calculate_spell, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    比较 Python 模型与页面 calculateSpell 在一批法术链上的结果
+    @param model 接受符文ID列表、返回 Spell 的函数
+    @returns DifferentialReport
+    """
+    chains = [tuple(chain) for chain in chains]
+    evaluate = _Evaluator(page, batch_size)
+    mismatches = _disagreements(chains, await evaluate(chains), model)
+    minimal = await minimize(mismatches, evaluate, model) if mismatches else []
+    return DifferentialReport(len(chains), evaluate.round_trips, mismatches, minimal)
+
+
+def format_differential_report(report, limit=10):
+    """格式化差分测试结果"""
+    lines = [f"共 {report.total} 条法术链，{len(report.mismatches)} 条不一致，页面往返 {report.round_trips} 次"]
+    if report.minimal:
+        lines.append(f"最小不一致链 {len(report.minimal)} 条：")
+        for mismatch in report.minimal[:limit]:
+            lines.append(f"  {list(mismatch.chain)}")
+            lines.append(f"    Python: {mismatch.expected}")
+            lines.append(f"    页面:   {mismatch.actual}")
+        if len(report.minimal) > limit:
+            lines.append(f"  ……另有 {len(report.minimal) - limit} 条")
+    return '\n'.join(lines)
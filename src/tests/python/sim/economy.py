@@ -0,0 +1,348 @@
+"""
+成长与经济的精确计算，对应 BattleSystem.endBattle / checkLevelUp 和 engine.buyMaterial
+
+每场战斗随机遇到一个敌人（getRandomEnemy 等概率），胜利后获得固定的金币和经验，
+每种掉落素材独立按 dropRate 判定。战斗之间相互独立，成长过程是一条马尔可夫链：
+- 等级：状态为 (等级, 经验)，每场战斗后最多升一级，多余经验保留；
+  按 (等级, 经验) 的字典序逆序做动态规划得到期望场数，正向传播概率得到场数分布
+- 素材：每场战斗掉落某种素材的概率固定，n 场后的数量服从二项分布
+- 金币：只增不减（可选把掉落的素材按 0.8 倍价值卖出），首次买得起的场数是一个首达时间
+
+所有计算的缓存都以数据表中用到的那部分数值为键：修改素材掉落率不会使等级的结果失效，
+修改一个素材的价值只会重新计算它自己的购买时间。
+"""
+import argparse
+import sys
+from dataclasses import dataclass
+from functools import lru_cache
+from itertools import product
+
+import numpy as np
+
+from .data import ENEMIES, MATERIALS
+from .rewards import SLOT_LEVEL_INTERVAL, exp_needed
+
+# 金币以 0.1 为单位计算，购买价（1.5 倍）和出售价（0.8 倍）都是整数
+GOLD_UNIT = 10
+BUY_MULTIPLIER = 15
+SELL_MULTIPLIER = 8
+
+# 正向传播在剩余概率低于该值或超过最大场数时停止
+DEFAULT_TOLERANCE = 1e-12
+DEFAULT_MAX_BATTLES = 100_000
+
+# 符文选项解锁新档位的等级（offerRuneChoice）
+RUNE_TIER_LEVELS = (5, 10)
+
+
+@dataclass(frozen=True)
+class Outcome:
+    """一场战斗的一种结果：概率、经验、金币、掉落素材ID元组"""
+    probability: float
+    experience: int
+    gold: int
+    drops: tuple
+
+
+@dataclass
+class Passage:
+    """
+    首达时间
+    @param expected 期望场数（精确值）
+    @param pmf pmf[n] 为恰好在第 n 场达到的概率，尾部低于容差的部分被截断
+    """
+    expected: float
+    pmf: np.ndarray
+
+    def quantile(self, q):
+        """最小的 n 使得前 n 场内达到的概率不小于 q"""
+        return int(np.searchsorted(np.cumsum(self.pmf), q - 1e-12))
+
+
+def _enemy_table(enemies, materials):
+    """endBattle 用到的数值：(敌人ID, 金币, 经验, ((素材ID, 掉落率), ...))"""
+    rows = []
+    for enemy_id, enemy in enemies.items():
+        drops = tuple((material_id, materials[material_id]['dropRate'])
+                      for material_id in enemy.get('drops') or [] if material_id in materials)
+        rows.append((enemy_id, enemy.get('gold') or 10, enemy.get('experience') or 15, drops))
+    return tuple(rows)
+
+
+@lru_cache(maxsize=None)
+def _outcomes(table, win_rates):
+    outcomes = {}
+    win_rates = dict(win_rates)
+    for enemy_id, gold, experience, drops in table:
+        encounter = 1 / len(table)
+        win = win_rates.get(enemy_id, 1.0)
+        if win < 1:
+            key = (0, 0, ())
+            outcomes[key] = outcomes.get(key, 0) + encounter * (1 - win)
+        for hits in product((False, True), repeat=len(drops)):
+            probability = encounter * win
+            for hit, (_, rate) in zip(hits, drops):
+                probability *= rate if hit else 1 - rate
+            key = (experience, gold, tuple(material_id for hit, (material_id, _) in zip(hits, drops) if hit))
+            outcomes[key] = outcomes.get(key, 0) + probability
+    return tuple(Outcome(probability, *key) for key, probability in outcomes.items() if probability > 0)
+
+
+def battle_outcomes(enemies=ENEMIES, materials=MATERIALS, win_rates=None):
+    """
+    一场战斗的所有结果
+    @param win_rates 可选，{敌人ID: 胜率}，失败没有任何奖励；默认全部胜利
+    @returns Outcome 元组，概率之和为 1
+    """
+    return _outcomes(_enemy_table(enemies, materials), tuple(sorted((win_rates or {}).items())))
+
+
+def _win_key(win_rates):
+    return tuple(sorted((win_rates or {}).items()))
+
+
+@lru_cache(maxsize=None)
+def _fixed_gains(rows, win_rates):
+    """每个敌人的固定收益（经验或金币）按遇敌概率和胜率合并，失败收益为 0"""
+    totals = {}
+    win_rates = dict(win_rates)
+    for enemy_id, gain in rows:
+        win = win_rates.get(enemy_id, 1.0) / len(rows)
+        totals[gain] = totals.get(gain, 0) + win
+        if win < 1 / len(rows):
+            totals[0] = totals.get(0, 0) + 1 / len(rows) - win
+    return tuple(sorted(totals.items()))
+
+
+def _marginal(outcomes, value):
+    """按 value(outcome) 合并概率，返回 ((值, 概率), ...)"""
+    totals = {}
+    for outcome in outcomes:
+        key = value(outcome)
+        totals[key] = totals.get(key, 0) + outcome.probability
+    return tuple(sorted(totals.items()))
+
+
+def _propagate(step, state, tolerance, max_battles):
+    """正向传播概率，step 把未达到的概率分布推进一场并返回 (新分布, 本场达到的概率)"""
+    pmf = [0.0]
+    while state.sum() > tolerance and len(pmf) <= max_battles:
+        state, reached = step(state)
+        pmf.append(reached)
+    return np.array(pmf)
+
+
+@lru_cache(maxsize=None)
+def _level_passage(gains, start_level, start_exp, target, tolerance, max_battles):
+    stay = sum(probability for gain, probability in gains if gain == 0)
+    if stay >= 1:
+        raise ValueError("每场战斗都不获得经验，无法升级")
+    moving = [(gain, probability) for gain, probability in gains if gain > 0]
+    max_gain = max(gain for gain, _ in moving)
+    levels = range(start_level, target)
+    # 每个等级的经验上限：未升级前最多 needed - 1，加上一场的收益
+    sizes = {level: exp_needed(level) + max_gain for level in levels}
+    sizes[start_level] = max(sizes[start_level], start_exp + 1)
+
+    def advance(level, exp, gain):
+        exp += gain
+        needed = exp_needed(level)
+        return (level + 1, exp - needed) if exp >= needed else (level, exp)
+
+    # 期望：按 (等级, 经验) 逆序，每个状态只依赖字典序更大的状态
+    expected = {target: None}
+    for level in reversed(levels):
+        values = np.zeros(sizes[level])
+        for exp in range(sizes[level] - 1, -1, -1):
+            total = 1.0
+            for gain, probability in moving:
+                next_level, next_exp = advance(level, exp, gain)
+                if next_level < target:
+                    total += probability * (values[next_exp] if next_level == level else expected[next_level][next_exp])
+            values[exp] = total / (1 - stay)
+        expected[level] = values
+
+    def step(state):
+        result = _State({level: np.zeros(size) for level, size in sizes.items()})
+        reached = 0.0
+        for level, probabilities in state.items():
+            result[level] += probabilities * stay
+            needed = exp_needed(level)
+            for gain, probability in moving:
+                shifted = probabilities * probability
+                # 经验 < needed - gain 的状态留在本级，其余升一级
+                keep = max(0, min(len(shifted), needed - gain))
+                result[level][gain:gain + keep] += shifted[:keep]
+                carried = shifted[keep:]
+                if not len(carried):
+                    continue
+                if level + 1 >= target:
+                    reached += carried.sum()
+                else:
+                    start = keep + gain - needed
+                    result[level + 1][start:start + len(carried)] += carried
+        return result, reached
+
+    initial = _State({level: np.zeros(size) for level, size in sizes.items()})
+    initial[start_level][start_exp] = 1.0
+    return Passage(float(expected[start_level][start_exp]), _propagate(step, initial, tolerance, max_battles))
+
+
+class _State(dict):
+    """按等级保存经验分布的字典，sum() 为总概率"""
+
+    def sum(self):
+        return sum(float(probabilities.sum()) for probabilities in self.values())
+
+
+def battles_to_level(target, start_level=1, start_exp=0, enemies=ENEMIES, win_rates=None,
+                     tolerance=DEFAULT_TOLERANCE, max_battles=DEFAULT_MAX_BATTLES):
+    """
+    从 (start_level, start_exp) 升到 target 级需要的战斗场数
+    @param win_rates 可选，{敌人ID: 胜率}
+    @returns Passage
+    """
+    if target <= start_level:
+        return Passage(0.0, np.array([1.0]))
+    rows = tuple((enemy_id, enemy.get('experience') or 15) for enemy_id, enemy in enemies.items())
+    gains = _fixed_gains(rows, _win_key(win_rates))
+    return _level_passage(gains, start_level, start_exp, target, tolerance, max_battles)
+
+
+@lru_cache(maxsize=None)
+def _gold_passage(gains, threshold, tolerance, max_battles):
+    stay = sum(probability for gain, probability in gains if gain == 0)
+    if stay >= 1:
+        raise ValueError("每场战斗都不获得金币，无法买得起")
+    moving = [(gain, probability) for gain, probability in gains if gain > 0]
+
+    expected = np.zeros(threshold + max(gain for gain, _ in moving))
+    for gold in range(threshold - 1, -1, -1):
+        expected[gold] = (1 + sum(probability * expected[gold + gain] for gain, probability in moving)) / (1 - stay)
+
+    def step(state):
+        result = state * stay
+        reached = 0.0
+        for gain, probability in moving:
+            result[gain:] += state[:threshold - gain] * probability if gain < threshold else 0
+            reached += state[max(0, threshold - gain):].sum() * probability
+        return result, reached
+
+    initial = np.zeros(threshold)
+    initial[0] = 1.0
+    return Passage(float(expected[0]), _propagate(step, initial, tolerance, max_battles))
+
+
+def battles_to_afford(material_id, gold=0, sell_drops=False, enemies=ENEMIES, materials=MATERIALS, win_rates=None,
+                      tolerance=DEFAULT_TOLERANCE, max_battles=DEFAULT_MAX_BATTLES):
+    """
+    从 gold 金币开始，买得起一个素材（价值的 1.5 倍）需要的战斗场数
+    @param sell_drops 是否把每场掉落的素材立即按 0.8 倍价值卖出；不卖时结果与掉落率无关
+    @returns Passage
+    """
+    missing = materials[material_id]['value'] * BUY_MULTIPLIER - round(gold * GOLD_UNIT)
+    if missing <= 0:
+        return Passage(0.0, np.array([1.0]))
+
+    if sell_drops:
+        def income(outcome):
+            return outcome.gold * GOLD_UNIT + sum(materials[drop]['value'] * SELL_MULTIPLIER for drop in outcome.drops)
+
+        gains = _marginal(battle_outcomes(enemies, materials, win_rates), income)
+    else:
+        rows = tuple((enemy_id, (enemy.get('gold') or 10) * GOLD_UNIT) for enemy_id, enemy in enemies.items())
+        gains = _fixed_gains(rows, _win_key(win_rates))
+    return _gold_passage(gains, missing, tolerance, max_battles)
+
+
+def drop_probability(material_id, enemies=ENEMIES, materials=MATERIALS, win_rates=None):
+    """一场战斗掉落该素材的概率"""
+    win_rates = win_rates or {}
+    rate = materials[material_id]['dropRate']
+    return sum(win_rates.get(enemy_id, 1.0) * rate for enemy_id, enemy in enemies.items()
+               if material_id in (enemy.get('drops') or [])) / len(enemies)
+
+
+@lru_cache(maxsize=None)
+def _binomial_mixture(probability, battles):
+    mixture = np.zeros(len(battles))
+    counts = np.array([1.0])
+    for weight in battles:
+        mixture[:len(counts)] += weight * counts
+        counts = np.append(counts * (1 - probability), 0) + np.append(0, counts * probability)
+    return np.trim_zeros(mixture, 'b')
+
+
+def material_counts(material_id, battles, enemies=ENEMIES, materials=MATERIALS, win_rates=None):
+    """
+    素材数量的分布（不买卖）
+    @param battles 战斗场数，或场数分布（如 battles_to_level(...).pmf）
+    @returns pmf[k] 为拥有 k 个的概率
+    """
+    if np.isscalar(battles):
+        distribution = np.zeros(int(battles) + 1)
+        distribution[-1] = 1.0
+    else:
+        distribution = np.asarray(battles, dtype=float)
+    probability = drop_probability(material_id, enemies, materials, win_rates)
+    return _binomial_mixture(probability, tuple(distribution.tolist()))
+
+
+def clear_caches():
+    """清空所有缓存"""
+    for cached in (_outcomes, _fixed_gains, _level_passage, _gold_passage, _binomial_mixture):
+        cached.cache_clear()
+
+
+def format_economy_report(max_level=10, enemies=ENEMIES, materials=MATERIALS, win_rates=None):
+    """格式化成长与经济报告"""
+    tables = dict(enemies=enemies, win_rates=win_rates)
+    lines = ["升级（从 1 级开始）:"]
+    for level in range(2, max_level + 1):
+        passage = battles_to_level(level, **tables)
+        notes = []
+        if level % SLOT_LEVEL_INTERVAL == 0:
+            notes.append("解锁法术槽")
+        if level in RUNE_TIER_LEVELS:
+            notes.append("新符文档位")
+        note = f"  [{', '.join(notes)}]" if notes else ''
+        lines.append(f"  {level} 级: 期望 {passage.expected:.2f} 场, 中位数 {passage.quantile(0.5)}, "
+                     f"90% {passage.quantile(0.9)}{note}")
+
+    level_pmf = battles_to_level(max_level, **tables).pmf
+    lines.append(f"\n升到 {max_level} 级时的素材数量:")
+    for material_id, material in materials.items():
+        counts = material_counts(material_id, level_pmf, materials=materials, **tables)
+        mean = float(np.arange(len(counts)) @ counts)
+        lines.append(f"  {material['name']}: 期望 {mean:.2f} 个, 一个都没有的概率 {counts[0]:.2%}")
+
+    lines.append("\n买得起一个素材（从 0 金币开始）:")
+    for material_id, material in materials.items():
+        keep = battles_to_afford(material_id, materials=materials, **tables)
+        sell = battles_to_afford(material_id, sell_drops=True, materials=materials, **tables)
+        price = material['value'] * BUY_MULTIPLIER / GOLD_UNIT
+        lines.append(f"  {material['name']} ({price:g} 金币): 期望 {keep.expected:.2f} 场, "
+                     f"卖掉掉落时 {sell.expected:.2f} 场")
+    return '\n'.join(lines)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='精确计算升级速度、素材数量和买得起商店素材的场数')
+    parser.add_argument('--max-level', type=int, default=10, help='报告到该等级为止')
+    parser.add_argument('--win-rate', action='append', default=[], metavar='ENEMY=RATE',
+                        help='某个敌人的胜率，可重复，默认全部胜利')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    win_rates = {}
+    for item in args.win_rate:
+        enemy_id, rate = item.split('=')
+        win_rates[enemy_id] = float(rate)
+    print(format_economy_report(args.max_level, win_rates=win_rates))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,360 @@
+"""
+战斗阶段状态机的状态空间探索，对应 battleSystem.ts 的 updateBattle
+
+把一场战斗抽象为离散状态：阶段 × 行动者 × playerStatus × enemyStatus × 双方ATB是否充满
+× 眩晕计时是否未结束 × 吟唱中的法术 × 剩余MP × endBattle 的调用结果。
+连续量只保留影响分支的部分：
+- ATB 和眩晕计时只记录"是否已满 / 是否结束"，时间流逝表示为"某个计时先到点"的事件，
+  所有先后顺序都会被探索（包括后台标签页恢复时一帧内多个计时同时到点的情况）
+- HP 不记录，每次伤害都分成"致命"和"不致命"两个分支
+- MP 精确记录（战斗中只减不增），低于最便宜法术时统一记为 0
+- 法术按 (消耗, 伤害/治疗/无效果) 合并，敌人行动按 (吟唱 / 是否达到打断阈值) 合并
+从初始状态广度优先遍历，按规范化后的状态去重，得到每个状态的最短输入序列，
+并报告不可达的控制状态、没有出口的状态和无法再结束战斗的状态（软锁）；撤退不算出口。
+敌人和法术抽象后相同的探索结果会被缓存，全部符文和全部敌人通常只需要探索几次。
+"""
+import argparse
+import sys
+from collections import deque
+from dataclasses import dataclass, field
+from functools import lru_cache
+from itertools import product
+from typing import NamedTuple
+
+from .ai import basic_attack
+from .battle import DEFAULT_RULES, default_player
+from .calculator import cached_spell
+from .catalogue import distinct_spells
+from .data import ENEMIES
+
+PHASES = ('preparation', 'action', 'resolution')
+PLAYER_STATUSES = ('preparing', 'channeling', 'stunned')
+ENEMY_STATUSES = ('preparing', 'channeling')
+
+# 默认探索的法术链最大长度
+DEFAULT_MAX_LENGTH = 4
+
+# 战斗结束：endBattle 的调用结果依次记录，('victory', 'defeat') 表示同一帧内先胜后败
+VICTORY = 'victory'
+DEFEAT = 'defeat'
+
+
+class State(NamedTuple):
+    phase: str
+    actor: str | None
+    player_status: str
+    enemy_status: str
+    player_ready: bool
+    enemy_ready: bool
+    # stunTimer > 0
+    stunned: bool
+    # 吟唱中的法术类别下标
+    spell: int | None
+    mp: int
+    outcome: tuple = ()
+
+    @property
+    def control(self):
+        """控制状态：阶段、行动者、双方状态和眩晕，用于统计不可达状态"""
+        return (self.phase, self.actor, self.player_status, self.enemy_status, self.stunned)
+
+
+@dataclass(frozen=True)
+class SpellClass:
+    """消耗和效果相同的法术，name 为其中一个代表法术的名称"""
+    cost: int
+    effect: str
+    name: str
+
+
+@dataclass(frozen=True)
+class EnemyMove:
+    """敌人行动类别，skill 为代表技能的ID"""
+    channel: bool
+    interrupts: bool
+    skill: str
+
+
+def spell_classes(chains):
+    """
+    把法术链按 (消耗, 效果) 合并
+    @returns SpellClass 元组，按消耗排序
+    """
+    classes = {}
+    for chain in chains:
+        spell = cached_spell(tuple(chain))
+        effect = 'dmg' if spell.dmg > 0 else 'heal' if spell.heal > 0 else 'none'
+        classes.setdefault((spell.cost, effect), SpellClass(spell.cost, effect, spell.name))
+    return tuple(sorted(classes.values(), key=lambda spell: (spell.cost, spell.effect)))
+
+
+def enemy_moves(enemy, rules=DEFAULT_RULES):
+    """
+    敌人可能的行动类别
+    冷却和HP条件不做区分，任何技能都可能被选中；有技能时也可能全部不可用而使用普通攻击
+    """
+    moves = {}
+    for skill in [basic_attack(enemy), *(enemy.get('skills') or [])]:
+        channel = skill['channelTime'] > 0
+        interrupts = not channel and skill['damage'] >= rules.focus_value
+        moves.setdefault((channel, interrupts), EnemyMove(channel, interrupts, skill['id']))
+    return tuple(moves.values())
+
+
+def control_states():
+    """所有控制状态：只有行动阶段有行动者"""
+    actors = [('preparation', None), ('action', 'player'), ('action', 'enemy'), ('resolution', None)]
+    return [(phase, actor, player_status, enemy_status, stunned)
+            for (phase, actor), player_status, enemy_status, stunned
+            in product(actors, PLAYER_STATUSES, ENEMY_STATUSES, (False, True))]
+
+
+_ENDED = State('preparation', None, 'preparing', 'preparing', False, False, False, None, 0)
+
+
+class PhaseMachine:
+    """
+    抽象战斗规则
+    @param spells SpellClass 元组
+    @param moves EnemyMove 元组
+    """
+
+    def __init__(self, spells, moves, mp):
+        self.spells = spells
+        self.moves = moves
+        self.mp = mp
+        self.min_cost = min((spell.cost for spell in spells), default=0)
+
+    def initial(self):
+        return self.canonical(State('preparation', None, 'preparing', 'preparing', False, False, False, None, self.mp))
+
+    def canonical(self, state):
+        """规范化：战斗结束的状态只保留结果，准备阶段先做 ATB 检查，MP 低于最便宜法术时记为 0"""
+        if state.outcome:
+            return _ENDED._replace(outcome=state.outcome)
+        if state.mp < self.min_cost:
+            state = state._replace(mp=0)
+        if state.phase == 'preparation':
+            if state.player_ready and state.player_status in ('preparing', 'stunned'):
+                state = state._replace(phase='action', actor='player')
+            elif state.enemy_ready and state.enemy_status == 'preparing':
+                state = state._replace(phase='action', actor='enemy')
+        return state
+
+    def successors(self, state):
+        """
+        一个状态的全部后继
+        @returns (输入, 状态) 列表；输入为 wait(事件)、cast(法术名)、enemy(技能ID) 或 resolve
+        """
+        if state.outcome:
+            return []
+        moves = []
+        if state.stunned:
+            moves.append(('wait(stun_end)', state._replace(stunned=False, player_status='preparing')))
+
+        if state.phase == 'preparation':
+            if state.player_status in ('preparing', 'stunned') and not state.player_ready:
+                moves.append(('wait(player_atb)', state._replace(player_ready=True)))
+            if state.enemy_status == 'preparing' and not state.enemy_ready:
+                moves.append(('wait(enemy_atb)', state._replace(enemy_ready=True)))
+            if state.player_status == 'channeling':
+                moves.append(('wait(cast_complete)', state._replace(phase='resolution')))
+        elif state.phase == 'action' and state.actor == 'player':
+            if state.player_status == 'preparing':
+                moves.extend(self._casts(state))
+        elif state.phase == 'action':
+            moves.extend(self._enemy_action(state))
+        else:
+            moves.extend(self._resolution(state))
+        return [(label, self.canonical(next_state)) for label, next_state in moves]
+
+    def _casts(self, state):
+        """法术按钮可点击（MP足够且正在准备）时的 startCast"""
+        for index, spell in enumerate(self.spells):
+            if state.mp >= spell.cost:
+                yield f'cast({spell.name})', state._replace(
+                    phase='preparation', actor=None, player_status='channeling', player_ready=False,
+                    spell=index, mp=state.mp - spell.cost)
+
+    def _enemy_action(self, state):
+        """对应 enemyAction"""
+        after = state._replace(phase='preparation', actor=None)
+        for move in self.moves:
+            if move.channel:
+                yield f'enemy({move.skill})', after._replace(enemy_status='channeling', enemy_ready=False)
+                continue
+            yield f'enemy({move.skill})+{DEFEAT}', state._replace(outcome=(DEFEAT,))
+            hit = after._replace(enemy_status='preparing', enemy_ready=False)
+            if state.player_status == 'channeling' and move.interrupts:
+                hit = hit._replace(player_status='stunned', stunned=True, spell=None)
+            yield f'enemy({move.skill})', hit
+
+    def _resolution(self, state):
+        """对应 updateResolutionPhase：finishCast 结束战斗后仍会执行 finishEnemyCast"""
+        branches = [state]
+        if state.player_status == 'channeling':
+            finished = state._replace(player_status='preparing', player_ready=False, spell=None)
+            if self.spells[state.spell].effect == 'dmg':
+                branches = [state._replace(outcome=(VICTORY,)), finished]
+            else:
+                branches = [finished]
+
+        if state.enemy_status == 'channeling':
+            branches = [next_state for branch in branches for next_state in (
+                branch._replace(outcome=branch.outcome + (DEFEAT,)),
+                branch._replace(enemy_status='preparing', enemy_ready=False),
+            )]
+
+        for branch in branches:
+            label = f"resolve+{'+'.join(branch.outcome)}" if branch.outcome else 'resolve'
+            yield label, branch._replace(phase='preparation', actor=None)
+
+
+@dataclass
+class Exploration:
+    """探索结果；parents 保存每个可达状态在 BFS 树中的父状态和输入"""
+    initial: State
+    parents: dict
+    edges: int
+    unreachable: list = field(default_factory=list)
+    dead_ends: list = field(default_factory=list)
+    soft_locks: list = field(default_factory=list)
+    double_ends: list = field(default_factory=list)
+
+    @property
+    def states(self):
+        return len(self.parents)
+
+    def path(self, state):
+        """到达 state 的最短输入序列"""
+        inputs = []
+        while state != self.initial:
+            state, label = self.parents[state]
+            inputs.append(label)
+        return inputs[::-1]
+
+
+def explore(machine):
+    """
+    从初始状态广度优先遍历抽象状态空间
+    @returns Exploration
+    """
+    initial = machine.initial()
+    parents = {initial: None}
+    successors = {}
+    queue = deque([initial])
+    edges = 0
+    while queue:
+        state = queue.popleft()
+        successors[state] = machine.successors(state)
+        for label, next_state in successors[state]:
+            edges += 1
+            if next_state not in parents:
+                parents[next_state] = (state, label)
+                queue.append(next_state)
+
+    # 反向遍历：能到达战斗结束的状态
+    predecessors = {state: [] for state in parents}
+    for state, moves in successors.items():
+        for _, next_state in moves:
+            predecessors[next_state].append(state)
+    finishing = {state for state in parents if state.outcome}
+    queue = deque(finishing)
+    while queue:
+        for previous in predecessors[queue.popleft()]:
+            if previous not in finishing:
+                finishing.add(previous)
+                queue.append(previous)
+
+    # parents 按 BFS 顺序插入，各列表因此按最短路径长度排序
+    reached = {state.control for state in parents if not state.outcome}
+    return Exploration(
+        initial=initial,
+        parents=parents,
+        edges=edges,
+        unreachable=[control for control in control_states() if control not in reached],
+        dead_ends=[state for state in parents if not state.outcome and not successors[state]],
+        soft_locks=[state for state in parents if state not in finishing],
+        double_ends=[state for state in parents if len(state.outcome) > 1],
+    )
+
+
+@lru_cache(maxsize=None)
+def _explore_cached(spells, moves, mp):
+    return explore(PhaseMachine(spells, moves, mp))
+
+
+def explore_battle(chains, enemy, mp=None, rules=DEFAULT_RULES):
+    """
+    探索一个法术配置对一个敌人的状态空间，抽象后相同的配置共享同一次探索
+    @param chains 法术链列表
+    @param mp 初始MP，默认为初始玩家的MP
+    """
+    mp = default_player()['mp'] if mp is None else mp
+    return _explore_cached(spell_classes(chains), enemy_moves(enemy, rules), mp)
+
+
+def explore_enemies(chains=None, max_length=DEFAULT_MAX_LENGTH, mp=None, enemies=ENEMIES, rules=DEFAULT_RULES):
+    """
+    对所有敌人探索
+    @param chains 法术链列表，默认为全部符文组成的、长度不超过 max_length 的所有不同法术
+    @returns {敌人ID: Exploration}
+    """
+    if chains is None:
+        chains = [entry.chain for entry in distinct_spells(max_length=max_length)]
+    return {enemy_id: explore_battle(chains, enemy, mp, rules) for enemy_id, enemy in enemies.items()}
+
+
+def describe(state):
+    """状态的简短描述"""
+    if state.outcome:
+        return f"结束 {'+'.join(state.outcome)}"
+    actor = f"/{state.actor}" if state.actor else ''
+    flags = ''.join(flag for flag, on in (
+        (' 玩家ATB满', state.player_ready), (' 敌人ATB满', state.enemy_ready), (' 眩晕计时中', state.stunned)) if on)
+    return f"{state.phase}{actor} 玩家:{state.player_status} 敌人:{state.enemy_status} MP:{state.mp}{flags}"
+
+
+def format_exploration(name, exploration, limit=5):
+    """格式化一次探索的报告"""
+    lines = [f"{name}: {exploration.states} 个状态, {exploration.edges} 条转移"]
+    if exploration.unreachable:
+        lines.append(f"  不可达的控制状态 {len(exploration.unreachable)} 个：")
+        for phase, actor, player_status, enemy_status, stunned in exploration.unreachable[:limit]:
+            actor = f"/{actor}" if actor else ''
+            lines.append(f"    {phase}{actor} 玩家:{player_status} 敌人:{enemy_status}{' 眩晕' if stunned else ''}")
+        if len(exploration.unreachable) > limit:
+            lines.append(f"    ……另有 {len(exploration.unreachable) - limit} 个")
+    for title, states in (('没有出口的状态', exploration.dead_ends), ('软锁（无法再结束战斗）', exploration.soft_locks),
+                          ('先胜后败', exploration.double_ends)):
+        if not states:
+            continue
+        lines.append(f"  {title} {len(states)} 个，最短路径：")
+        for state in states[:limit]:
+            path = exploration.path(state)
+            lines.append(f"    {describe(state)}  ({len(path)} 步)")
+            lines.append(f"      {' → '.join(path)}")
+        if len(states) > limit:
+            lines.append(f"    ……另有 {len(states) - limit} 个")
+    return '\n'.join(lines)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='探索战斗阶段状态机，报告不可达状态和软锁')
+    parser.add_argument('--max-length', type=int, default=DEFAULT_MAX_LENGTH, help='法术链最大长度')
+    parser.add_argument('--mp', type=int, default=None, help='初始MP，默认为初始玩家的MP')
+    parser.add_argument('--limit', type=int, default=5, help='每类最多列出的状态数')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    explorations = explore_enemies(max_length=args.max_length, mp=args.mp)
+    for enemy_id, exploration in explorations.items():
+        print(format_exploration(enemy_id, exploration, args.limit))
+    locked = any(exploration.soft_locks or exploration.double_ends for exploration in explorations.values())
+    return 1 if locked else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,254 @@
+"""
+向量化蒙特卡洛采样
+
+用 NumPy 批量复现游戏中的随机抽取：
+- 敌人选择：data/index.ts getRandomEnemy / BattleSystem.getRandomEnemy
+- 素材掉落：BattleSystem.endBattle 中的 `Math.random() < dropRate`
+- 技能选择：AISystem.weightedRandomSelection
+
+每种抽取与 JS 的浮点运算一致，同一个均匀随机数得到同一个结果。
+"""
+import math
+from dataclasses import dataclass
+
+import numpy as np
+
+from .ai import AISystem, basic_attack, skill_weight
+from .data import ENEMIES, MATERIALS
+
+# 95% 置信区间对应的正态分位数
+Z_95 = 1.959963984540054
+
+# 卡方检验的显著性水平
+DEFAULT_ALPHA = 0.01
+
+# 单次生成的样本数上限，控制内存占用
+DEFAULT_CHUNK = 1_000_000
+
+
+def _chi2_sf(statistic, dof):
+    """卡方分布的生存函数，即正则化上不完全伽马函数 Q(dof/2, statistic/2)"""
+    if math.isinf(statistic):
+        return 0.0
+    if statistic <= 0:
+        return 1.0
+    a = dof / 2
+    x = statistic / 2
+    log_prefix = a * math.log(x) - x - math.lgamma(a)
+
+    if x < a + 1:
+        # 级数展开求 P(a, x)
+        term = total = 1 / a
+        n = a
+        while abs(term) > abs(total) * 1e-15:
+            n += 1
+            term *= x / n
+            total += term
+        return max(0.0, 1 - total * math.exp(log_prefix))
+
+    # 连分式（Lentz 方法）求 Q(a, x)
+    tiny = 1e-300
+    b = x + 1 - a
+    c = 1 / tiny
+    d = 1 / b
+    h = d
+    for i in range(1, 1000):
+        an = -i * (i - a)
+        b += 2
+        d = an * d + b
+        d = tiny if abs(d) < tiny else d
+        c = b + an / c
+        c = tiny if abs(c) < tiny else c
+        d = 1 / d
+        delta = d * c
+        h *= delta
+        if abs(delta - 1) < 1e-15:
+            break
+    return math.exp(log_prefix) * h
+
+
+@dataclass
+class ChiSquare:
+    """拟合优度卡方检验结果"""
+    statistic: float
+    dof: int
+    p_value: float
+    alpha: float = DEFAULT_ALPHA
+
+    @property
+    def passed(self):
+        """观测分布与理论分布没有显著差异"""
+        return self.p_value >= self.alpha
+
+
+@dataclass
+class Distribution:
+    """抽样频数与理论概率"""
+    labels: list
+    counts: np.ndarray
+    expected: np.ndarray
+
+    @property
+    def samples(self):
+        return int(self.counts.sum())
+
+    @property
+    def frequencies(self):
+        return self.counts / self.samples
+
+    def confidence_intervals(self, z=Z_95):
+        """
+        各类别频率的 Wilson 置信区间
+        @returns (下界数组, 上界数组)
+        """
+        n = self.samples
+        p = self.frequencies
+        denominator = 1 + z * z / n
+        center = (p + z * z / (2 * n)) / denominator
+        margin = z * np.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denominator
+        return center - margin, center + margin
+
+    def chi_square(self, alpha=DEFAULT_ALPHA):
+        """理论概率为 0 的类别不参与自由度计算，出现观测值时直接判定不符合"""
+        possible = self.expected > 0
+        if self.counts[~possible].any():
+            return ChiSquare(math.inf, 0, 0.0, alpha)
+
+        dof = int(possible.sum()) - 1
+        if dof < 1:
+            return ChiSquare(0.0, 0, 1.0, alpha)
+
+        expected_counts = self.expected[possible] * self.samples
+        statistic = float((((self.counts[possible] - expected_counts) ** 2) / expected_counts).sum())
+        return ChiSquare(statistic, dof, _chi2_sf(statistic, dof), alpha)
+
+    def summary(self, names=None, alpha=DEFAULT_ALPHA):
+        """
+        格式化输出频率、置信区间和检验结论
+        @param names 可选，标签到显示名称的映射
+        """
+        names = names or {}
+        low, high = self.confidence_intervals()
+        lines = [f"样本数: {self.samples}"]
+        for index, label in enumerate(self.labels):
+            lines.append(
+                f"{names.get(label, label)}: {self.counts[index]}次 "
+                f"({self.frequencies[index]:.2%}, 95%区间 {low[index]:.2%}-{high[index]:.2%}, "
+                f"理论 {self.expected[index]:.2%})"
+            )
+        result = self.chi_square(alpha)
+        lines.append(
+            f"卡方检验: χ²={result.statistic:.2f}, 自由度={result.dof}, p={result.p_value:.4f}, "
+            f"结论: {'符合' if result.passed else '不符合'}"
+        )
+        return '\n'.join(lines)
+
+
+def _chunks(samples, chunk):
+    while samples > 0:
+        size = min(samples, chunk)
+        yield size
+        samples -= size
+
+
+def enemy_index(uniform, count):
+    """`Math.floor(Math.random() * enemyIds.length)`，uniform 可以是数组"""
+    return np.floor(np.asarray(uniform) * count).astype(np.intp)
+
+
+def sample_enemies(samples, rng, enemies=ENEMIES):
+    """
+    抽取随机敌人
+    @returns 敌人在 ENEMIES 键顺序中的下标数组
+    """
+    return enemy_index(rng.random(samples), len(enemies))
+
+
+def enemy_distribution(samples, rng, enemies=ENEMIES, chunk=DEFAULT_CHUNK):
+    """随机敌人的分布，理论上均匀"""
+    count = len(enemies)
+    counts = np.zeros(count, dtype=np.int64)
+    for size in _chunks(samples, chunk):
+        counts += np.bincount(sample_enemies(size, rng, enemies), minlength=count)
+    return Distribution(list(enemies), counts, np.full(count, 1 / count))
+
+
+def drop_rates(enemy, materials=MATERIALS):
+    """
+    按 endBattle 的判定顺序列出掉落素材
+    @returns (素材ID列表, 掉落率数组)，不存在的素材不消耗随机数，已被跳过
+    """
+    material_ids = [material_id for material_id in enemy.get('drops') or [] if material_id in materials]
+    return material_ids, np.array([materials[material_id]['dropRate'] for material_id in material_ids])
+
+
+def sample_drops(enemy, samples, rng, materials=MATERIALS):
+    """
+    抽取一场胜利的掉落
+    @returns (素材ID列表, 形状为 (samples, 素材数) 的布尔数组)
+    """
+    material_ids, rates = drop_rates(enemy, materials)
+    return material_ids, rng.random((samples, len(material_ids))) < rates
+
+
+def drop_distribution(enemy, samples, rng, materials=MATERIALS, chunk=DEFAULT_CHUNK):
+    """
+    掉落组合的联合分布，同时检验各素材的掉落率和相互独立
+    标签为掉落素材ID的元组，空元组表示没有掉落
+    """
+    material_ids, rates = drop_rates(enemy, materials)
+    bits = 1 << np.arange(len(material_ids))
+    combos = 1 << len(material_ids)
+    counts = np.zeros(combos, dtype=np.int64)
+    for size in _chunks(samples, chunk):
+        dropped = rng.random((size, len(material_ids))) < rates
+        counts += np.bincount(dropped @ bits, minlength=combos)
+
+    labels = []
+    expected = np.ones(combos)
+    for combo in range(combos):
+        mask = (combo & bits).astype(bool)
+        labels.append(tuple(material_id for material_id, hit in zip(material_ids, mask) if hit))
+        expected[combo] = np.prod(np.where(mask, rates, 1 - rates))
+    return Distribution(labels, counts, expected)
+
+
+def skill_index(uniform, weights):
+    """
+    weightedRandomSelection：按顺序依次减去权重，第一个使余量 <= 0 的技能被选中，
+    浮点误差导致没有选中时回退到第一个技能
+    """
+    total = 0
+    for weight in weights:
+        total += weight
+    remaining = np.asarray(uniform) * total
+    chosen = np.full(remaining.shape, -1, dtype=np.intp)
+    for index, weight in enumerate(weights):
+        remaining = remaining - weight
+        chosen[(chosen < 0) & (remaining <= 0)] = index
+    chosen[chosen < 0] = 0
+    return chosen
+
+
+def skill_weights(enemy):
+    """
+    敌人满血、无冷却时的可用技能及权重
+    @returns (技能列表, 权重列表)，没有可用技能时为普通攻击
+    """
+    if not enemy.get('skills'):
+        return [basic_attack(enemy)], [1]
+    strategy = enemy.get('aiStrategy') or {'type': 'balanced', 'skillWeights': {}}
+    available = AISystem.available_skills(enemy, {'skillCooldowns': {}})
+    if not available:
+        return [basic_attack(enemy)], [1]
+    return available, [skill_weight(skill, strategy['skillWeights']) for skill in available]
+
+
+def skill_distribution(enemy, samples, rng, chunk=DEFAULT_CHUNK):
+    """敌人技能选择的分布，理论概率与权重成正比"""
+    skills, weights = skill_weights(enemy)
+    counts = np.zeros(len(skills), dtype=np.int64)
+    for size in _chunks(samples, chunk):
+        counts += np.bincount(skill_index(rng.random(size), weights), minlength=len(skills))
+    expected = np.array(weights, dtype=float)
+    return Distribution([skill['id'] for skill in skills], counts, expected / expected.sum())
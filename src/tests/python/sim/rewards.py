@@ -0,0 +1,156 @@
+"""
+战斗奖励与升级，对应 BattleSystem.endBattle / checkLevelUp / offerRuneChoice
+
+随机数的消耗顺序与游戏一致（掉落判定 -> 符文洗牌），
+符文洗牌复现 V8 对 `sort(() => 0.5 - Math.random())` 的调用次数和结果。
+"""
+import math
+
+from .data import MATERIALS
+
+# 各等级可选的符文
+BASIC_RUNES = ['iceShard', 'quick', 'double']
+INTERMEDIATE_RUNES = ['power', 'haste', 'regen']
+ADVANCED_RUNES = ['mastery', 'arcane', 'lifeSteal']
+
+# 每次升级的属性提升
+HP_PER_LEVEL = 20
+MP_PER_LEVEL = 10
+SPEED_PER_LEVEL = 1
+
+# 每3级解锁一个法术槽位
+SLOT_LEVEL_INTERVAL = 3
+
+
+def exp_needed(level):
+    """升级所需经验：floor(100 * level ^ 1.2)"""
+    return math.floor(100 * math.pow(level, 1.2))
+
+
+def _count_and_make_run(items, low, high, compare):
+    """V8 TimSort 的 CountAndMakeRun"""
+    if low + 1 == high:
+        return 1
+    run_length = 2
+    descending = compare(items[low + 1], items[low]) < 0
+    previous = items[low + 1]
+    for index in range(low + 2, high):
+        order = compare(items[index], previous)
+        if descending:
+            if order >= 0:
+                break
+        elif order < 0:
+            break
+        previous = items[index]
+        run_length += 1
+    if descending:
+        items[low:low + run_length] = items[low:low + run_length][::-1]
+    return run_length
+
+
+def _binary_insertion_sort(items, low, start, high, compare):
+    """V8 TimSort 的 BinaryInsertionSort"""
+    if low == start:
+        start += 1
+    for start in range(start, high):
+        pivot = items[start]
+        left, right = low, start
+        while left < right:
+            mid = left + ((right - left) >> 1)
+            if compare(pivot, items[mid]) < 0:
+                right = mid
+            else:
+                left = mid + 1
+        items[left + 1:start + 1] = items[left:start]
+        items[left] = pivot
+
+
+def v8_sort(items, compare):
+    """
+    复现 V8 Array.prototype.sort 对短数组（少于64个元素）的行为，原地排序
+    比较函数的调用顺序与 V8 一致，因此随机比较函数消耗的随机数也一致
+    """
+    length = len(items)
+    if length < 2:
+        return items
+    if length >= 64:
+        raise ValueError("只支持少于64个元素的数组")
+    run_length = _count_and_make_run(items, 0, length, compare)
+    if run_length < length:
+        _binary_insertion_sort(items, 0, run_length, length, compare)
+    return items
+
+
+def random_sort(items, rng):
+    """对应 `items.sort(() => 0.5 - Math.random())`"""
+    return v8_sort(items, lambda a, b: 0.5 - rng.random())
+
+
+def offer_rune_choice(player, rng):
+    """
+    按等级生成符文选项
+    @returns 最多3个符文ID，没有新符文时返回空列表
+    """
+    level = player['level']
+    available = []
+    if level >= 1:
+        available += BASIC_RUNES
+    if level >= 5:
+        available += INTERMEDIATE_RUNES
+    if level >= 10:
+        available += ADVANCED_RUNES
+
+    new_runes = [rune_id for rune_id in available if rune_id not in player['unlockedRunes']]
+    if not new_runes:
+        return []
+    return random_sort(new_runes, rng)[:3]
+
+
+def check_level_up(player, rng):
+    """
+    检查升级（每次最多升一级）
+    @returns 升级时返回符文选项列表，否则返回 None
+    """
+    needed = exp_needed(player['level'])
+    if player['experience'] < needed:
+        return None
+
+    player['level'] += 1
+    player['experience'] -= needed
+    player['maxHp'] += HP_PER_LEVEL
+    player['maxMp'] += MP_PER_LEVEL
+    player['speed'] += SPEED_PER_LEVEL
+    player['hp'] = player['maxHp']
+    player['mp'] = player['maxMp']
+
+    if player['level'] % SLOT_LEVEL_INTERVAL == 0:
+        player['spells'].append([])
+
+    return offer_rune_choice(player, rng)
+
+
+def grant_rewards(player, enemy, rng, materials=MATERIALS):
+    """
+    发放胜利奖励
+    @returns {'gold', 'experience', 'drops', 'leveledUp', 'runeChoices'}
+    """
+    gold = enemy.get('gold') or 10
+    experience = enemy.get('experience') or 15
+    player['gold'] += gold
+    player['experience'] += experience
+
+    drops = []
+    for material_id in enemy.get('drops') or []:
+        material = materials.get(material_id)
+        if material and rng.random() < material['dropRate']:
+            player['materials'][material_id] = player['materials'].get(material_id, 0) + 1
+            drops.append(material_id)
+
+    rune_choices = check_level_up(player, rng)
+    return {
+        'gold': gold,
+        'experience': experience,
+        'drops': drops,
+        'leveledUp': rune_choices is not None,
+        'runeChoices': rune_choices or [],
+    }
@@ -0,0 +1,340 @@
+"""
+难度预设自动调参
+
+在 config/game.ts 的 difficultyPresets 参数空间中搜索，使每个预设在所有敌人和参考法术配置下的
+胜率、平均战斗时长接近目标值。候选参数在进程池中用无浏览器战斗模拟评估：
+- 第一轮在整个空间做拉丁超立方采样（并包含当前预设值），之后每轮在当前最优值附近按逐轮收缩的半径采样
+- 所有候选使用相同的随机种子（共同随机数），候选之间的差异只来自参数本身
+- ATB 增长速度只取决于 baseSpeed × speedMultiplier，因此 speedMultiplier 保持预设值，只搜索 baseSpeed
+游戏目前没有读取 config/game.ts（战斗参数写死在 atb.ts / battleSystem.ts 中），
+参数通过 Rules.from_config 映射到模拟器，调好的值需要在接入配置后才会影响游戏。
+
+用法:
+    python -m sim.tuning                          # 调整所有预设
+    python -m sim.tuning --preset hard -j 8 --json tuning.json
+"""
+import argparse
+import copy
+import json
+import multiprocessing
+import random
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+
+import numpy as np
+
+from .battle import DEFAULT_MAX_TIME, DEFAULT_TICK_MS, Battle, Rules, default_player, first_available
+from .data import ENEMIES, load_game_config
+
+# 每个 敌人 x 法术配置 模拟的战斗场数
+DEFAULT_BATTLES = 40
+
+DEFAULT_ROUNDS = 6
+
+# 每轮评估的候选数
+DEFAULT_POPULATION = 24
+
+# 第二轮的采样半径（占参数范围的比例）和每轮的收缩系数
+INITIAL_RADIUS = 0.25
+RADIUS_SHRINK = 0.6
+
+# 损失函数中战斗时长相对误差的权重（胜率误差的权重为 1）
+DEFAULT_TIME_WEIGHT = 0.25
+
+
+@dataclass(frozen=True)
+class Parameter:
+    """一个可调参数：GameConfig 中的路径、搜索范围和提议值保留的小数位"""
+    path: tuple
+    low: float
+    high: float
+    digits: int = 2
+
+    @property
+    def name(self):
+        return '.'.join(self.path)
+
+
+PARAMETERS = (
+    Parameter(('atb', 'baseSpeed'), 40, 400, 0),
+    Parameter(('cast', 'baseTime'), 0.5, 2.0, 2),
+    Parameter(('battle', 'interruptThreshold'), 3, 40, 0),
+    Parameter(('battle', 'stunDuration'), 0.25, 3.0, 2),
+)
+
+
+@dataclass(frozen=True)
+class Target:
+    """win_rate: 胜率；battle_time: 平均战斗时长（秒，游戏时间），停住的战斗按停住时的时长计"""
+    win_rate: float
+    battle_time: float
+
+
+TARGETS = {
+    'easy': Target(0.95, 15.0),
+    'normal': Target(0.8, 20.0),
+    'hard': Target(0.6, 25.0),
+}
+
+# 参考法术配置：初始卡槽、单发强化火球、快速冰锥
+REFERENCE_LOADOUTS = {
+    'starter': (('firebolt',), ('amp', 'firebolt'), ('heal',)),
+    'burst': (('amp', 'amp', 'firebolt'), ('heal',)),
+    'quick': (('quick', 'iceShard'), ('iceShard',), ('heal',)),
+}
+
+
+@dataclass
+class CellStats:
+    """一个 敌人 x 法术配置 的模拟结果；stalls 为 MP 耗尽、玩家无法行动而停住的战斗"""
+    enemy_id: str
+    loadout: str
+    battles: int
+    wins: int
+    stalls: int
+    mean_time: float
+
+    @property
+    def win_rate(self):
+        return self.wins / self.battles if self.battles else 0.0
+
+
+@dataclass
+class Candidate:
+    values: tuple
+    cells: list
+    loss: float
+
+
+@dataclass
+class TuningResult:
+    preset: str
+    target: Target
+    config: dict
+    baseline: Candidate
+    best: Candidate
+    parameters: tuple = PARAMETERS
+    evaluated: int = 0
+    history: list = field(default_factory=list)
+
+    def proposed_config(self):
+        return apply_values(self.config, self.parameters, self.best.values)
+
+
+def get_values(config, parameters=PARAMETERS):
+    values = []
+    for parameter in parameters:
+        node = config
+        for key in parameter.path:
+            node = node[key]
+        values.append(float(node))
+    return tuple(values)
+
+
+def apply_values(config, parameters, values):
+    """@returns 替换了参数值的 GameConfig 副本，整数位的参数写成 int"""
+    config = copy.deepcopy(config)
+    for parameter, value in zip(parameters, values):
+        node = config
+        for key in parameter.path[:-1]:
+            node = node[key]
+        value = round(float(value), parameter.digits)
+        node[parameter.path[-1]] = int(value) if parameter.digits == 0 else value
+    return config
+
+
+def _round_values(parameters, values):
+    return tuple(round(float(np.clip(value, parameter.low, parameter.high)), parameter.digits)
+                 for parameter, value in zip(parameters, values))
+
+
+def evaluate(config, enemies=tuple(ENEMIES), loadouts=REFERENCE_LOADOUTS, battles=DEFAULT_BATTLES, seed=0,
+             tick_ms=DEFAULT_TICK_MS, max_time=DEFAULT_MAX_TIME):
+    """
+    按 config 的规则模拟 敌人 x 法术配置 x battles 场战斗
+    第 i 场使用种子 (seed, i)，与参数无关
+    @returns CellStats 列表
+    """
+    rules = Rules.from_config(config)
+    cells = []
+    for enemy_id in enemies:
+        for name, spells in loadouts.items():
+            wins = stalls = 0
+            times = np.empty(battles)
+            for index in range(battles):
+                player = default_player()
+                player['spells'] = [list(chain) for chain in spells]
+                rng = random.Random(f"{seed}:{index}")
+                result = Battle(player, enemy_id, rng, tick_ms, rules).run(first_available, max_time)
+                stalls += result.victory is None
+                wins += result.victory is True
+                times[index] = result.time
+            cells.append(CellStats(enemy_id, name, battles, wins, stalls, float(times.mean()) if battles else 0.0))
+    return cells
+
+
+def _evaluate_task(task):
+    """进程池中执行的评估（顶层函数以便 pickle）"""
+    config, parameters, values, kwargs = task
+    return evaluate(apply_values(config, parameters, values), **kwargs)
+
+
+def loss(cells, target, time_weight=DEFAULT_TIME_WEIGHT):
+    """胜率误差平方与战斗时长相对误差平方的加权平均"""
+    win_rates = np.array([cell.win_rate for cell in cells])
+    times = np.array([cell.mean_time for cell in cells])
+    win_error = np.mean((win_rates - target.win_rate) ** 2)
+    time_error = np.mean(((times - target.battle_time) / target.battle_time) ** 2)
+    return float(win_error + time_weight * time_error)
+
+
+def latin_hypercube(count, parameters, rng):
+    """每个维度分成 count 层，每层恰好采样一次"""
+    dims = len(parameters)
+    strata = (np.argsort(rng.random((dims, count)), axis=1).T + rng.random((count, dims))) / count
+    lows = np.array([parameter.low for parameter in parameters])
+    highs = np.array([parameter.high for parameter in parameters])
+    return lows + strata * (highs - lows)
+
+
+@contextmanager
+def _executor(workers):
+    """workers 为 1 时在当前进程中顺序执行（便于调试）"""
+    if workers == 1:
+        yield None
+        return
+    executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+    try:
+        yield executor
+    finally:
+        executor.shutdown(cancel_futures=True)
+
+
+def tune(preset, target=None, presets=None, parameters=PARAMETERS, rounds=DEFAULT_ROUNDS,
+         population=DEFAULT_POPULATION, workers=None, seed=0, time_weight=DEFAULT_TIME_WEIGHT, on_round=None,
+         **evaluate_kwargs):
+    """
+    搜索一个难度预设的参数
+    @param target 默认为 TARGETS[preset]
+    @param presets 默认读取 config/game.ts 的 difficultyPresets
+    @param on_round 可选，每轮结束后调用 on_round(轮次, 当前最优 Candidate)
+    @param evaluate_kwargs 传给 evaluate 的参数（enemies、loadouts、battles、tick_ms、max_time）
+    """
+    if presets is None:
+        presets = load_game_config()[1]
+    config = presets[preset]
+    target = target or TARGETS[preset]
+    rng = np.random.default_rng(seed)
+    evaluate_kwargs.setdefault('seed', seed)
+    spans = np.array([parameter.high - parameter.low for parameter in parameters])
+
+    seen = {}
+    baseline_values = get_values(config, parameters)
+    initial = [baseline_values] + [_round_values(parameters, values)
+                                   for values in latin_hypercube(population - 1, parameters, rng)]
+
+    with _executor(workers) as executor:
+        def run(batch):
+            batch = [values for values in dict.fromkeys(batch) if values not in seen]
+            tasks = [(config, parameters, values, evaluate_kwargs) for values in batch]
+            results = map(_evaluate_task, tasks) if executor is None else executor.map(_evaluate_task, tasks)
+            for values, cells in zip(batch, results):
+                seen[values] = Candidate(values, cells, loss(cells, target, time_weight))
+
+        run(initial)
+        best = min(seen.values(), key=lambda candidate: candidate.loss)
+        history = [best.loss]
+        if on_round:
+            on_round(0, best)
+        for round_index in range(1, rounds):
+            radius = INITIAL_RADIUS * RADIUS_SHRINK ** (round_index - 1)
+            samples = np.array(best.values) + rng.normal(0, 1, (population, len(parameters))) * spans * radius
+            run([_round_values(parameters, values) for values in samples])
+            best = min(seen.values(), key=lambda candidate: candidate.loss)
+            history.append(best.loss)
+            if on_round:
+                on_round(round_index, best)
+
+    return TuningResult(preset, target, config, seen[baseline_values], best, parameters, len(seen), history)
+
+
+def format_tuning_report(result):
+    """参数变化以及每个 敌人 x 法术配置 的胜率、时长变化"""
+    target = result.target
+    lines = [
+        f"== {result.preset}: 目标胜率 {target.win_rate:.0%}, 目标时长 {target.battle_time:.0f}s, "
+        f"评估 {result.evaluated} 组参数, 损失 {result.baseline.loss:.4f} -> {result.best.loss:.4f} ==",
+    ]
+    for parameter, before, after in zip(result.parameters, result.baseline.values, result.best.values):
+        lines.append(f"  {parameter.name}: {before:g} -> {after:g}")
+    lines.append("  敌人 / 法术配置: 胜率, 平均时长, 停住场数")
+    for before, after in zip(result.baseline.cells, result.best.cells):
+        lines.append(
+            f"  {after.enemy_id} / {after.loadout}: {before.win_rate:.0%} -> {after.win_rate:.0%}, "
+            f"{before.mean_time:.1f}s -> {after.mean_time:.1f}s, {before.stalls} -> {after.stalls}"
+        )
+    return "\n".join(lines)
+
+
+def _format_ts(value, indent):
+    if isinstance(value, dict):
+        pad = '  ' * (indent + 1)
+        items = [f"{pad}{key}: {_format_ts(item, indent + 1)}" for key, item in value.items()]
+        return "{\n" + ",\n".join(items) + "\n" + '  ' * indent + "}"
+    return json.dumps(value)
+
+
+def format_presets_ts(presets):
+    """生成可以替换 config/game.ts 中 difficultyPresets 的 TypeScript 代码"""
+    return f"export const difficultyPresets = {_format_ts(presets, 0)};"
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='用战斗模拟调整 config/game.ts 中的难度预设')
+    parser.add_argument('--preset', action='append', default=[], help='要调整的预设，可重复，默认全部')
+    parser.add_argument('--rounds', type=int, default=DEFAULT_ROUNDS, help='搜索轮数')
+    parser.add_argument('--population', type=int, default=DEFAULT_POPULATION, help='每轮的候选数')
+    parser.add_argument('--battles', type=int, default=DEFAULT_BATTLES, help='每个 敌人 x 法术配置 的战斗场数')
+    parser.add_argument('-j', '--workers', type=int, default=None, help='进程数，默认等于 CPU 核心数')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--json', default=None, help='把结果和提议的预设写入该 JSON 文件')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    presets = load_game_config()[1]
+    names = args.preset or list(presets)
+    proposed = copy.deepcopy(presets)
+    results = []
+    for name in names:
+        result = tune(name, presets=presets, rounds=args.rounds, population=args.population, workers=args.workers,
+                      seed=args.seed, battles=args.battles,
+                      on_round=lambda index, best: print(f"{name} 第 {index + 1} 轮: 损失 {best.loss:.4f}"))
+        proposed[name] = result.proposed_config()
+        results.append(result)
+        print(format_tuning_report(result))
+
+    print("\n提议的预设:")
+    print(format_presets_ts(proposed))
+    if args.json:
+        data = {
+            'presets': proposed,
+            'results': [{
+                'preset': result.preset,
+                'target': asdict(result.target),
+                'evaluated': result.evaluated,
+                'loss': {'before': result.baseline.loss, 'after': result.best.loss},
+                'cells': [asdict(cell) for cell in result.best.cells],
+            } for result in results],
+        }
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        print(f"结果已写入 {args.json}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,262 +1,169 @@
 import asyncio
-from playwright.async_api import async_playwright
 
-async def test_all_enemies():
-    async with async_playwright() as p:
-        # 启动浏览器
-        browser = await p.chromium.launch(
-            headless=False,
-            executable_path=r"d:\test\playwright-browsers\chromium-1208\chrome-win64\chrome.exe"
-        )
-        
-        # 创建新页面
-        page = await browser.new_page()
-        
-        # 导航到游戏页面
-        await page.goto('http://localhost:3001/test/')
-        
-        # 等待页面加载
-        await page.wait_for_load_state('networkidle')
-        
+import numpy as np
+
+from harness import (
+    ConsoleMarkers,
+    SeededRandom,
+    cast_spell,
+    game_page,
+    rest,
+    run_tests,
+    start_battle,
+    wait_for_battle_end,
+    wait_for_player_turn,
+    wait_for_scene,
+)
+from harness.logs import Damage, LevelUp, Reward, RuneChoice
+from harness.rng import enemy_sequence, find_seed
+from sim import ENEMIES, default_player
+from sim.montecarlo import enemy_distribution
+from sim.rewards import grant_rewards
+
+# 覆盖所有敌人的遭遇顺序，每个敌人恰好一场战斗
+ENCOUNTER_ORDER = ['wolf', 'goblin', 'ogre']
+
+def victory_draws():
+    """每场胜利后按 endBattle 的顺序消耗掉落判定和符文洗牌的随机数"""
+    player = default_player()
+    return lambda rng, enemy_id: grant_rewards(player, ENEMIES[enemy_id], rng)
+
+async def test_all_enemies(pool=None, seed=None):
+    """
+    用带种子的 Math.random 依次遇到所有敌人
+    @param seed 随机数种子，默认搜索一个按 ENCOUNTER_ORDER 遇敌的种子；失败时用同一个种子即可复现
+    """
+    if seed is None:
+        seed = find_seed(ENCOUNTER_ORDER, victory_draws)
+    expected_order = enemy_sequence(seed, len(ENCOUNTER_ORDER), victory_draws())
+    
+    async with game_page(pool, setup=[SeededRandom(seed)]) as page:
         print("=== 所有敌人类型测试 ===")
+        print(f"随机数种子: {seed}")
         print("游戏页面已加载")
         
         # 监听控制台日志
-        console_messages = []
-        page.on('console', lambda msg: console_messages.append(msg.text))
+        markers = ConsoleMarkers(page)
+        logs = markers.logs
         
-        # 已测试的敌人类型
-        tested_enemies = set()
         test_results = []
-        max_attempts = 15  # 最大尝试次数
-        attempt = 0
         
-        # 持续测试直到遇到所有敌人类型或达到最大尝试次数
-        while len(tested_enemies) < 3 and attempt < max_attempts:
-            attempt += 1
-            print(f"\n=== 测试尝试 {attempt}/{max_attempts} ===")
+        for attempt, expected_id in enumerate(expected_order, 1):
+            print(f"\n=== 第 {attempt}/{len(expected_order)} 场战斗 ===")
             
-            # 点击开始战斗按钮
-            start_battle_btn = await page.query_selector('#start-battle-btn')
-            await start_battle_btn.click()
+            # 点击开始战斗按钮，从 [BATTLE] 标记中识别敌人
+            battle_since = markers.mark()
+            current_enemy = await start_battle(page, markers)
             
-            # 等待战斗场景加载
-            await page.wait_for_selector('#battle-scene.active')
+            print(f"遇到敌人: {current_enemy}")
+            expected_enemy = ENEMIES[expected_id]['name']
+            assert current_enemy == expected_enemy, \
+                f"种子 {seed} 第 {attempt} 场: 预期 {expected_enemy}, 遇到 {current_enemy}"
             
-            # 检查遇到的敌人
-            battle_log = await page.query_selector('#battle-log')
-            current_enemy = "未知"
+            # 持续使用第一个法术（火球术）直到战斗结束
+            while True:
+                await wait_for_player_turn(page)
+                if not await cast_spell(page, markers, 0):
+                    break
+                print("使用法术: 0")
             
+            # 等待战斗结束
+            await wait_for_battle_end(page, markers, since=battle_since)
+            print(f"与 {current_enemy} 的战斗结束")
+            
+            # 检查战斗日志
+            battle_log = await page.query_selector('#battle-log')
             if battle_log:
                 battle_log_text = await battle_log.inner_text()
-                # 识别敌人类型
-                if "恶狼" in battle_log_text:
-                    current_enemy = "恶狼"
-                elif "哥布林" in battle_log_text:
-                    current_enemy = "哥布林"
-                elif "食人魔" in battle_log_text:
-                    current_enemy = "食人魔"
+                print("战斗日志片段:")
+                lines = battle_log_text.split('\n')
+                for line in lines[-5:]:  # 显示最后5行
+                    if line.strip():
+                        print(f"[Log] {line}")
             
-            print(f"遇到敌人: {current_enemy}")
+            # 收集测试结果
+            test_results.append({
+                "enemy": current_enemy,
+                "battle": logs.battles,
+                "attempt": attempt
+            })
             
-            # 如果这个敌人还没有测试过
-            if current_enemy != "未知" and current_enemy not in tested_enemies:
-                tested_enemies.add(current_enemy)
-                print(f"开始测试 {current_enemy}")
-                
-                # 等待玩家ATB条充满
-                await asyncio.sleep(5)
-                
-                # 测试使用法术
-                spell_buttons = await page.query_selector_all('.spell-button')
-                if spell_buttons:
-                    # 点击第一个法术按钮（火球术）
-                    button = spell_buttons[0]
-                    button_text = await button.inner_text()
-                    print(f"使用法术: {button_text}")
-                    await button.click()
-                    
-                    # 等待战斗进程
-                    await asyncio.sleep(8)
-                    
-                    # 检查战斗日志
-                    battle_log = await page.query_selector('#battle-log')
-                    if battle_log:
-                        battle_log_text = await battle_log.inner_text()
-                        print("战斗日志片段:")
-                        lines = battle_log_text.split('\n')
-                        for line in lines[-5:]:  # 显示最后5行
-                            if line.strip():
-                                print(f"[Log] {line}")
-                
-                # 等待战斗结束
-                await page.wait_for_selector('#camp-scene.active')
-                print(f"与 {current_enemy} 的战斗结束")
-                
-                # 收集测试结果
-                enemy_result = {
-                    "enemy": current_enemy,
-                    "logs": console_messages.copy(),
-                    "attempt": attempt
-                }
-                test_results.append(enemy_result)
-                
-                # 清空日志
-                console_messages.clear()
-                
-                # 休息恢复
-                rest_btn = await page.query_selector('#rest-btn')
-                if rest_btn:
-                    await rest_btn.click()
-                    await asyncio.sleep(1)
-            else:
-                # 这个敌人已经测试过，或者是未知敌人
-                print(f"{current_enemy} 已经测试过或未知，跳过详细测试")
-                # 等待回到营地
-                await page.wait_for_selector('#camp-scene.active')
-                
-                # 休息恢复
-                rest_btn = await page.query_selector('#rest-btn')
-                if rest_btn:
-                    await rest_btn.click()
-                    await asyncio.sleep(1)
+            # 休息恢复
+            await rest(page, markers)
         
         # 分析测试结果
         print("\n=== 测试结果分析 ===")
         
         for result in test_results:
             enemy_name = result["enemy"]
-            logs = result["logs"]
+            battle = result["battle"]
             
             print(f"\n敌人: {enemy_name}")
             
             # 分析战斗相关日志
-            battle_logs = [msg for msg in logs if "战斗" in msg or "攻击" in msg or "伤害" in msg]
-            print("战斗相关日志:")
-            for log in battle_logs[:3]:  # 显示前3条
-                print(f"[Console] {log}")
+            damage_logs = logs.query(Damage, battle=battle)
+            print(f"受到伤害: {sum(record.amount for record in damage_logs)} ({len(damage_logs)}次)")
+            for record in damage_logs[:3]:  # 显示前3条
+                print(f"[Console] {record.text}")
             
             # 分析奖励相关日志
-            reward_logs = [msg for msg in logs if "获得" in msg or "金币" in msg or "经验" in msg or "素材" in msg]
             print("奖励相关日志:")
-            for log in reward_logs:
-                print(f"[Console] {log}")
+            for record in logs.query(Reward, battle=battle):
+                print(f"[Console] {record.text}")
             
             # 分析升级相关日志
-            level_logs = [msg for msg in logs if "升级" in msg or "解锁" in msg]
+            level_logs = logs.query(LevelUp, battle=battle) + logs.query(RuneChoice, battle=battle)
             if level_logs:
                 print("升级相关日志:")
-                for log in level_logs:
-                    print(f"[Console] {log}")
+                for record in level_logs:
+                    print(f"[Console] {record.text}")
         
-        # 关闭浏览器
-        try:
-            print("正在关闭浏览器...")
-            await browser.close()
-            print("浏览器已关闭")
-        except Exception as e:
-            print(f"关闭浏览器时出错: {e}")
-            # 尝试强制关闭
-            try:
-                print("尝试强制关闭浏览器")
-                browser.process.kill()
-                print("浏览器进程已强制终止")
-            except:
-                print("无法关闭浏览器进程")
+        encountered = {result["enemy"] for result in test_results}
+        print(f"\n是否遇到了所有敌人类型: {'是' if len(encountered) == len(ENEMIES) else '否'} (种子: {seed})")
         print("\n=== 所有敌人测试完成 ===")
 
-async def test_enemy_consistency():
-    """测试敌人类型的一致性，确保每次战斗都能遇到不同敌人"""
-    async with async_playwright() as p:
-        # 启动浏览器
-        browser = await p.chromium.launch(
-            headless=True,  # 无头模式，加快测试速度
-            executable_path=r"d:\test\playwright-browsers\chromium-1208\chrome-win64\chrome.exe"
-        )
-        
-        # 创建新页面
-        page = await browser.new_page()
-        
-        # 导航到游戏页面
-        await page.goto('http://localhost:3001/test/')
-        
-        # 等待页面加载
-        await page.wait_for_load_state('networkidle')
-        
-        print("\n=== 敌人类型一致性测试 ===")
-        
-        encountered_enemies = []
-        
-        # 连续测试10次战斗
-        for i in range(10):
-            print(f"\n测试战斗 {i+1}/10")
-            
-            # 点击开始战斗按钮
-            start_battle_btn = await page.query_selector('#start-battle-btn')
-            await start_battle_btn.click()
-            
-            # 等待战斗场景加载
-            await page.wait_for_selector('#battle-scene.active')
-            
-            # 检查遇到的敌人
-            battle_log = await page.query_selector('#battle-log')
-            if battle_log:
-                battle_log_text = await battle_log.inner_text()
-                
-                # 识别敌人类型
-                enemy_type = "未知"
-                if "恶狼" in battle_log_text:
-                    enemy_type = "恶狼"
-                elif "哥布林" in battle_log_text:
-                    enemy_type = "哥布林"
-                elif "食人魔" in battle_log_text:
-                    enemy_type = "食人魔"
-                
-                encountered_enemies.append(enemy_type)
-                print(f"遇到敌人: {enemy_type}")
+async def test_enemy_consistency(pool=None, samples=1_000_000, sample_seed=0):
+    """
+    测试敌人类型的一致性
+    分布由向量化采样检验，浏览器只验证一个已知种子下依次抽到的敌人与预测一致
+    @param sample_seed 向量化采样的随机数种子，卡方检验未通过时用同一个种子即可复现
+    """
+    print("\n=== 敌人类型一致性测试 ===")
+    
+    # 分布检验不需要浏览器
+    distribution = enemy_distribution(samples, np.random.default_rng(sample_seed))
+    names = {enemy_id: enemy['name'] for enemy_id, enemy in ENEMIES.items()}
+    print(f"\n=== 敌人分布分析（采样种子: {sample_seed}）===")
+    print(distribution.summary(names))
+    
+    # 撤退不消耗其他随机数，每场战斗只有选敌的一次抽取
+    seed = find_seed(ENCOUNTER_ORDER)
+    async with game_page(pool, headless=True, setup=[SeededRandom(seed)]) as page:
+        markers = ConsoleMarkers(page)
+        mismatches = 0
+        print(f"\n随机数种子: {seed}")
+        
+        for expected_id in ENCOUNTER_ORDER:
+            expected = names[expected_id]
             
-            # 等待战斗结束（快速结束）
-            await asyncio.sleep(3)
+            # 点击开始战斗按钮，从 [BATTLE] 标记中识别敌人
+            enemy_type = await start_battle(page, markers)
+            status = "一致" if enemy_type == expected else "不一致"
+            print(f"预期 {expected}, 遇到 {enemy_type} ({status})")
+            if enemy_type != expected:
+                mismatches += 1
             
-            # 强制回到营地（如果还在战斗中）
-            try:
-                await page.wait_for_selector('#camp-scene.active', timeout=5000)
-            except:
-                # 如果超时，刷新页面
-                await page.reload()
-                await page.wait_for_load_state('networkidle')
-        
-        # 分析敌人分布
-        print("\n=== 敌人分布分析 ===")
-        enemy_counts = {}
-        for enemy in encountered_enemies:
-            enemy_counts[enemy] = enemy_counts.get(enemy, 0) + 1
-        
-        for enemy, count in enemy_counts.items():
-            percentage = (count / len(encountered_enemies)) * 100
-            print(f"{enemy}: {count}次 ({percentage:.1f}%)")
-        
-        # 检查是否遇到了所有敌人类型
-        all_enemies_encountered = all(enemy in encountered_enemies for enemy in ["恶狼", "哥布林", "食人魔"])
-        print(f"\n是否遇到了所有敌人类型: {'是' if all_enemies_encountered else '否'}")
-        
-        # 关闭浏览器
-        try:
-            print("正在关闭浏览器...")
-            await browser.close()
-            print("浏览器已关闭")
-        except Exception as e:
-            print(f"关闭浏览器时出错: {e}")
-            # 尝试强制关闭
-            try:
-                print("尝试强制关闭浏览器")
-                browser.process.kill()
-                print("浏览器进程已强制终止")
-            except:
-                print("无法关闭浏览器进程")
-        print("\n=== 敌人一致性测试完成 ===")
+            # 撤退回到营地（只关心遇到的敌人类型）
+            await page.click('#retreat-button')
+            await wait_for_scene(page, 'camp')
+        
+    chi_square_passed = distribution.chi_square().passed
+    print(f"\n种子 {seed} 的抽取: {len(ENCOUNTER_ORDER) - mismatches}/{len(ENCOUNTER_ORDER)} 一致")
+    print(f"分布检验: {'通过' if chi_square_passed else '未通过'}")
+    print("\n=== 敌人一致性测试完成 ===")
+    return mismatches == 0 and chi_square_passed
 
 if __name__ == "__main__":
-    asyncio.run(test_all_enemies())
-    # 可选：运行敌人一致性测试
-    # asyncio.run(test_enemy_consistency())
+    asyncio.run(run_tests(test_all_enemies))
+    # 可选：在同一个浏览器中追加运行敌人一致性测试
+    # asyncio.run(run_tests(test_all_enemies, test_enemy_consistency))
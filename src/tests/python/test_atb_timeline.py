@@ -0,0 +1,48 @@
+import asyncio
+import time
+
+from harness import ConsoleMarkers, SeededRandom, cast_first_available, game_page, start_battle
+from harness.timeline import AtbRecorder, check_timeline, format_timeline_report
+
+async def _freeze(page, seconds):
+    """冻结页面（与浏览器冻结后台标签页相同），恢复后的第一帧 deltaTime 约等于冻结时长"""
+    cdp = await page.context.new_cdp_session(page)
+    await cdp.send('Page.setWebLifecycleState', {'state': 'frozen'})
+    await asyncio.sleep(seconds)
+    await cdp.send('Page.setWebLifecycleState', {'state': 'active'})
+    await cdp.detach()
+
+async def test_atb_timeline(pool=None, enemy_id='wolf', seed=1, duration=15.0, background=2.0):
+    """
+    按真实帧率进行一场战斗，逐帧记录 ATB，与 predictATB 的解析曲线和阶段切换规则比较
+    @param background 战斗中途模拟后台标签页的秒数，0 表示不模拟
+    """
+    recorder = AtbRecorder()
+    async with game_page(pool, setup=[recorder, SeededRandom(seed)]) as page:
+        print("=== ATB 时间线测试 ===")
+        markers = ConsoleMarkers(page)
+        await start_battle(page, markers, enemy_id)
+        await recorder.start(page)
+
+        deadline = time.perf_counter() + duration
+        frozen = background <= 0
+        while time.perf_counter() < deadline:
+            if not await page.evaluate('() => window.game.state.battle.active'):
+                break
+            if not frozen and time.perf_counter() > deadline - duration / 2:
+                print(f"模拟后台标签页 {background}s")
+                await _freeze(page, background)
+                frozen = True
+            await cast_first_available(page, markers)
+            await page.wait_for_timeout(50)
+
+        timeline = await recorder.stop(page)
+        report = check_timeline(timeline)
+        print(format_timeline_report(report))
+        print(f"=== ATB 时间线测试{'通过' if report.passed else '未通过'} ===")
+        return report.passed
+
+if __name__ == "__main__":
+    asyncio.run(test_atb_timeline())
+    # 可选：不模拟后台标签页，只检查正常帧率
+    # asyncio.run(test_atb_timeline(background=0))
@@ -0,0 +1,54 @@
+import asyncio
+from pathlib import Path
+
+from harness import session
+from harness.perf import (
+    STANDARD_SCENARIOS,
+    build_baseline,
+    compare_baselines,
+    format_regressions,
+    format_results,
+    load_baseline,
+    run_benchmarks,
+    save_baseline,
+)
+
+# 本机的基线：帧时间取决于硬件和浏览器版本，不提交到仓库（见 .gitignore）
+# 只在没有基线或显式 update 时写入；正常运行不改写基线，低于阈值的小幅变慢不会逐次累积
+BASELINE_PATH = Path(__file__).parent / 'benchmarks' / 'battle_frames.json'
+
+async def test_battle_frame_budget(pool=None, baseline_path=BASELINE_PATH, scenarios=STANDARD_SCENARIOS,
+                                   update=False):
+    """
+    无头运行标准战斗，统计帧时间、长任务和样式/布局开销，并与基线比较
+    @param update 无论是否回归都用本次结果覆盖基线（性能有意变化后运行一次）
+    """
+    async with session(pool, headless=True) as pool:
+        print("=== 战斗循环帧时间基准 ===")
+        results = await run_benchmarks(pool, scenarios)
+        print(format_results(results))
+
+        previous = load_baseline(baseline_path)
+        environment = dict(browser=pool.browser.version)
+        regressions = compare_baselines(previous, build_baseline(results, **environment)) if previous else []
+        if previous is None or update:
+            baseline_path.parent.mkdir(parents=True, exist_ok=True)
+            save_baseline(results, baseline_path, **environment)
+            print(f"{'已按 update=True 覆盖' if previous else '没有基线，已保存到'} {baseline_path}")
+        if previous is None:
+            return True
+
+        if not regressions:
+            print(f"\n与基线（{previous['created']}）相比没有回归")
+            return True
+        print(f"\n与基线（{previous['created']}）相比出现回归:")
+        print(format_regressions(regressions))
+        if update:
+            return True
+        print("基线保持不变；性能有意变化时运行 test_battle_frame_budget(update=True) 更新")
+        return False
+
+if __name__ == "__main__":
+    asyncio.run(test_battle_frame_budget())
+    # 可选：性能有意变化后更新基线
+    # asyncio.run(test_battle_frame_budget(update=True))
@@ -0,0 +1,50 @@
+import asyncio
+import time
+
+from harness import ConsoleMarkers, EventChannel, cast_first_available, game_page, start_battle, wait_for_player_turn
+from harness.logs import BattleEnd
+from harness.waits import wait_for_battle_end
+from harness.widgets import spell_locator
+
+async def _play_battle(page, markers):
+    """打一场狼，每回合先把鼠标移过法术按钮制造 [DEBUG] 日志"""
+    since = markers.mark()
+    await start_battle(page, markers, 'wolf')
+    while await page.evaluate('() => window.game.state.battle.active'):
+        await wait_for_player_turn(page)
+        for index in range(2):
+            await spell_locator(page, index).hover()
+        if await cast_first_available(page, markers) is None:
+            await page.click('#retreat-button')
+            break
+    return await wait_for_battle_end(page, markers, since=since)
+
+async def _run(pool, channel):
+    console = []
+    setup = [channel] if channel else []
+    async with game_page(pool, headless=True, setup=setup) as page:
+        page.on('console', lambda msg: console.append(msg.text))
+        markers = channel.markers if channel else ConsoleMarkers(page)
+        started = time.perf_counter()
+        victory = await _play_battle(page, markers)
+        if channel:
+            await channel.flush(page)
+        return victory, len(console), time.perf_counter() - started
+
+async def test_event_channel(pool=None):
+    """同一场战斗分别通过控制台事件和事件通道观察，比较 Python 收到的消息数"""
+    print("=== 事件通道测试 ===")
+    victory, console_events, elapsed = await _run(pool, None)
+    print(f"控制台: 胜利 {victory}, 收到 {console_events} 条 console 事件, 耗时 {elapsed:.2f}s")
+
+    channel = EventChannel()
+    victory, console_events, elapsed = await _run(pool, channel)
+    print(f"事件通道: 胜利 {victory}, 收到 {channel.events} 条订阅消息 / {channel.batches} 批, "
+          f"console 事件 {console_events} 条, 耗时 {elapsed:.2f}s")
+    ended = channel.logs.last(BattleEnd)
+    print(f"日志流中的战斗结果: {'胜利' if ended and ended.victory else '失败'}")
+    print("=== 事件通道测试完成 ===")
+    return console_events == 0 and ended is not None and ended.victory == victory
+
+if __name__ == "__main__":
+    asyncio.run(test_event_channel())
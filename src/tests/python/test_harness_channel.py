@@ -0,0 +1,28 @@
+import asyncio
+
+from harness.channel import SEPARATOR, EventChannel, tag_prefixes
+from harness.logs import BattleStart
+from harness.waits import MARKER_BATTLE_START
+
+
+def test_tag_prefixes():
+    assert tag_prefixes('BATTLE', 'REST') == ('[BATTLE]', '[REST]')
+
+
+def test_batches_feed_markers_and_logs():
+    channel = EventChannel()
+
+    async def scenario():
+        waiter = asyncio.create_task(channel.markers.wait_for(MARKER_BATTLE_START, timeout=1))
+        await asyncio.sleep(0)
+        channel._on_batch(None, SEPARATOR.join([
+            '[EVENT] 开始战斗',
+            '[BATTLE] 遇到了 恶狼 (HP: 60, MaxHP: 60, DMG: 8, Speed: 8)',
+        ]))
+        channel._on_batch(None, '[SCENE] 切换到营地场景')
+        return await waiter
+
+    assert asyncio.run(scenario()).startswith(MARKER_BATTLE_START)
+    assert (channel.batches, channel.events) == (2, 3)
+    assert channel.logs.last(BattleStart).enemy == '恶狼'
+    assert channel.logs.current_battle is None
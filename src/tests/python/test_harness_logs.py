@@ -0,0 +1,61 @@
+from harness.logs import BattleStart, Damage, LevelUp, LogRecord, LogStream, Rest, Reward, RuneChoice, parse_line
+
+BATTLE_LOG = [
+    '[EVENT] 开始战斗',
+    '[BATTLE] 遇到了 恶狼 (HP: 60, MaxHP: 60, DMG: 8, Speed: 8)',
+    '[ENEMY] 恶狼 使用 普通攻击 造成 8 点伤害！玩家HP: 100 → 92',
+    '[EVENT] 结束战斗，结果: 胜利',
+    '[REWARD] 获得 15 金币，当前金币: 115',
+    '[REWARD] 获得 20 经验值，当前经验: 120',
+    '[REWARD] 获得 狼牙，当前数量: 1',
+    '[LEVEL] 升级成功！从 1 级升至 2 级',
+    '[RUNE] 符文选择选项: quick, iceShard',
+    '[SCENE] 切换到营地场景',
+    '[REST] HP恢复: 92 → 120, MP恢复: 40 → 60',
+]
+
+
+def test_parse_typed_records():
+    start = parse_line(BATTLE_LOG[1])
+    assert isinstance(start, BattleStart) and (start.enemy, start.max_hp, start.speed) == ('恶狼', 60, 8)
+    damage = parse_line(BATTLE_LOG[2])
+    assert isinstance(damage, Damage) and (damage.amount, damage.hp_before, damage.hp_after) == (8, 100, 92)
+    channeled = parse_line('[ENEMY] 食人魔 吟唱技能造成 22.5 点伤害！玩家HP: 50 → 27.5')
+    assert (channeled.skill, channeled.amount, channeled.hp_after) == (None, 22.5, 27.5)
+    material = parse_line(BATTLE_LOG[6])
+    assert isinstance(material, Reward) and (material.kind, material.item, material.total) == ('material', '狼牙', 1)
+    assert parse_line(BATTLE_LOG[8]).choices == ['quick', 'iceShard']
+    other = parse_line('[LEVEL] 升级检查: 未升级')
+    assert type(other) is LogRecord and other.tag == 'LEVEL'
+
+
+def test_records_are_indexed_by_battle():
+    stream = LogStream()
+    for _ in range(3):
+        for text in BATTLE_LOG:
+            stream.feed(text)
+
+    assert stream.battles == 3
+    rewards = stream.query(Reward, battle=3)
+    assert [reward.kind for reward in rewards] == ['gold', 'experience', 'material']
+    assert all(reward.battle == 3 for reward in rewards)
+    # 回到营地后的休息不属于任何战斗
+    assert stream.last(Rest).battle is None
+    assert len(stream.query(LevelUp)) == 3
+    assert len(stream.query(tag='REWARD', battle=2)) == 3
+    assert [record.text for record in stream.query(RuneChoice, since=stream.mark() - 3)] == [BATTLE_LOG[8]]
+
+
+def test_ring_buffer_keeps_memory_flat():
+    stream = LogStream(capacity=len(BATTLE_LOG) * 2)
+    for _ in range(100):
+        for text in BATTLE_LOG:
+            stream.feed(text)
+
+    assert len(stream) == stream.capacity
+    assert stream.get(0) is None and stream.get(stream.mark() - 1).text == BATTLE_LOG[-1]
+    # 被覆盖的战斗从索引中移除
+    assert sorted(stream._by_battle) == [99, 100]
+    assert sum(len(seqs) for seqs in stream._by_tag.values()) == stream.capacity
+    assert stream.query(Reward, battle=1) == []
+    assert len(stream.query(Reward)) == 6
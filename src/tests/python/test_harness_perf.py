@@ -0,0 +1,52 @@
+import asyncio
+
+import pytest
+
+from harness.perf import BenchResult, FrameStats, compare_baselines, performance_metrics
+
+
+def test_frame_stats_percentiles():
+    # 99 个 16ms 的帧间隔和 1 个 100ms 的卡顿
+    times = [0.0]
+    for index in range(100):
+        times.append(times[-1] + (100.0 if index == 50 else 16.0))
+    stats = FrameStats.from_times(times)
+    assert stats.frames == 101
+    assert stats.frame_p50 == 16.0 and stats.frame_max == 100.0
+    assert stats.frame_p99 == pytest.approx(16.0 + 0.01 * 84.0)
+    assert (stats.dropped, stats.dropped_ratio) == (1, 0.01)
+    assert FrameStats.from_times([5.0]).frames == 1
+
+
+def test_metrics_are_normalized_per_frame():
+    result = BenchResult('wolf', FrameStats(frames=200), long_tasks=2,
+                         cdp={'ScriptDuration': 100.0, 'LayoutCount': 50, 'RecalcStyleCount': 400})
+    metrics = result.metrics()
+    assert (metrics['script_ms_per_frame'], metrics['layouts_per_frame'], metrics['style_recalcs_per_frame']) == (
+        0.5, 0.25, 2.0)
+
+
+def test_compare_baselines_applies_both_thresholds():
+    previous = {'scenarios': {
+        'wolf': {'frame_p95': 17.0, 'frame_p99': 20.0, 'long_tasks': 0},
+        'ogre': {'frame_p95': 17.0},
+    }}
+    current = {'scenarios': {
+        # p95 +0.9ms 低于绝对阈值；p99 +5ms 超过两个阈值；长任务 0 -> 2
+        'wolf': {'frame_p95': 17.9, 'frame_p99': 25.0, 'long_tasks': 2},
+        'goblin': {'frame_p95': 40.0},
+    }}
+    regressions = compare_baselines(previous, current)
+    assert [(item.scenario, item.metric) for item in regressions] == [('wolf', 'frame_p99'), ('wolf', 'long_tasks')]
+    assert regressions[0].change == 0.25
+
+
+def test_performance_metrics_converts_durations():
+    class FakeSession:
+        async def send(self, method):
+            assert method == 'Performance.getMetrics'
+            return {'metrics': [{'name': 'ScriptDuration', 'value': 0.25}, {'name': 'LayoutCount', 'value': 7},
+                                {'name': 'JSHeapUsedSize', 'value': 1}]}
+
+    metrics = asyncio.run(performance_metrics(FakeSession()))
+    assert metrics['ScriptDuration'] == 250 and metrics['LayoutCount'] == 7 and metrics['RecalcStyleCount'] == 0
@@ -0,0 +1,60 @@
+import struct
+import zlib
+
+import numpy as np
+import pytest
+
+from harness.png import PNG_SIGNATURE, _chunk, decode_png, encode_png
+
+
+def _paeth(a, b, c):
+    p = a + b - c
+    pa, pb, pc = abs(p - a), abs(p - b), abs(p - c)
+    return a if pa <= pb and pa <= pc else (b if pb <= pc else c)
+
+
+def _encode_with_filters(pixels, filters):
+    """逐像素按指定过滤类型编码，作为解码的参照"""
+    height, width, channels = pixels.shape
+    image = pixels.astype(int)
+    raw = bytearray()
+    for row in range(height):
+        kind = filters[row]
+        raw.append(kind)
+        for col in range(width):
+            for channel in range(channels):
+                a = image[row, col - 1, channel] if col else 0
+                b = image[row - 1, col, channel] if row else 0
+                c = image[row - 1, col - 1, channel] if row and col else 0
+                predictor = (0, a, b, (a + b) // 2, _paeth(a, b, c))[kind]
+                raw.append((image[row, col, channel] - predictor) & 0xFF)
+    color_type = {1: 0, 2: 4, 3: 2, 4: 6}[channels]
+    header = struct.pack('>IIBBBBB', width, height, 8, color_type, 0, 0, 0)
+    return (PNG_SIGNATURE + _chunk(b'IHDR', header) + _chunk(b'IDAT', zlib.compress(bytes(raw)))
+            + _chunk(b'IEND', b''))
+
+
+@pytest.mark.parametrize('channels', [1, 2, 3, 4])
+@pytest.mark.parametrize('filters', [
+    [0, 1, 2, 3, 4, 0, 1, 2, 3],  # 混合过滤，走反对角线
+    [4] * 9,
+    [2, 1, 0, 2, 1, 0, 2, 1, 0],  # 只有 None/Sub/Up，逐行处理
+])
+def test_decode_all_filter_types(channels, filters):
+    pixels = np.random.default_rng(channels).integers(0, 256, (9, 13, channels), dtype=np.uint8)
+    assert np.array_equal(decode_png(_encode_with_filters(pixels, filters)), pixels)
+
+
+def test_encode_round_trip():
+    pixels = np.random.default_rng(0).integers(0, 256, (40, 30, 3), dtype=np.uint8)
+    assert np.array_equal(decode_png(encode_png(pixels)), pixels)
+    gray = pixels[:, :, 0]
+    assert np.array_equal(decode_png(encode_png(gray))[:, :, 0], gray)
+
+
+def test_rejects_unsupported_formats():
+    with pytest.raises(ValueError, match='不是 PNG'):
+        decode_png(b'GIF89a')
+    header = struct.pack('>IIBBBBB', 1, 1, 16, 2, 0, 0, 0)
+    with pytest.raises(ValueError, match='位深 16'):
+        decode_png(PNG_SIGNATURE + _chunk(b'IHDR', header) + _chunk(b'IEND', b''))
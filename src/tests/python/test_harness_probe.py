@@ -0,0 +1,47 @@
+import asyncio
+
+from harness.probe import GameSnapshot, snapshots
+
+STATE = {
+    'scene': 'battle',
+    'player': {'hp': 92, 'maxHp': 100, 'mp': 40, 'maxMp': 50, 'speed': 12, 'gold': 0, 'experience': 0,
+               'level': 1, 'spells': [['firebolt']], 'materials': {}, 'unlockedRunes': ['firebolt']},
+    'enemy': {'id': 'wolf', 'name': '恶狼', 'hp': 35, 'maxHp': 60, 'dmg': 8, 'speed': 8, 'icon': '🐺'},
+    'battle': {'active': True, 'lastTime': 0, 'phase': 'action', 'currentActor': 'player', 'playerAtb': 100,
+               'enemyAtb': 40, 'playerStatus': 'preparing', 'enemyStatus': 'preparing', 'castProgress': 0,
+               'currentSpellIndex': -1, 'currentSpellData': None, 'currentSpellTime': 0, 'stunTimer': 0,
+               'focusValue': 25, 'skipAction': False},
+    'time': 1234.5,
+}
+
+
+class FakePage:
+    def __init__(self):
+        self.calls = 0
+
+    async def evaluate(self, script):
+        self.calls += 1
+        return dict(STATE, time=self.calls)
+
+
+def test_snapshot_maps_camel_case_fields():
+    current = GameSnapshot.from_js(STATE)
+    assert (current.player.max_hp, current.player.unlocked_runes) == (100, ['firebolt'])
+    assert (current.enemy.name, current.enemy.max_hp, current.enemy.mp) == ('恶狼', 60, None)
+    assert current.battle.player_atb == 100 and current.battle.focus_value == 25
+    assert current.player_turn and not current.battle_over
+    assert GameSnapshot.from_js(dict(STATE, enemy=None)).enemy is None
+
+
+def test_snapshots_stream_at_fixed_rate():
+    async def scenario():
+        page = FakePage()
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        times = [current.time async for current in snapshots(page, rate=50, until=lambda s: s.time == 5)]
+        return times, loop.time() - started
+
+    times, elapsed = asyncio.run(scenario())
+    # 每次页面往返一次，第5个快照满足条件后停止
+    assert times == [1, 2, 3, 4, 5]
+    assert 0.07 <= elapsed < 0.2
@@ -0,0 +1,50 @@
+import pytest
+
+from harness.replay import ACTIONS, InputEvent, Recording, _varint, state_digest
+from harness.saves import save_scenario
+
+
+def _recording():
+    events = [
+        InputEvent(1500, 'start_battle', 'wolf'),
+        InputEvent(2300, 'cast', 1),
+        InputEvent(2300, 'cast', 0),
+        InputEvent(2400, 'retreat'),
+        InputEvent(9000, 'rest'),
+        InputEvent(9100, 'buy', 'wolfFang'),
+        InputEvent(9100, 'sell', 'wolfFang'),
+        InputEvent(300000, 'rune_choice', 'double'),
+    ]
+    save = save_scenario('rich_shopper').to_js()
+    return Recording(7, save, 1000, events, 301000, state_digest({'scene': 'camp'}))
+
+
+def test_round_trip_covers_every_action():
+    recording = _recording()
+    assert {event.action for event in recording.events} == set(ACTIONS)
+    assert Recording.from_bytes(recording.to_bytes()) == recording
+    empty = Recording(0, None, 1, [], 1)
+    assert Recording.from_bytes(empty.to_bytes()) == Recording(0, None, 1, [], 1, b'\0' * 8)
+
+
+def test_format_is_compact():
+    data = _recording().to_bytes()
+    # 字符串只存一次；每个事件 3 ~ 5 字节
+    assert data.count(b'wolfFang') == 1
+    events = Recording(1, None, 0, [InputEvent(16 * i, 'cast', i % 3) for i in range(1000)], 16000).to_bytes()
+    assert len(events) < 3100
+    assert _varint(300) == b'\xac\x02'
+
+
+def test_rejects_corrupted_files():
+    data = bytearray(_recording().to_bytes())
+    with pytest.raises(ValueError, match='不是录制文件'):
+        Recording.from_bytes(b'XXXX' + bytes(data[4:]))
+    data[20] ^= 0xFF
+    with pytest.raises(ValueError, match='校验失败'):
+        Recording.from_bytes(bytes(data))
+
+
+def test_digest_ignores_key_order():
+    assert state_digest({'a': 1, 'b': [1, 2]}) == state_digest({'b': [1, 2], 'a': 1})
+    assert state_digest({'a': 1}) != state_digest({'a': 2})
@@ -0,0 +1,28 @@
+from harness.rng import Mulberry32, enemy_sequence, find_seed
+
+
+def test_mulberry32_matches_page_script():
+    # 期望值由 node 运行 MULBERRY32 得到
+    rng = Mulberry32(12345)
+    assert [rng.random() for _ in range(3)] == [0.9797282677609473, 0.3067522644996643, 0.484205421525985]
+    rng = Mulberry32(2 ** 32 - 1)
+    assert rng.random() == 0.8964226141106337
+    assert rng.calls == 1
+
+
+def test_find_seed_produces_requested_encounters():
+    wanted = ['ogre', 'ogre', 'wolf', 'goblin']
+    seed = find_seed(wanted)
+    assert enemy_sequence(seed, len(wanted)) == wanted
+    assert all(enemy_sequence(other, len(wanted)) != wanted for other in range(seed))
+
+
+def test_find_seed_accounts_for_draws_between_battles():
+    def make_between():
+        # 每场战斗后再消耗两个随机数
+        return lambda rng, enemy_id: (rng.random(), rng.random())
+
+    wanted = ['wolf', 'goblin', 'ogre']
+    seed = find_seed(wanted, make_between)
+    assert enemy_sequence(seed, 3, make_between()) == wanted
+    assert seed != find_seed(wanted)
@@ -0,0 +1,131 @@
+import json
+import xml.etree.ElementTree as ET
+
+from harness.runner import CaseResult, discover, order_by_history, run, write_json, write_junit
+
+MODULE = '''
+import asyncio
+import time
+from unittest import SkipTest
+
+
+async def test_passes(pool=None):
+    print("通过")
+
+
+async def test_returns_false(pool=None):
+    return False
+
+
+async def test_asserts(pool=None):
+    assert 1 == 2, "不相等"
+
+
+async def test_raises(pool=None):
+    raise RuntimeError("出错")
+
+
+async def test_skips(pool=None):
+    raise SkipTest("没有基准")
+
+
+async def test_waits_too_short(pool=None):
+    await asyncio.wait_for(asyncio.sleep(1), 0.01)
+
+
+async def test_sleeps(pool=None):
+    await asyncio.sleep(30)
+
+
+async def test_blocks(pool=None):
+    time.sleep(30)
+
+
+async def test_helper():
+    pass
+
+
+def test_sync(pool=None):
+    pass
+'''
+
+
+def write_module(tmp_path):
+    (tmp_path / 'test_fake.py').write_text(MODULE, encoding='utf-8')
+    (tmp_path / 'helper.py').write_text('async def test_ignored(pool=None):\n    pass\n', encoding='utf-8')
+
+
+def test_discover_collects_pool_coroutines(tmp_path):
+    write_module(tmp_path)
+    names = [test.name for test in discover(tmp_path)]
+    assert names == ['test_passes', 'test_returns_false', 'test_asserts', 'test_raises', 'test_skips',
+                     'test_waits_too_short', 'test_sleeps', 'test_blocks']
+    assert [test.id for test in discover(tmp_path, ['raises', 'false'])] == [
+        'test_fake::test_returns_false', 'test_fake::test_raises',
+    ]
+
+
+def test_order_by_history(tmp_path):
+    write_module(tmp_path)
+    tests = discover(tmp_path, ['passes', 'raises', 'sleeps'])
+    report = tmp_path / 'report.json'
+    write_json([CaseResult('test_fake', 'test_passes', 'passed', 5.0),
+                CaseResult('test_fake', 'test_raises', 'error', 1.0)], report, 6.0)
+    assert [test.name for test in order_by_history(tests, report)] == ['test_sleeps', 'test_passes', 'test_raises']
+    assert order_by_history(tests, tmp_path / 'missing.json') == tests
+
+
+def test_run_classifies_results_across_workers(tmp_path):
+    write_module(tmp_path)
+    tests = discover(tmp_path)
+    seen = []
+    results = run(tests, workers=3, directory=tmp_path, timeout=1, kill_grace=1, on_result=seen.append)
+
+    assert [result.name for result in results] == [test.name for test in tests]
+    statuses = {result.name: result.status for result in results}
+    assert statuses == {
+        'test_passes': 'passed',
+        'test_returns_false': 'failed',
+        'test_asserts': 'failed',
+        'test_raises': 'error',
+        'test_skips': 'skipped',
+        'test_waits_too_short': 'error',
+        'test_sleeps': 'timeout',
+        'test_blocks': 'timeout',
+    }
+    assert len(seen) == len(tests)
+    by_name = {result.name: result for result in results}
+    assert by_name['test_passes'].output == "通过\n"
+    assert 'RuntimeError: 出错' in by_name['test_raises'].message
+    assert by_name['test_skips'].message == '没有基准'
+    # 测试内部的等待超时不是整个测试超时
+    assert by_name['test_waits_too_short'].message.startswith('TimeoutError')
+    assert 'Traceback' in by_name['test_waits_too_short'].output
+    assert by_name['test_sleeps'].message == '超过 1 秒未完成'
+    assert '工作进程被终止' in by_name['test_blocks'].message
+
+
+def test_reports(tmp_path):
+    results = [
+        CaseResult('test_a', 'test_one', 'passed', 1.5, output='日志\n', worker=0),
+        CaseResult('test_a', 'test_two', 'failed', 0.5, '测试返回 False', worker=1),
+        CaseResult('test_b', 'test_three', 'timeout', 3.0, '超过 3 秒未完成', worker=0),
+        CaseResult('test_b', 'test_four', 'skipped', 0.0, '没有基准', worker=1),
+    ]
+    write_json(results, tmp_path / 'report.json', 3.2)
+    report = json.loads((tmp_path / 'report.json').read_text(encoding='utf-8'))
+    assert report['summary'] == {
+        'total': 4, 'passed': 1, 'failed': 1, 'error': 0, 'timeout': 1, 'skipped': 1, 'wall_time': 3.2,
+        'test_time': 5.0,
+    }
+    assert report['tests'][1]['id'] == 'test_a::test_two'
+
+    write_junit(results, tmp_path / 'report.xml', 3.2)
+    suite = ET.parse(tmp_path / 'report.xml').getroot().find('testsuite')
+    counts = tuple(suite.get(name) for name in ('tests', 'failures', 'errors', 'skipped'))
+    assert counts == ('4', '1', '1', '1')
+    cases = suite.findall('testcase')
+    assert cases[0].find('system-out').text == '日志\n'
+    assert cases[1].find('failure').get('message') == '测试返回 False'
+    assert cases[2].find('error').get('type') == 'timeout'
+    assert cases[3].find('skipped').get('message') == '没有基准'
@@ -0,0 +1,84 @@
+import json
+import subprocess
+
+import pytest
+
+from harness.saves import SAVE_SCENARIOS, STORAGE_KEY, PlayerSave, SaveState, save_scenario
+from sim.battle import default_player
+from sim.rewards import check_level_up, exp_needed
+
+
+class NoRandom:
+    def random(self):
+        return 0.5
+
+
+def test_at_level_matches_repeated_level_ups():
+    player = default_player()
+    for level in range(1, 7):
+        player['experience'] = exp_needed(level)
+        check_level_up(player, NoRandom())
+    built = PlayerSave.at_level(7, unlocked_runes=player['unlockedRunes']).to_js()
+    assert built == player
+
+
+def test_scenarios_are_valid_and_independent():
+    for name in SAVE_SCENARIOS:
+        data = json.loads(save_scenario(name).to_json())
+        assert set(data) == {'player', 'lastScene', 'timestamp'}
+    assert len(save_scenario('level_6_extra_slots').player.spells) == 5
+    first = save_scenario('fresh')
+    first.player.spells[0].append('amp')
+    assert save_scenario('fresh').player.spells[0] == ['firebolt']
+    with pytest.raises(ValueError, match='未知存档场景'):
+        save_scenario('level_99')
+
+
+def test_validate_rejects_unknown_references():
+    with pytest.raises(ValueError, match='未知符文: fireball'):
+        SaveState(PlayerSave(unlocked_runes=['fireball'])).validate()
+    # 升级时提供的中级符文尚未在 data/index.ts 中定义，可以解锁但不能放进卡槽
+    SaveState(PlayerSave(unlocked_runes=['firebolt', 'power'])).validate()
+    with pytest.raises(ValueError, match='未知符文: power'):
+        SaveState(PlayerSave(spells=[['power']], unlocked_runes=['power'])).validate()
+    with pytest.raises(ValueError, match='未知素材'):
+        SaveState(PlayerSave(materials={'dragonScale': 1})).validate()
+    with pytest.raises(ValueError, match='HP/MP'):
+        SaveState(PlayerSave(hp=150)).validate()
+    with pytest.raises(ValueError, match='enemy 和 battle'):
+        SaveState(last_scene='battle').validate()
+
+
+def test_storage_state_uses_page_origin():
+    state = save_scenario('rich_shopper').storage_state('http://127.0.0.1:51234/test/')
+    origin, = state['origins']
+    assert origin['origin'] == 'http://127.0.0.1:51234'
+    assert origin['localStorage'][0]['name'] == STORAGE_KEY
+    assert json.loads(origin['localStorage'][0]['value'])['player']['gold'] == 1000
+
+
+def test_init_script_writes_once_per_tab():
+    script = save_scenario('level_5').init_script()
+    # 用 node 运行 init script 两次，第二次（模拟刷新）不应覆盖游戏自己保存的进度
+    program = f"""
+    const store = () => {{ const data = {{}}; return {{
+        getItem: (key) => key in data ? data[key] : null, setItem: (key, value) => {{ data[key] = String(value); }} }}; }};
+    globalThis.localStorage = store();
+    globalThis.sessionStorage = store();
+    {script};
+    const first = JSON.parse(localStorage.getItem({json.dumps(STORAGE_KEY)}));
+    localStorage.setItem({json.dumps(STORAGE_KEY)}, 'progress');
+    {script};
+    console.log(JSON.stringify([first.player.level, localStorage.getItem({json.dumps(STORAGE_KEY)})]));
+    """
+    try:
+        output = subprocess.run(['node', '-e', program], capture_output=True, text=True, check=True).stdout
+    except FileNotFoundError:
+        pytest.skip('需要 node')
+    assert json.loads(output) == [5, 'progress']
+
+
+def test_from_js_round_trips():
+    for name in SAVE_SCENARIOS:
+        save = save_scenario(name)
+        assert SaveState.from_js(json.loads(save.to_json())) == save
@@ -0,0 +1,119 @@
+import asyncio
+import gzip
+
+import pytest
+
+from harness.pool import BrowserPool
+from harness.server import StaticServer, accepted_encodings, precompress
+
+SCRIPT = b'console.log("game");' * 100
+
+
+def make_dist(root):
+    (root / 'assets').mkdir()
+    (root / 'index.html').write_text('<!doctype html><title>魔法编程冒险</title>', encoding='utf-8')
+    (root / 'assets' / 'index-3f2a9c.js').write_bytes(SCRIPT)
+    (root / 'service-worker.js').write_text('self.addEventListener("install", () => {});', encoding='utf-8')
+    (root / 'manifest.json').write_text('{"name": "魔法编程冒险"}', encoding='utf-8')
+    return root
+
+
+async def fetch(server, path, method='GET', **headers):
+    """发送一个请求，返回 (状态码, 响应头, 响应体)"""
+    reader, writer = await asyncio.open_connection(server.host, server.port)
+    lines = [f"{method} {path} HTTP/1.1", f"Host: {server.host}", "Connection: close"]
+    lines.extend(f"{name.replace('_', '-')}: {value}" for name, value in headers.items())
+    writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode())
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    response = {}
+    while (line := await reader.readline()) not in (b'\r\n', b''):
+        name, _, value = line.decode().partition(':')
+        response[name.strip().lower()] = value.strip()
+    body = await reader.read()
+    writer.close()
+    return status, response, body
+
+
+def serve(root, *requests):
+    async def main():
+        async with StaticServer(root) as server:
+            assert server.ready.is_set() and server.port != 0
+            assert server.url == f"http://127.0.0.1:{server.port}/test/"
+            return [await fetch(server, *args, **kwargs) for args, kwargs in requests]
+    return asyncio.run(main())
+
+
+def test_serves_dist_with_cache_headers(tmp_path):
+    root = make_dist(tmp_path)
+    index, asset, worker, missing, escape, redirect = serve(
+        root,
+        (('/test/',), {}),
+        (('/test/assets/index-3f2a9c.js',), {}),
+        (('/service-worker.js',), {}),
+        (('/test/assets/missing.js',), {}),
+        (('/test/../../etc/passwd',), {}),
+        (('/test',), {}),
+    )
+    assert index[0] == 200 and '魔法编程冒险' in index[2].decode()
+    assert index[1]['content-type'] == 'text/html; charset=utf-8' and index[1]['cache-control'] == 'no-cache'
+    assert asset[1]['cache-control'] == 'public, max-age=31536000, immutable'
+    assert asset[1]['content-type'].startswith('text/javascript') and asset[2] == SCRIPT
+    assert worker[0] == 200 and worker[1]['cache-control'] == 'no-cache'
+    assert missing[0] == 404 and escape[0] == 404
+    assert redirect[0] == 301 and redirect[1]['location'] == '/test/'
+
+
+def test_precompressed_variants_and_revalidation(tmp_path):
+    root = make_dist(tmp_path)
+    assert precompress(root) >= 1
+    assert precompress(root) == 0
+    assert gzip.decompress((root / 'assets' / 'index-3f2a9c.js.gz').read_bytes()) == SCRIPT
+    # index.html 小于阈值，不压缩
+    assert not (root / 'index.html.gz').exists()
+
+    path = '/test/assets/index-3f2a9c.js'
+    compressed, plain, refused = serve(
+        root,
+        ((path,), {'Accept_Encoding': 'br, gzip;q=0.8'}),
+        ((path,), {}),
+        ((path,), {'Accept_Encoding': 'gzip;q=0'}),
+    )
+    encoding = compressed[1]['content-encoding']
+    assert encoding in ('br', 'gzip') and compressed[1]['vary'] == 'Accept-Encoding'
+    if encoding == 'gzip':
+        assert gzip.decompress(compressed[2]) == SCRIPT
+    assert 'content-encoding' not in plain[1] and plain[2] == SCRIPT
+    assert 'content-encoding' not in refused[1]
+
+    etag = plain[1]['etag']
+    head, revalidated = serve(root, ((path, 'HEAD'), {}), ((path,), {'If_None_Match': etag}))
+    assert head[0] == 200 and head[2] == b'' and head[1]['content-length'] == str(len(SCRIPT))
+    assert revalidated[0] == 304 and revalidated[2] == b''
+
+
+def test_accept_encoding_parsing():
+    assert accepted_encodings('gzip, deflate, br') == {'gzip', 'deflate', 'br'}
+    assert accepted_encodings('br;q=0, gzip;q=0.5') == {'gzip'}
+    assert accepted_encodings('') == set()
+
+
+def test_missing_build_is_reported(tmp_path):
+    with pytest.raises(FileNotFoundError, match='npm run build'):
+        asyncio.run(StaticServer(tmp_path).start())
+
+
+class FakeGamePage:
+    def __init__(self, has_game):
+        self.has_game = has_game
+
+    async def evaluate(self, script):
+        return self.has_game
+
+
+def test_pool_rejects_dist_without_dev_globals(tmp_path):
+    pool = BrowserPool(dist=tmp_path)
+    with pytest.raises(RuntimeError, match='--build'):
+        asyncio.run(pool._check_dist(FakeGamePage(False)))
+    asyncio.run(pool._check_dist(FakeGamePage(True)))
+    assert pool._dist_checked
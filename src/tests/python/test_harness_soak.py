@@ -0,0 +1,97 @@
+import asyncio
+import json
+
+from harness.soak import (
+    SoakSample,
+    diff_heap_summaries,
+    fit_growth,
+    summarize_heap_snapshot,
+    take_heap_summary,
+    worst_interval,
+)
+
+# 三个字段的简化节点：type, name, self_size
+SNAPSHOT = {
+    'snapshot': {'meta': {
+        'node_fields': ['type', 'name', 'self_size'],
+        'node_types': [['hidden', 'array', 'string', 'object', 'closure']],
+    }},
+    'nodes': [
+        3, 0, 40,   # BattleLogEntry
+        3, 0, 40,   # BattleLogEntry
+        3, 1, 24,   # Array
+        4, 2, 32,   # listener 闭包
+        1, 1, 100,  # (array)，名称不参与汇总
+        2, 3, 16,   # (string)
+    ],
+    'strings': ['BattleLogEntry', 'Array', 'listener', '战斗开始'],
+}
+
+
+def samples(heap_slope, nodes_slope=0.0, battles=50):
+    return [SoakSample(battle, 1_000_000 + heap_slope * battle, int(2000 + nodes_slope * battle), 40, 1)
+            for battle in range(1, battles + 1)]
+
+
+def test_fit_growth_flags_slopes_over_threshold():
+    fits = {fit.metric: fit for fit in fit_growth(samples(heap_slope=1024), warmup=10)}
+    assert abs(fits['heap_used'].slope - 1024) < 1e-6 and fits['heap_used'].passed
+    assert abs(fits['listeners'].slope) < 1e-9
+
+    leaking = {fit.metric: fit for fit in fit_growth(samples(heap_slope=0, nodes_slope=3))}
+    assert not leaking['nodes'].passed and leaking['heap_used'].passed
+    assert fit_growth(samples(0, battles=5), warmup=10) == []
+
+
+def test_fit_growth_ignores_warmup():
+    # 预热阶段的一次性增长不计入斜率
+    data = samples(heap_slope=0)
+    for sample in data[:10]:
+        sample.heap_used -= 500_000
+    fits = {fit.metric: fit for fit in fit_growth(data, warmup=10)}
+    assert abs(fits['heap_used'].slope) < 1e-6
+
+
+def test_heap_summary_and_diff():
+    summary = summarize_heap_snapshot(SNAPSHOT)
+    assert summary == {
+        'BattleLogEntry': (2, 80),
+        'Array': (1, 24),
+        'listener': (1, 32),
+        '(array)': (1, 100),
+        '(string)': (1, 16),
+    }
+    grown = dict(summary, BattleLogEntry=(12, 480), listener=(3, 96))
+    del grown['(string)']
+    diffs = diff_heap_summaries(summary, grown)
+    assert [(item.label, item.count, item.size) for item in diffs] == [
+        ('BattleLogEntry', 10, 400), ('listener', 2, 64), ('(string)', -1, -16),
+    ]
+
+
+def test_worst_interval_uses_snapshot_pairs():
+    data = samples(heap_slope=0)
+    data[29].heap_used += 300_000  # 第 30 场
+    assert worst_interval(data, {10: {}, 30: {}, 50: {}}) == (10, 30)
+    assert worst_interval(data, {10: {}}) is None
+
+
+def test_take_heap_summary_collects_chunks():
+    class FakeSession:
+        def __init__(self):
+            self.listeners = {}
+
+        def on(self, event, callback):
+            self.listeners[event] = callback
+
+        def remove_listener(self, event, callback):
+            assert self.listeners.pop(event) is callback
+
+        async def send(self, method, params=None):
+            text = json.dumps(SNAPSHOT)
+            for start in range(0, len(text), 50):
+                self.listeners['HeapProfiler.addHeapSnapshotChunk']({'chunk': text[start:start + 50]})
+
+    session = FakeSession()
+    assert asyncio.run(take_heap_summary(session))['BattleLogEntry'] == (2, 80)
+    assert session.listeners == {}
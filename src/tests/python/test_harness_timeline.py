@@ -0,0 +1,79 @@
+import base64
+
+import numpy as np
+
+from harness.timeline import (
+    ACTORS,
+    COLUMNS,
+    PHASES,
+    Timeline,
+    _decode,
+    check_timeline,
+)
+from sim.atb import update_atb
+
+PREPARATION, ACTION = PHASES.index('preparation'), PHASES.index('action')
+
+
+def _simulate(dts, player_speed=12, enemy_speed=10, rule=update_atb):
+    """按 updatePreparationPhase 的规则生成时间线；轮到某一方行动后立即把它的 ATB 清零"""
+    rows = []
+    player = enemy = 0.0
+    now = 0.0
+    for dt in dts:
+        now += dt * 1000
+        player_after = rule(player_speed, dt, player)
+        enemy_after = rule(enemy_speed, dt, enemy)
+        phase, actor = PREPARATION, ACTORS.index(None)
+        if player_after >= 100:
+            phase, actor = ACTION, ACTORS.index('player')
+        elif enemy_after >= 100:
+            phase, actor = ACTION, ACTORS.index('enemy')
+        rows.append([now, dt, player, enemy, player_after, enemy_after, PREPARATION, phase, actor, 0, 0,
+                     player_speed, enemy_speed])
+        player = 0.0 if actor == 1 else player_after
+        enemy = 0.0 if actor == 2 else enemy_after
+    return Timeline(np.array(rows, dtype=np.float64))
+
+
+def _jittered(count=600, seed=0):
+    return np.random.default_rng(seed).uniform(0.008, 0.034, count)
+
+
+def test_decode_matches_js_layout():
+    frames = np.arange(2 * len(COLUMNS), dtype='<f8').reshape(2, -1)
+    decoded = _decode(base64.b64encode(frames.tobytes()).decode())
+    assert np.array_equal(decoded, frames)
+    assert Timeline(decoded).enemy_speed.tolist() == [12.0, 25.0]
+
+
+def test_conforming_timeline_passes():
+    timeline = _simulate(_jittered())
+    report = check_timeline(timeline)
+    assert report.passed, report.violations
+    assert report.frames == 600 and report.max_drift < 1e-9
+    assert np.count_nonzero(timeline.phase_after == ACTION) > 5
+
+
+def test_detects_drift_overshoot_and_missed_transition():
+    def leaky(speed, dt, atb):
+        return min(atb + 0.98 * (200 * speed / 10 * dt * 10) / 60, 100)
+
+    report = check_timeline(_simulate(_jittered(), rule=leaky))
+    assert report.counts['drift'] > 0 and not report.passed
+
+    timeline = _simulate(_jittered())
+    frames = timeline.frames.copy()
+    ready = np.flatnonzero(frames[:, COLUMNS.index('actor_after')] == 1)[0]
+    frames[ready, COLUMNS.index('phase_after')] = PREPARATION
+    frames[ready + 1, COLUMNS.index('enemy_after')] = -0.5
+    counts = check_timeline(Timeline(frames)).counts
+    assert counts['missed_transition'] == 1 and counts['overshoot'] == 1
+
+
+def test_long_frame_turn_order():
+    # 0.6s 的长帧内双方都充满：玩家从 80 需要 0.5s，敌人从 95 只需 0.125s，按 updatePreparationPhase 的顺序却轮到玩家
+    row = [600.0, 0.6, 80, 95, 100, 100, PREPARATION, ACTION, ACTORS.index('player'), 0, 0, 12, 12]
+    report = check_timeline(Timeline(np.array([row], dtype=np.float64)))
+    assert [violation.kind for violation in report.violations] == ['long_frame', 'turn_order']
+    assert not report.passed
@@ -0,0 +1,80 @@
+import asyncio
+import json
+
+import pytest
+
+from harness.runner import discover, run, trace_path
+from harness.trace import HARNESS_PID, current_tracer, format_trace_summary, span, traced, tracing
+
+
+@traced('action.double', lambda value: {'value': value})
+async def double(value):
+    with span('inner'):
+        await asyncio.sleep(0.01)
+    return value * 2
+
+
+@traced(lambda marker: f'wait {marker}')
+async def fail(marker):
+    raise ValueError(marker)
+
+
+class FakePage:
+    async def evaluate(self, script):
+        return {
+            'now': 1000.0,
+            'navigation': {'dns': [0, 0], 'domContentLoaded': [200.0, 210.0], 'load': [0, 0]},
+            'paint': [{'name': 'first-paint', 'startTime': 150.0, 'duration': 0}],
+            'marks': [{'name': 'battle-start', 'startTime': 900.0, 'duration': 0}],
+            'measures': [{'name': 'battle', 'startTime': 900.0, 'duration': 80.0}],
+        }
+
+
+def test_traced_records_nested_spans():
+    async def scenario():
+        assert await double(2) == 4
+        with tracing('case') as tracer:
+            assert current_tracer() is tracer
+            assert await double(3) == 6
+            with pytest.raises(ValueError):
+                await fail('marker')
+            await tracer.import_page(FakePage())
+        assert current_tracer() is None
+        return tracer
+
+    tracer = asyncio.run(scenario())
+    spans = {event['name']: event for event in tracer.events if event['ph'] == 'X' and event['pid'] == HARNESS_PID}
+    assert set(spans) == {'action.double', 'inner', 'wait marker'}
+    outer, inner = spans['action.double'], spans['inner']
+    assert outer['args'] == {'value': 3} and spans['wait marker']['args'] == {'error': 'ValueError'}
+    assert outer['ts'] <= inner['ts'] and inner['ts'] + inner['dur'] <= outer['ts'] + outer['dur']
+    assert inner['dur'] >= 10_000
+
+    # 页面时间对齐：页面在 now=1000ms 时的 measure 落在 harness 时钟上的导入时刻之前约 100ms
+    page = {event['name']: event for event in tracer.events if event['pid'] != HARNESS_PID and event['ph'] != 'M'}
+    assert set(page) == {'domContentLoaded', 'first-paint', 'battle-start', 'battle'}
+    assert page['battle']['dur'] == 80_000
+    assert page['battle-start']['ts'] - page['first-paint']['ts'] == pytest.approx(750_000)
+    assert page['battle']['ts'] > outer['ts'] - 200_000
+
+    assert [entry.name for entry in tracer.summary()][:2] == ['battle', 'action.double']
+    assert format_trace_summary(tracer).splitlines()[1].startswith('battle')
+    names = {event['args']['name'] for event in tracer.to_json()['traceEvents'] if event['ph'] == 'M'}
+    assert 'harness: case' in names and 'page 1' in names
+
+
+def test_runner_writes_trace_per_test(tmp_path):
+    (tmp_path / 'test_traced.py').write_text(
+        'import asyncio\n'
+        'from harness.trace import span\n\n\n'
+        'async def test_steps(pool=None):\n'
+        '    with span("step"):\n'
+        '        await asyncio.sleep(0.05)\n',
+        encoding='utf-8')
+    tests = discover(tmp_path)
+    [result] = run(tests, workers=1, directory=tmp_path, timeout=10, trace_dir=tmp_path / 'traces')
+    assert result.passed
+    trace = json.loads(trace_path(tmp_path / 'traces', tests[0]).read_text(encoding='utf-8'))
+    [step] = [event for event in trace['traceEvents'] if event['name'] == 'step']
+    assert step['dur'] >= 50_000
+    assert 'step' in result.output and '跟踪文件' in result.output
@@ -0,0 +1,64 @@
+import asyncio
+
+import numpy as np
+
+from harness.png import encode_png
+from harness.visual import GoldenStore, VisualChecker, build_mask, diff_images, pixel_digest
+
+
+def _screen(color=(240, 240, 240)):
+    pixels = np.empty((60, 80, 3), dtype=np.uint8)
+    pixels[:] = color
+    pixels[10:20, 10:50] = (30, 30, 30)
+    return pixels
+
+
+def test_diff_tolerance_and_mask():
+    expected = _screen()
+    noisy = expected.copy()
+    noisy[0:5] += 3  # 字体渲染级别的细微差别
+    assert diff_images(expected, noisy).changed == 0
+
+    actual = expected.copy()
+    actual[40:45, 60:70] = (200, 0, 0)
+    diff = diff_images(expected, actual, highlight=True)
+    assert diff.changed == 50 and diff.bbox == (60, 40, 70, 45)
+    assert tuple(diff.highlight[42, 65]) == (255, 0, 0)
+
+    mask = build_mask(expected.shape, [(59.5, 39.2, 70, 45)])
+    masked = diff_images(expected, actual, mask)
+    assert masked.changed == 0 and masked.total == 80 * 60 - 11 * 6
+    assert pixel_digest(expected, mask) == pixel_digest(actual, mask) != pixel_digest(actual)
+
+
+def test_checker_skips_io_for_unchanged_screens(tmp_path):
+    pixels = _screen()
+    png = encode_png(pixels)
+    rects = [(0, 0, 5, 5)]
+
+    async def check(checker, image):
+        checker.submit('camp@desktop', image, rects)
+        return (await checker.results())[0]
+
+    store = GoldenStore(tmp_path / 'goldens')
+    with VisualChecker(store, diff_dir=tmp_path / 'diffs') as checker:
+        assert asyncio.run(check(checker, png)).status == 'missing'
+        assert (tmp_path / 'diffs' / 'camp-desktop' / 'actual.png').is_file()
+        checker.update = True
+        assert asyncio.run(check(checker, png)).status == 'updated'
+        assert store.writes == 1 and store.manifest_path.is_file()
+
+    store = GoldenStore(tmp_path / 'goldens')
+    with VisualChecker(store, diff_dir=tmp_path / 'diffs') as checker:
+        # 遮罩内的变化不影响哈希
+        dynamic = pixels.copy()
+        dynamic[0:5, 0:5] = 0
+        assert asyncio.run(check(checker, encode_png(dynamic))).status == 'unchanged'
+        assert (store.reads, store.writes) == (0, 0)
+
+        changed = pixels.copy()
+        changed[30:60] = (0, 0, 255)
+        result = asyncio.run(check(checker, encode_png(changed)))
+        assert result.status == 'changed' and result.diff.changed == 30 * 80
+        assert store.reads == 1
+        assert (tmp_path / 'diffs' / 'camp-desktop' / 'diff.png').is_file()
@@ -0,0 +1,118 @@
+import asyncio
+
+import pytest
+
+from harness import ConsoleMarkers, start_battle
+from harness.logs import BattleEnd
+
+
+class FakeMessage:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakePage:
+    def __init__(self):
+        self.listeners = []
+
+    def on(self, event, callback):
+        self.listeners.append(callback)
+
+    def emit(self, text):
+        for callback in self.listeners:
+            callback(FakeMessage(text))
+
+
+def test_wait_for_resolves_on_later_message():
+    async def scenario():
+        page = FakePage()
+        markers = ConsoleMarkers(page)
+        loop = asyncio.get_running_loop()
+        loop.call_later(0.01, page.emit, '[BATTLE] 遇到了 恶狼 (HP: 60, MaxHP: 60, DMG: 8, Speed: 8)')
+        return await markers.wait_for('[BATTLE] 遇到了', timeout=1)
+
+    assert asyncio.run(scenario()).startswith('[BATTLE] 遇到了 恶狼')
+
+
+def test_wait_for_respects_since():
+    async def scenario():
+        page = FakePage()
+        markers = ConsoleMarkers(page)
+        page.emit('[EVENT] 结束战斗，结果: 失败')
+        since = markers.mark()
+        page.emit('[EVENT] 结束战斗，结果: 胜利')
+        old = await markers.wait_for('[EVENT] 结束战斗', since=0, timeout=1)
+        new = await markers.wait_for('[EVENT] 结束战斗', since=since, timeout=1)
+        return old, new
+
+    old, new = asyncio.run(scenario())
+    assert old.endswith('失败')
+    assert new.endswith('胜利')
+
+
+def test_wait_for_times_out():
+    async def scenario():
+        markers = ConsoleMarkers(FakePage())
+        await markers.wait_for('[SCENE] 切换到营地场景', timeout=0.01)
+
+    with pytest.raises(TimeoutError):
+        asyncio.run(scenario())
+
+
+
+def test_markers_share_bounded_log_stream():
+    async def scenario():
+        page = FakePage()
+        markers = ConsoleMarkers(page, capacity=10)
+        for index in range(100):
+            page.emit(f'[ENEMY] 第 {index} 条')
+        page.emit('[EVENT] 结束战斗，结果: 胜利')
+        return markers, await markers.wait_for('[EVENT] 结束战斗', since=95, timeout=1)
+
+    markers, text = asyncio.run(scenario())
+    assert text.endswith('胜利')
+    assert markers.mark() == 101 and len(markers.logs) == 10
+    assert markers.texts(95)[0] == '[ENEMY] 第 95 条'
+    assert len(markers.texts(0)) == 10
+    assert markers.logs.last(BattleEnd).victory
+
+class FakeElement:
+    def __init__(self, page, selector):
+        self.page = page
+        self.selector = selector
+
+    async def click(self):
+        await self.page.click(self.selector)
+
+
+class FakeCampPage(FakePage):
+    """模拟营地的标签页：只有激活的 .tab-content 中的按钮可见"""
+
+    def __init__(self):
+        super().__init__()
+        self.active_tab = 'magic'
+        self.clicks = []
+
+    async def click(self, selector, timeout=None):
+        self.clicks.append(selector)
+        if selector.startswith('.tab-button'):
+            self.active_tab = selector.split('"')[1]
+        elif selector == '#start-battle-btn':
+            self.emit('[BATTLE] 遇到了 恶狼 (HP: 60, MaxHP: 60, DMG: 8, Speed: 8)')
+
+    async def wait_for_selector(self, selector, timeout=None):
+        if selector in ('#start-battle-btn', '#rest-btn') and self.active_tab != 'adventure':
+            raise TimeoutError(f"{selector} 不可见")
+        if selector.startswith('.tab-content') and f'"{self.active_tab}"' not in selector:
+            raise TimeoutError(f"{selector} 未激活")
+        return FakeElement(self, selector)
+
+
+def test_start_battle_opens_adventure_tab():
+    async def scenario():
+        page = FakeCampPage()
+        return page, await start_battle(page, ConsoleMarkers(page), timeout=1)
+
+    page, enemy = asyncio.run(scenario())
+    assert enemy == '恶狼'
+    assert page.clicks == ['.tab-button[data-tab="adventure"]', '#start-battle-btn']
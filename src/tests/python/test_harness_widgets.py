@@ -0,0 +1,73 @@
+import asyncio
+
+from harness import ConsoleMarkers, cast_first_available, cast_spell
+from harness.widgets import shop_items, spell_buttons
+
+BUTTONS = {
+    'mp': 12,
+    'buttons': [
+        {'index': 0, 'text': '火球 (MP: 10)', 'visible': True, 'disabled': False},
+        {'index': 1, 'text': '⚠️ 强化火球 (MP: 13)', 'visible': True, 'disabled': False},
+        {'index': 2, 'text': '治疗 (MP: 15)', 'visible': False, 'disabled': True},
+    ],
+}
+
+
+class FakeLocator:
+    def __init__(self, page, selector):
+        self.page = page
+        self.selector = selector
+
+    async def click(self, timeout=None):
+        self.page.clicked.append(self.selector)
+        for callback in self.page.listeners:
+            callback(type('Message', (), {'text': 'Start cast result: true'}))
+
+
+class FakePage:
+    def __init__(self, result):
+        self.result = result
+        self.evaluations = 0
+        self.clicked = []
+        self.listeners = []
+
+    def on(self, event, callback):
+        self.listeners.append(callback)
+
+    async def evaluate(self, script):
+        self.evaluations += 1
+        return self.result
+
+    def locator(self, selector):
+        return FakeLocator(self, selector)
+
+
+def test_spell_bar_parses_buttons_in_one_round_trip():
+    page = FakePage(BUTTONS)
+    bar = asyncio.run(spell_buttons(page))
+    assert page.evaluations == 1
+    assert [(b.name, b.cost, b.interrupt_warning) for b in bar.buttons] == [
+        ('火球', 10, False), ('强化火球', 13, True), ('治疗', 15, False),
+    ]
+    assert [button.index for button in bar.castable()] == [0]
+
+
+def test_shop_items_parse_price():
+    page = FakePage([{'materialId': 'wolfFang', 'name': '狼牙', 'price': '价格: 15 金币', 'visible': True, 'disabled': False}])
+    [item] = asyncio.run(shop_items(page))
+    assert (item.material_id, item.name, item.price) == ('wolfFang', '狼牙', 15)
+
+
+def test_cast_skips_unaffordable_and_clicks_through_locator():
+    async def scenario():
+        page = FakePage(BUTTONS)
+        markers = ConsoleMarkers(page)
+        # MP不足和不可见的按钮不点击
+        assert not await cast_spell(page, markers, 1)
+        assert not await cast_spell(page, markers, 2)
+        assert not await cast_spell(page, markers, 5)
+        assert page.clicked == []
+        assert await cast_first_available(page, markers) == 0
+        return page.clicked
+
+    assert asyncio.run(scenario()) == ['.spell-button[data-spell-index="0"]']
@@ -0,0 +1,72 @@
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+
+from harness import ConsoleMarkers, cast_first_available, rest, save_scenario, session, start_battle
+from harness.clock import IN_CAMP, PLAYER_TURN
+from harness.replay import Recording, format_replay_result, record, replay, replay_corpus
+
+# 回归语料目录：出现难以复现的问题时，把录制文件放到这里
+CORPUS_DIR = Path(__file__).resolve().parent / 'recordings'
+
+async def _play_session(page, clock):
+    """录制的操作：打一场狼、回营地休息、在商店买一个素材"""
+    markers = ConsoleMarkers(page)
+    await start_battle(page, markers, 'wolf')
+    while True:
+        await clock.run_until(page, PLAYER_TURN)
+        if not await page.evaluate('() => window.game.state.battle.active'):
+            break
+        if await cast_first_available(page, markers) is None:
+            await page.click('#retreat-button')
+            break
+    await clock.run_until(page, IN_CAMP)
+    await rest(page, markers)
+    await page.click('.tab-button[data-tab="shop"]')
+    await page.locator('.buy-btn').first.click()
+    await clock.advance(1.0)
+
+async def test_record_and_replay(pool=None, seed=1, speed=4.0):
+    """录制一段操作，保存为二进制文件后分别按倍速和尽快回放，最终状态应与录制时一致"""
+    async with session(pool, headless=True) as pool:
+        print("=== 录制回放测试 ===")
+        recording = await record(pool, _play_session, seed, save_scenario('rich_shopper'))
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / f'session{seed}.mcr'
+            recording.save_to(path)
+            size = path.stat().st_size
+            recording = Recording.load(path)
+        duration = (recording.end - recording.start) / 1000
+        print(f"录制: {len(recording.events)} 个操作, {duration:.1f}s 游戏时间, 文件 {size} 字节")
+        for event in recording.events:
+            print(f"  {event.time - recording.start:>7}ms {event.action} {event.arg if event.arg is not None else ''}")
+
+        passed = True
+        for label, replay_speed in ((f"{speed:g} 倍速", speed), ("尽快", None)):
+            started = time.perf_counter()
+            result = await replay(pool, recording, replay_speed, name=label)
+            print(f"{format_replay_result(result)}, 耗时 {time.perf_counter() - started:.1f}s")
+            passed = passed and result.passed
+        print(f"=== 录制回放测试{'通过' if passed else '未通过'} ===")
+        return passed
+
+async def test_replay_corpus(pool=None, directory=CORPUS_DIR, concurrency=4):
+    """并行回放回归语料中的所有录制"""
+    async with session(pool, headless=True) as pool:
+        print("=== 回归语料回放 ===")
+        if not Path(directory).is_dir() or not any(Path(directory).glob('*.mcr')):
+            print(f"{directory} 中没有录制文件")
+            return True
+        started = time.perf_counter()
+        results = await replay_corpus(pool, directory, concurrency=concurrency,
+                                      on_result=lambda result: print(format_replay_result(result)))
+        failed = [result for result in results if not result.passed]
+        print(f"\n共 {len(results)} 个录制, {len(failed)} 个不一致, 耗时 {time.perf_counter() - started:.1f}s")
+        print(f"=== 回归语料回放{'通过' if not failed else '未通过'} ===")
+        return not failed
+
+if __name__ == "__main__":
+    asyncio.run(test_record_and_replay())
+    # 可选：回放 recordings/ 下的所有录制
+    # asyncio.run(test_replay_corpus())
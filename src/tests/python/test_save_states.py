@@ -0,0 +1,78 @@
+import asyncio
+import time
+
+from harness import (
+    ConsoleMarkers,
+    SeededRandom,
+    VirtualClock,
+    cast_first_available,
+    game_page,
+    refresh_ui,
+    save_scenario,
+    snapshot,
+    start_battle,
+)
+from harness.clock import IN_CAMP, PLAYER_TURN
+from harness.logs import LevelUp, RuneChoice
+from harness.saves import SAVE_SCENARIOS
+
+async def test_save_scenarios(pool=None):
+    """逐个载入预置存档，检查读档后的玩家状态与存档一致"""
+    print("=== 预置存档测试 ===")
+    mismatches = 0
+    for name in SAVE_SCENARIOS:
+        save = save_scenario(name)
+        started = time.perf_counter()
+        async with game_page(pool, setup=[save]) as page:
+            await refresh_ui(page)
+            player = (await snapshot(page)).player
+            elapsed = time.perf_counter() - started
+
+            expected = save.player
+            actual = (player.level, player.gold, player.max_hp, len(player.spells), sorted(player.unlocked_runes))
+            wanted = (expected.level, expected.gold, expected.max_hp, len(expected.spells),
+                      sorted(expected.unlocked_runes))
+            status = "一致" if actual == wanted else "不一致"
+            print(f"{name}: {status}, 等级 {player.level}, 金币 {player.gold}, 卡槽 {len(player.spells)}, "
+                  f"载入耗时 {elapsed:.2f}s")
+            if actual != wanted:
+                mismatches += 1
+                print(f"  预期: {wanted}")
+                print(f"  实际: {actual}")
+
+    print(f"\n共 {len(SAVE_SCENARIOS)} 个存档，{mismatches} 个不一致")
+    print("=== 预置存档测试完成 ===")
+    return mismatches == 0
+
+async def test_level_5_rune_choice(pool=None, seed=1):
+    """从差 1 点经验升到 5 级的存档开始，赢一场战斗后符文选项应包含中级符文"""
+    clock = VirtualClock()
+    async with game_page(pool, setup=[save_scenario('about_to_reach_level_5'), SeededRandom(seed), clock]) as page:
+        print("=== 5 级符文解锁测试 ===")
+        await refresh_ui(page)
+        markers = ConsoleMarkers(page)
+        logs = markers.logs
+
+        await start_battle(page, markers, 'wolf')
+        while True:
+            await clock.run_until(page, PLAYER_TURN)
+            if not (await snapshot(page)).battle.active:
+                break
+            if await cast_first_available(page, markers) is None:
+                print("没有可用的法术")
+                return False
+        await clock.run_until(page, IN_CAMP)
+
+        level_up = logs.last(LevelUp)
+        choice = logs.last(RuneChoice)
+        print(f"升级: {level_up.text if level_up else '无'}")
+        print(f"符文选项: {choice.choices if choice else '无'}")
+        passed = (level_up is not None and level_up.level_after == 5 and choice is not None
+                  and set(choice.choices) <= {'double', 'power', 'haste', 'regen'} and len(choice.choices) == 3)
+        print(f"=== 5 级符文解锁测试{'通过' if passed else '未通过'} ===")
+        return passed
+
+if __name__ == "__main__":
+    asyncio.run(test_save_scenarios())
+    # 可选：验证 5 级时的符文选项
+    # asyncio.run(test_level_5_rune_choice())
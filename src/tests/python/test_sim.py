@@ -0,0 +1,239 @@
+import asyncio
+import random
+
+import numpy as np
+import pytest
+
+from sim import DEFAULT_RULES, ENEMIES, MATERIALS, RUNES, Battle, Rules, calculate_spell, default_player, simulate
+from sim.battle import random_enemy_id
+from sim.catalogue import METRICS, SpellCatalogue, distinct_spells, enumerate_chains
+from sim.data import load_game_config, parse_ts_objects
+from sim.differential import differential_test, exhaustive_chains, random_chains, spell_row
+from sim.economy import battles_to_afford, battles_to_level, drop_probability, material_counts
+from sim.explorer import DEFEAT, VICTORY, explore_battle, explore_enemies
+from sim.montecarlo import Distribution, drop_distribution, enemy_distribution, enemy_index, skill_index
+from sim.rewards import exp_needed, random_sort, v8_sort
+from sim.tuning import REFERENCE_LOADOUTS, format_presets_ts, tune
+
+
+def test_data_is_read_from_typescript():
+    assert list(ENEMIES) == ['wolf', 'goblin', 'ogre']
+    assert RUNES['amp']['dmgMult'] == 1.5
+    assert ENEMIES['ogre']['drops'] == ['ogreTooth', 'fireEssence', 'iceEssence']
+
+
+def test_calculate_spell_matches_calculator_ts():
+    assert calculate_spell(['firebolt']).name == '火球'
+    spell = calculate_spell(['amp', 'firebolt'])
+    assert (spell.name, spell.cost, spell.dmg, spell.heal) == ('强化火球', 13, 38, 0)
+    assert spell.time == 0.8 + 0.5
+    assert calculate_spell([]).name == '无效法术'
+    assert calculate_spell(['invalid', 'firebolt']).name == 'invalid火球'
+
+
+def test_calculate_spell_quirks():
+    # 只有最后一个 count 修饰符生效
+    assert calculate_spell(['double', 'double', 'firebolt']).dmg == 50
+    # 末尾没有核心符的修饰符被丢弃，但仍出现在名称中
+    spell = calculate_spell(['firebolt', 'amp'])
+    assert (spell.dmg, spell.cost, spell.name) == (25, 10, '火球强化')
+    # 治疗不受 dmgMult 影响
+    assert calculate_spell(['amp', 'heal']).heal == 30
+
+
+def test_v8_sort_matches_known_comparator_calls():
+    calls = []
+
+    def compare(a, b):
+        calls.append((a, b))
+        return a - b
+
+    assert v8_sort([3, 1, 2], compare) == [1, 2, 3]
+    assert calls == [(1, 3), (2, 1), (2, 3), (2, 1)]
+    assert sorted(random_sort(['iceShard', 'quick', 'double'], random.Random(1))) == ['double', 'iceShard', 'quick']
+
+
+def test_exp_needed():
+    assert [exp_needed(level) for level in (1, 2, 5)] == [100, 229, 689]
+
+
+def test_fast_path_matches_frame_by_frame_reference():
+    class FrameByFrame(Battle):
+        def _advance_preparation(self, max_frames):
+            self.step()
+
+    for seed in range(50):
+        fast = simulate(rng=random.Random(seed))
+        rng = random.Random(seed)
+        slow = FrameByFrame(default_player(), random_enemy_id(rng), rng).run()
+        assert fast == slow
+
+
+def test_battle_is_deterministic_and_winnable():
+    result = simulate('wolf', rng=random.Random(0))
+    assert result.victory is True
+    assert result.casts == [0, 0, 0]
+    assert result.enemy_hp <= 0
+    assert result.rewards['gold'] == ENEMIES['wolf']['gold']
+    assert simulate('wolf', rng=random.Random(0)) == result
+
+
+def test_stalls_when_player_stops_acting():
+    result = simulate('ogre', policy=lambda battle: None, rng=random.Random(0))
+    assert result.victory is None
+    assert result.casts == []
+
+
+def test_vectorized_draws_match_js_arithmetic():
+    assert enemy_index([0, 0.3333, 0.3333333333333333, 0.9999999999999999], 3).tolist() == [0, 0, 1, 2]
+    # 余量恰好为 0 时选中当前技能
+    assert skill_index([0.2, 0.2000001, 0.0], [0.2, 0.8]).tolist() == [0, 1, 0]
+    assert skill_index([0.999], [1, 1, 1]).tolist() == [2]
+
+
+def test_monte_carlo_chi_square_verdict():
+    rng = np.random.default_rng(0)
+    assert enemy_distribution(300_000, rng).chi_square().passed
+    drops = drop_distribution(ENEMIES['ogre'], 300_000, rng)
+    assert drops.labels[0] == () and drops.expected.sum() == 1
+    assert drops.chi_square().passed
+
+    biased = Distribution(['a', 'b'], np.array([5200, 4800]), np.array([0.5, 0.5]))
+    assert not biased.chi_square().passed
+    low, high = biased.confidence_intervals()
+    assert low[0] < 0.52 < high[0] and high[1] < 0.5
+
+
+def test_enumerated_chains_match_calculate_spell():
+    chains = list(enumerate_chains(max_length=4))
+    assert chains[0][0] == ('firebolt',)
+    assert all(spell == calculate_spell(list(chain)) for chain, spell in chains)
+    # 末尾的修饰符不影响属性，不计入
+    assert [chain for chain, _ in enumerate_chains(['amp', 'firebolt'], 2)] == [('amp', 'firebolt'), ('firebolt',), ('firebolt', 'firebolt')]
+
+
+def test_distinct_spells_cover_every_chain():
+    chains = list(enumerate_chains(max_length=5))
+    entries = distinct_spells(max_length=5)
+    assert sum(entry.variants for entry in entries) == len(chains)
+    assert all(entry.spell == calculate_spell(list(entry.chain)) for entry in entries)
+    assert {(s.cost, s.dmg, s.heal) for _, s in chains} == {(e.spell.cost, e.spell.dmg, e.spell.heal) for e in entries}
+
+
+def test_differential_test_batches_and_minimizes():
+    class FakePage:
+        """用 calculate_spell 代替页面中的 calculateSpell"""
+        calls = 0
+
+        async def evaluate(self, script, chains):
+            self.calls += 1
+            return [list(spell_row(calculate_spell(chain))) for chain in chains]
+
+    # 模型把多重符的次数错写成 3，所有包含 double 且后面有核心符的链都不一致
+    runes = {**RUNES, 'double': {**RUNES['double'], 'count': 3}}
+    chains = exhaustive_chains(3) + random_chains(2000, random.Random(1))
+    page = FakePage()
+    report = asyncio.run(differential_test(page, chains, lambda chain: calculate_spell(chain, runes), batch_size=5000))
+    assert not report.passed
+    assert report.round_trips == page.calls < 10
+    assert [m.chain for m in report.minimal] == [('double', 'firebolt'), ('double', 'heal'), ('double', 'iceShard')]
+    assert asyncio.run(differential_test(FakePage(), chains)).passed
+
+
+def test_catalogue_pareto_frontier():
+    catalogue = SpellCatalogue.build(max_length=4)
+    points = np.column_stack([catalogue.metrics[name] for name in METRICS])
+    frontier = {entry.chain for entry in catalogue.pareto()}
+    for index, entry in enumerate(catalogue.entries):
+        dominated = np.any(np.all(points >= points[index], axis=1) & np.any(points > points[index], axis=1))
+        assert (entry.chain in frontier) == (not dominated)
+
+    best = catalogue.top('dmg_per_mp', 1, max_cost=15)[0]
+    assert best.spell.cost <= 15
+
+
+def test_rules_from_config_maps_game_config():
+    def ts_gain(atb, speed, delta_time):
+        # ATBSystem.updatePlayerATB：baseRate * (speed / 10) * deltaTime * 10 / 60，
+        # baseRate 与 10 倍 deltaTime 分别由 baseSpeed 与 speedMultiplier 配置
+        return (atb['baseSpeed'] * (speed / 10) * delta_time * atb['speedMultiplier']) / 60
+
+    default, presets = load_game_config()
+    for config in (default, *presets.values()):
+        battle = Battle(default_player(), 'wolf', random.Random(0), rules=Rules.from_config(config))
+        assert battle._player_gain == pytest.approx(ts_gain(config['atb'], 12, battle.delta_time))
+        assert battle._enemy_gain == pytest.approx(ts_gain(config['atb'], battle.enemy['speed'], battle.delta_time))
+
+    # defaultConfig 与 atb.ts / battleSystem.ts 中写死的值一致（focusValue 除外）
+    rules = Rules.from_config(default)
+    assert Battle(default_player(), 'wolf', rules=rules)._player_gain == \
+        Battle(default_player(), 'wolf', rules=DEFAULT_RULES)._player_gain
+
+    slow = Rules.from_config({**default, 'battle': {'interruptThreshold': 25, 'stunDuration': 1},
+                              'cast': {'baseTime': 2, 'timeMultiplier': 1}})
+    result = Battle(default_player(), 'wolf', random.Random(0), rules=slow).run()
+    assert result.time > simulate('wolf', rng=random.Random(0)).time
+
+
+def test_tuner_improves_on_preset_and_emits_typescript():
+    presets = load_game_config()[1]
+    result = tune('normal', presets=presets, rounds=2, population=4, workers=1, battles=3, enemies=('wolf',),
+                  loadouts={'starter': REFERENCE_LOADOUTS['starter']})
+    assert result.evaluated >= 4
+    assert result.best.loss <= result.baseline.loss
+    assert result.baseline.values == (100, 1, 10, 1)
+    proposed = {**presets, 'normal': result.proposed_config()}
+    assert proposed['normal']['ui'] == presets['normal']['ui']
+    assert parse_ts_objects(format_presets_ts(proposed))['difficultyPresets'] == proposed
+
+
+def test_explorer_finds_soft_lock_and_unreachable_states():
+    wolf = explore_battle(default_player()['spells'], ENEMIES['wolf'])
+    # MP 用完后轮到玩家行动，游戏一直停在行动阶段
+    [lock] = wolf.soft_locks
+    assert (lock.phase, lock.actor, lock.mp) == ('action', 'player', 0)
+    assert wolf.path(lock)[-1] == 'wait(player_atb)' and wolf.dead_ends == [lock]
+    # 没有敌人会吟唱或打断施法
+    assert ('preparation', None, 'preparing', 'channeling', False) in wolf.unreachable
+    assert ('action', 'player', 'stunned', 'preparing', True) in wolf.unreachable
+    # 抽象后三个敌人相同，只探索一次
+    explorations = explore_enemies(max_length=3)
+    assert explorations['wolf'] is explorations['ogre']
+
+
+def test_explorer_reports_victory_followed_by_defeat():
+    enemy = {'dmg': 8, 'skills': [
+        {'id': 'roar', 'damage': 30, 'channelTime': 0},
+        {'id': 'charge', 'damage': 0, 'channelTime': 2},
+    ]}
+    exploration = explore_battle([['firebolt']], enemy)
+    [double_end] = exploration.double_ends
+    assert double_end.outcome == (VICTORY, DEFEAT)
+    assert exploration.path(double_end) == [
+        'wait(player_atb)', 'cast(火球)', 'wait(enemy_atb)', 'enemy(charge)', 'wait(cast_complete)', 'resolve+victory+defeat']
+    assert ('action', 'player', 'stunned', 'channeling', True) not in exploration.unreachable
+
+
+def test_economy_passages_are_exact():
+    # 一个敌人每场 50 经验、10 金币：恰好 2 场升到 2 级，第 3 级还需要 (229 - 0) / 50 向上取整 = 5 场
+    enemies = {'slime': {'experience': 50, 'gold': 10, 'drops': []}}
+    assert list(battles_to_level(2, enemies=enemies).pmf) == [0, 0, 1]
+    assert battles_to_level(3, enemies=enemies).expected == 7
+    # 胜率一半时每场成功的次数服从几何分布
+    assert abs(battles_to_afford('wolfFang', enemies=enemies, win_rates={'slime': 0.5}).expected - 4) < 1e-9
+
+    passage = battles_to_level(5)
+    assert abs(passage.pmf.sum() - 1) < 1e-9
+    assert abs(np.arange(len(passage.pmf)) @ passage.pmf - passage.expected) < 1e-6
+    assert 45 < passage.expected < 55
+    counts = material_counts('wolfFang', 30)
+    assert abs(np.arange(len(counts)) @ counts - 30 * drop_probability('wolfFang')) < 1e-9
+
+
+def test_economy_cache_is_keyed_on_used_table_values():
+    changed = {**MATERIALS, 'wolfFang': {**MATERIALS['wolfFang'], 'dropRate': 0.9}}
+    # 掉落率只影响卖素材时的收入
+    assert battles_to_afford('ogreTooth', materials=changed) is battles_to_afford('ogreTooth')
+    assert battles_to_afford('ogreTooth', sell_drops=True, materials=changed).expected < \
+        battles_to_afford('ogreTooth', sell_drops=True).expected
+    assert battles_to_level(4) is battles_to_level(4)
@@ -0,0 +1,26 @@
+import asyncio
+
+from harness import session
+from sim.crosscheck import cross_check
+
+async def test_sim_crosscheck(pool=None):
+    """在虚拟时钟下回放固定法术脚本，比较模拟器与真实页面的战斗结果"""
+    async with session(pool) as pool:
+        print("=== 模拟器交叉验证 ===")
+        results = await cross_check(pool)
+
+        mismatches = 0
+        for result in results:
+            status = "一致" if result.matches else "不一致"
+            print(f"{result.enemy_id} {result.spells}: {status}")
+            if not result.matches:
+                mismatches += 1
+                print(f"  模拟: {result.simulated}")
+                print(f"  实际: {result.actual}")
+
+        print(f"\n共 {len(results)} 个脚本，{mismatches} 个不一致")
+        print("=== 交叉验证完成 ===")
+        return mismatches == 0
+
+if __name__ == "__main__":
+    asyncio.run(test_sim_crosscheck())
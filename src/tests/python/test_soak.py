@@ -0,0 +1,28 @@
+import asyncio
+
+from harness import session
+from harness.soak import DEFAULT_BATTLES, format_soak_report, soak
+
+async def test_battle_soak(pool=None, battles=DEFAULT_BATTLES, enemy_id=None, seed=1):
+    """
+    连续进行数百场战斗，检查 JS 堆、DOM 节点和事件监听器是否随战斗场数线性增长
+    使用虚拟时钟推进游戏时间，不需要等待真实的战斗时长
+    """
+    async with session(pool, headless=True) as pool:
+        print("=== 长时间运行内存测试 ===")
+        print(f"战斗场数: {battles}, 敌人: {enemy_id or '随机'}, 种子: {seed}")
+
+        def on_sample(sample):
+            if sample.battle % 20 == 0:
+                print(f"第 {sample.battle} 场: JS堆 {sample.heap_used / 1024:.0f}KB, "
+                      f"DOM节点 {sample.nodes}, 事件监听器 {sample.listeners}")
+
+        report = await soak(pool, battles, enemy_id=enemy_id, seed=seed, on_sample=on_sample)
+        print(format_soak_report(report))
+        print(f"\n=== 内存测试{'通过' if report.passed else '未通过'} ===")
+        return report.passed
+
+if __name__ == "__main__":
+    asyncio.run(test_battle_soak())
+    # 可选：只与食人魔战斗（吟唱时间最长）
+    # asyncio.run(test_battle_soak(enemy_id='ogre'))
@@ -0,0 +1,26 @@
+import asyncio
+import random
+import time
+
+from harness import game_page
+from sim.differential import differential_test, exhaustive_chains, format_differential_report, random_chains
+
+async def test_spell_differential(pool=None, count=50000, exhaustive_length=5, seed=0):
+    """穷举短链并随机生成长链，批量比较 Python 模型与页面 calculateSpell 的结果"""
+    async with game_page(pool, headless=True) as page:
+        print("=== 法术计算差分测试 ===")
+        chains = exhaustive_chains(exhaustive_length) + random_chains(count, random.Random(seed), max_length=10)
+        started = time.perf_counter()
+        report = await differential_test(page, chains)
+        elapsed = time.perf_counter() - started
+        print(format_differential_report(report))
+        print(f"耗时 {elapsed:.2f}s")
+        print("=== 差分测试完成 ===")
+        # 全部一致时只有最初的一次批量调用；不一致时缩小过程另有往返
+        assert not report.passed or report.round_trips == 1, f"页面往返 {report.round_trips} 次"
+        return report.passed
+
+if __name__ == "__main__":
+    asyncio.run(test_spell_differential())
+    # 更多随机链：
+    # asyncio.run(test_spell_differential(count=200000, seed=1))